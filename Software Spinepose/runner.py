@@ -2,42 +2,65 @@ import argparse
 import cv2
 import sys
 import os
+import time
 from spine_engine.core.session import HybridEngine
 from spine_engine.brain.reasoner import GeminiReasoner
 from spine_engine.utils.visualization import Visualizer
+from spine_engine.utils.media import ThreadedFrameReader, FrameMetricsWriter, is_video
+from spine_engine.core.executor import BatchExecutor
 
 def main():
     parser = argparse.ArgumentParser(description="Spine-AI Engine Runner")
-    parser.add_argument("--input", type=str, required=True, help="Path to input image/video")
-    parser.add_argument("--output", type=str, default="output.jpg", help="Path to save result")
+    parser.add_argument("--input", type=str, required=True, help="Path to input image, video, or image directory")
+    parser.add_argument("--output", type=str, default=None, help="Path to save result (default: output.jpg, or output.mp4 for video/directory input)")
     parser.add_argument("--mode", type=str, default="medical", choices=["medical", "sports"], help="Analysis mode")
+    parser.add_argument("--metrics", type=str, default=None, help="Per-frame metrics file (.csv or .jsonl) for video/directory input")
+    parser.add_argument("--stride", type=int, default=1, help="Process every Nth frame")
+    parser.add_argument("--max-frames", type=int, default=None, help="Stop after N processed frames")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for video/directory input (0 = one per CPU core)")
+    parser.add_argument("--segment-frames", type=int, default=300, help="Video frames per parallel work item")
     args = parser.parse_args()
-    
+
+    # Load Input
+    if not os.path.exists(args.input):
+        print(f"Error: Input file {args.input} not found.")
+        return
+
+    batch = os.path.isdir(args.input) or is_video(args.input)
+
+    if batch and args.workers != 1:
+        # Each worker process loads its own engine
+        run_parallel(args)
+        return
+
     # Init Modules
     print("[1/4] Initializing Engine...")
     engine = HybridEngine()
     engine.load_models()
-    
+
     print("[2/4] Initializing Brain...")
     # Pass API Key from env if available
     reasoner = GeminiReasoner()
-    
+
     print("[3/4] Initializing Visualizer...")
     viz = Visualizer()
-    
-    # Load Input
-    if not os.path.exists(args.input):
-        print(f"Error: Input file {args.input} not found.")
-        return
-        
+
+    if batch:
+        run_batch(args, engine, viz)
+    else:
+        run_single(args, engine, reasoner, viz)
+
+def run_single(args, engine, reasoner, viz):
+    output = args.output or "output.jpg"
+
     frame = cv2.imread(args.input)
     if frame is None:
         print("Error: Could not read image.")
         return
-        
+
     print(f"[4/4] Processing Frame ({args.mode} mode)...")
     analysis = engine.process_frame(frame)
-    
+
     # Enrichment Phase
     for res in analysis.results:
         if res.metrics and reasoner.available:
@@ -45,13 +68,114 @@ def main():
             insight = reasoner.analyze_context(res.metrics, context_type=args.mode)
             print(f"   > Gemini Insight: {insight}")
             # Attach insight to metrics for potential display (not implemented in viz yet, but printed)
-            
+
     # Visualize
-    out_frame = viz.render(frame, analysis)
-    
+    out_frame = viz.render_multiview(frame, analysis, views=["main"])["main"]
+
     # Save
-    cv2.imwrite(args.output, out_frame)
-    print(f"Done. Result saved to {args.output}")
+    cv2.imwrite(output, out_frame)
+    print(f"Done. Result saved to {output}")
+
+def run_batch(args, engine, viz):
+    """
+    Video / image-directory mode.
+    Frames are decoded on a reader thread and analyzed in order; writes an
+    annotated video plus optional per-frame metrics. The per-person Gemini
+    enrichment is skipped here (one remote call per frame is not practical).
+    """
+    output = args.output or "output.mp4"
+    reader = ThreadedFrameReader(args.input, stride=args.stride, max_frames=args.max_frames)
+    expected = reader.expected_frames
+
+    # Consecutive video frames share tracking state; unrelated images do not
+    stream = engine.create_stream() if is_video(args.input) else None
+    metrics_writer = FrameMetricsWriter(args.metrics) if args.metrics else None
+    writer = None
+    frame_size = None
+
+    print(f"[4/4] Processing {expected or 'unknown number of'} frames ({args.mode} mode)...")
+    start = time.perf_counter()
+    last_report = start
+    processed = 0
+
+    try:
+        for item in reader.start():
+            analysis = engine.process_frame(item.image, frame_id=item.index, stream=stream,
+                                            timestamp_ms=item.timestamp_ms)
+            out_frame = viz.render_multiview(item.image, analysis, views=["main"])["main"]
+
+            if writer is None:
+                frame_size = (out_frame.shape[1], out_frame.shape[0])
+                fps = reader.fps / reader.stride
+                writer = cv2.VideoWriter(output, cv2.VideoWriter_fourcc(*"mp4v"), fps, frame_size)
+            if (out_frame.shape[1], out_frame.shape[0]) != frame_size:
+                # Directory images may differ in size; the video needs one size
+                out_frame = cv2.resize(out_frame, frame_size)
+            writer.write(out_frame)
+
+            if metrics_writer:
+                metrics_writer.write(item, analysis)
+
+            processed += 1
+            now = time.perf_counter()
+            if now - last_report >= 1.0:
+                last_report = now
+                rate = processed / (now - start)
+                total = f"/{expected}" if expected else ""
+                print(f"   > {processed}{total} frames | {rate:.1f} FPS", end="\r", flush=True)
+    except KeyboardInterrupt:
+        print("\nInterrupted, finalizing outputs...")
+        reader.stop()
+    finally:
+        if writer is not None:
+            writer.release()
+        if metrics_writer:
+            metrics_writer.close()
+        if stream is not None:
+            stream.close()
+
+    elapsed = time.perf_counter() - start
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"\nDone. {processed} frames in {elapsed:.1f}s ({rate:.1f} FPS). Result saved to {output}")
+    if args.metrics:
+        print(f"Metrics saved to {args.metrics}")
+
+def run_parallel(args):
+    """
+    Multiprocess video/directory mode: images and video segments are spread
+    across worker processes and merged back in input order. Produces the
+    metrics file only; the annotated video needs the single-process mode.
+    """
+    if args.output:
+        print("Note: --output is ignored with --workers; use --workers 1 for an annotated video.")
+    if args.max_frames:
+        print("Note: --max-frames is ignored with --workers.")
+    if not args.metrics:
+        # Metrics are the only output of this mode
+        args.metrics = "output_metrics.csv"
+        print(f"Note: No --metrics given, writing per-frame metrics to {args.metrics}.")
+
+    executor = BatchExecutor(
+        workers=args.workers or None,
+        stride=args.stride,
+        segment_frames=args.segment_frames
+    )
+    metrics_writer = FrameMetricsWriter(args.metrics)
+
+    print(f"[1/1] Processing with {executor.workers} worker processes ({args.mode} mode)...")
+    try:
+        for result in executor.run([args.input]):
+            if not result.ok:
+                print(f"\n   > FAILED {result.path}: {result.error}")
+            else:
+                metrics_writer.write_rows(result.rows)
+            s = executor.summary
+            print(f"   > {s.items} items | {s.frames} frames | {s.fps:.1f} FPS", end="\r", flush=True)
+    finally:
+        metrics_writer.close()
+
+    print(f"\nDone. {executor.summary}")
+    print(f"Metrics saved to {args.metrics}")
 
 if __name__ == "__main__":
     main()
@@ -1,49 +1,183 @@
 
 import cv2
 import asyncio
-import base64
 import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import replace
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
 import uvicorn
 import numpy as np
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Query
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 
 from spine_engine.core.session import HybridEngine
 from spine_engine.utils.visualization import Visualizer
 from spine_engine.brain.reasoner import GeminiReasoner
+from spine_engine.brain.cache import ReportCache
 from spine_engine.core.storage import KnowledgeBase
+from spine_engine.core.writer import KnowledgeBaseWriter
+from spine_engine.core.executor import EnginePool, PoolBusy, analyze_upload
+from spine_engine.core.pipeline import StreamPipeline
+from spine_engine.core.hub import CameraHub
+from spine_engine.core.sources import DEFAULT_SOURCE, parse_source_spec
+from spine_engine.utils.telemetry import Telemetry
+from spine_engine.utils.protocol import (
+    BINARY_SUBPROTOCOL, negotiate_subprotocol, pack_binary_frame, pack_json_frame,
+    default_view_subscription, parse_view_subscription, encode_view
+)
 
 app = FastAPI()
 
+# Rolling per-stage / per-endpoint latency histograms, served at /metrics
+telemetry = Telemetry()
+
+@app.middleware("http")
+async def record_request_latency(request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template, not raw path, to keep label cardinality bounded
+    route = request.scope.get("route")
+    telemetry.observe("endpoint", getattr(route, "path", "unmatched"), (time.perf_counter() - start) * 1000.0)
+    return response
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(telemetry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 # Mount web directory
 app.mount("/static", StaticFiles(directory="web"), name="static")
 
 # Global Engine Instances
-try:
-    print("Initializing Spine-AI Engine...")
-    engine = HybridEngine()
-    engine.load_models()
-    viz = Visualizer()
-    reasoner = GeminiReasoner()
-    kb = KnowledgeBase(db_root="spine_db")
-    
-    # Initialize Patient DB
-    from spine_engine.core.storage import PatientDatabase
-    patient_db = PatientDatabase(db_root="spine_db")
-    
-    print("Engine Ready.")
-    
-except Exception as e:
-    print(f"CRITICAL: Engine Init Failed: {e}")
+# Constructing these is cheap; model weights, torch/mediapipe and the Gemini
+# client are loaded by load_engine() after the port is bound.
+# Person detection from all live sessions and uploads is batched in one scheduler
+engine = HybridEngine({
+    "batching_config": {"enabled": True, "window_ms": 5, "max_batch": 8, "max_latency_ms": 20}
+})
+viz = Visualizer()
+reasoner = None
+kb = KnowledgeBase(db_root="spine_db")
+# Snapshots and index appends happen off the request/stream path
+kb_writer = KnowledgeBaseWriter(kb)
+
+# Initialize Patient DB
+from spine_engine.core.storage import PatientDatabase
+patient_db = PatientDatabase(db_root="spine_db")
+
+# Uploads run in worker processes, each with its own engine; frames are handed
+# over through shared memory. Workers are single-threaded so throughput scales
+# with cores; at most `max_pending` uploads are admitted, the rest get a 503.
+UPLOAD_POOL_CONFIG = {
+    "enabled": True,
+    "workers": max(1, (os.cpu_count() or 2) // 2),  # Leaves cores for the live path
+    "threads_per_worker": 1,
+    "max_pending": None                              # Default: 2 per worker
+}
+upload_pool = None
+# Fallback when the pool is disabled or failed to start: one upload at a time, off the event loop
+local_upload_lock = asyncio.Lock()
+pool_restart_task = None
+
+engine_ready = threading.Event()  # Set once loading finished, successfully or not
+engine_status = {"state": "loading", "error": None, "load_s": None}
+
+def load_engine():
+    global reasoner
+    start = time.perf_counter()
+    try:
+        print("Initializing Spine-AI Engine...")
+        engine.load_models()
+        engine.warmup()
+        reasoner = GeminiReasoner(cache=ReportCache({"disk_path": "spine_db/report_cache.sqlite"}))
+        start_upload_pool()
+        engine_status["state"] = "ready"
+        print(f"Engine Ready ({time.perf_counter() - start:.1f}s).")
+    except Exception as e:
+        engine_status["state"] = "failed"
+        engine_status["error"] = str(e)
+        print(f"CRITICAL: Engine Init Failed: {e}")
+    finally:
+        engine_status["load_s"] = round(time.perf_counter() - start, 2)
+        engine_ready.set()
+
+def start_upload_pool():
+    global upload_pool
+    if not UPLOAD_POOL_CONFIG["enabled"]:
+        return
+    try:
+        print(f"Starting {UPLOAD_POOL_CONFIG['workers']} upload workers...")
+        upload_pool = EnginePool(
+            workers=UPLOAD_POOL_CONFIG["workers"],
+            threads_per_worker=UPLOAD_POOL_CONFIG["threads_per_worker"],
+            max_pending=UPLOAD_POOL_CONFIG["max_pending"]
+        ).start()
+    except Exception as e:
+        # Uploads still work, in-process
+        print(f"Warning: Upload pool failed to start ({e}); analyzing uploads in-process.")
+        upload_pool = None
+
+def engine_available() -> bool:
+    return engine_status["state"] == "ready"
+
+def not_ready_response() -> JSONResponse:
+    return JSONResponse(
+        {**engine_status, "error": engine_status["error"] or "Engine not ready"},
+        status_code=503,
+        headers={"Retry-After": "5"} if engine_status["state"] == "loading" else None
+    )
+
+@app.on_event("startup")
+async def start_engine_load():
+    # uvicorn binds the port as soon as startup returns; models load in the background
+    threading.Thread(target=load_engine, name="spine-engine-load", daemon=True).start()
+
+@app.get("/ready")
+async def ready():
+    if engine_available():
+        return {
+            "status": "ready",
+            "load_s": engine_status["load_s"],
+            "upload_pool": upload_pool.stats() if upload_pool is not None else None
+        }
+    return not_ready_response()
+
+@app.on_event("shutdown")
+def flush_knowledge_base():
+    # Drain queued RAG entries before exit
+    kb_writer.close()
+    engine.close()
+    if upload_pool is not None:
+        upload_pool.close()
 
 @app.get("/patients")
-async def get_patients():
-    return patient_db.get_all_patients()
+async def get_patients(limit: int = Query(100, ge=1, le=PatientDatabase.MAX_PAGE),
+                       offset: int = Query(0, ge=0)):
+    return {
+        "items": patient_db.list_patients(limit=limit, offset=offset),
+        "total": patient_db.count(),
+        "limit": limit,
+        "offset": offset
+    }
+
+@app.get("/patients/{patient_id}")
+async def get_patient(patient_id: str):
+    patient = patient_db.get_patient(patient_id)
+    if patient is None:
+        return JSONResponse({"error": "Patient not found"}, status_code=404)
+    return patient
 
 @app.post("/patients")
 async def create_patient(data: dict):
-    return patient_db.add_patient(data)
+    try:
+        return patient_db.add_patient(data)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=409)
 
 @app.get("/")
 async def get():
@@ -53,29 +187,88 @@ async def get():
     html = html.replace('src="script.js"', 'src="/static/script.js"')
     return HTMLResponse(html)
 
+# Remote reports that missed the upload deadline, by report ID (oldest evicted first)
+pending_reports: "OrderedDict[str, asyncio.Task]" = OrderedDict()
+MAX_PENDING_REPORTS = 256
+
+def track_pending_report(task: asyncio.Task) -> str:
+    report_id = str(uuid.uuid4())
+    pending_reports[report_id] = task
+    while len(pending_reports) > MAX_PENDING_REPORTS:
+        pending_reports.popitem(last=False)
+    return report_id
+
+@app.get("/reports/{report_id}")
+async def get_report(report_id: str):
+    task = pending_reports.get(report_id)
+    if task is None:
+        return JSONResponse({"error": "Unknown report"}, status_code=404)
+    if not task.done():
+        return {"status": "pending"}
+    del pending_reports[report_id]
+    if task.cancelled() or task.exception() is not None:
+        return {"status": "failed"}
+    return {"status": "ready", "report": task.result(), "report_source": "remote"}
+
+def restart_upload_pool():
+    try:
+        if upload_pool.restart():
+            print("Upload pool restarted.")
+    except Exception as e:
+        # Stays broken: uploads keep running in-process, the next one retries the restart
+        print(f"Warning: Upload pool restart failed ({e}).")
+
+def schedule_pool_restart():
+    global pool_restart_task
+    if pool_restart_task is None or pool_restart_task.done():
+        # Spawning workers takes seconds; keep it off the event loop
+        pool_restart_task = asyncio.ensure_future(asyncio.to_thread(restart_upload_pool))
+
+async def analyze_in_pool(frame):
+    """
+    Runs an upload on the worker pool, or in-process when there is none.
+    If a worker died, the pool is restarted in the background and this
+    upload is analyzed in-process instead of failing.
+    """
+    if upload_pool is not None:
+        try:
+            return await asyncio.wrap_future(upload_pool.submit(frame))
+        except BrokenProcessPool:
+            print("Warning: Upload pool is broken; restarting it, analyzing this upload in-process.")
+            schedule_pool_restart()
+    async with local_upload_lock:
+        return await asyncio.to_thread(analyze_upload, engine, viz, frame)
+
 @app.post("/analyze_file")
 async def analyze_file(file: UploadFile = File(...)):
+    if not engine_available():
+        return not_ready_response()
     try:
         contents = await file.read()
         nparr = np.frombuffer(contents, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        frame = await asyncio.to_thread(cv2.imdecode, nparr, cv2.IMREAD_COLOR)
         
         if frame is None:
             return JSONResponse({"error": "Invalid image data"}, status_code=400)
             
-        # Process
-        analysis = engine.process_frame(frame)
-        
-        # Visualize
-        views = viz.render_multiview(frame, analysis)
-        
-        # Encode Helper
-        def encode_img(img):
-            _, buffer = cv2.imencode('.jpg', img)
-            return base64.b64encode(buffer).decode('utf-8')
+        # Process, visualize and encode in a worker process
+        try:
+            upload = await analyze_in_pool(frame)
+        except PoolBusy as e:
+            return JSONResponse(
+                {"error": "Server busy, too many uploads in progress"},
+                status_code=503,
+                headers={"Retry-After": str(e.retry_after_s)}
+            )
+        analysis, views = upload.analysis, upload.views
+        # Same stage histograms as the live path: engine stages, then render/encode
+        telemetry.observe_stages(analysis.timings_ms)
+        telemetry.observe_stages(upload.timings_ms)
         
         metrics_data = {}
         report_text = "Analysis complete. No significant spine detected."
+        report_source = "none"
+        report_id = None
         
         if analysis.results:
             res = analysis.results[0]
@@ -86,109 +279,227 @@ async def analyze_file(file: UploadFile = File(...)):
                     "health_score": round(res.metrics.health_score, 1)
                 }
                 
-                kb.save_entry(analysis, frame, activity_context="upload_analysis")
+                kb_writer.submit(analysis, frame, activity_context="upload_analysis")
                 
-                try:
-                    report_text = reasoner.analyze_context(res.metrics, context_type="medical")
-                except Exception as e:
-                    print(f"AI Error: {e}")
-                    report_text = "AI Diagnostic Service Unavailable."
+                # Bounded wait; a slow model answers with the local template first
+                report = await reasoner.analyze(res.metrics, context_type="medical")
+                report_text = report.text
+                report_source = report.source
+                if report.pending is not None:
+                    report_id = track_pending_report(report.pending)
 
         return {
-            "image": encode_img(views['main']),
-            "image_sagittal": encode_img(views['sagittal']),
-            "image_coronal": encode_img(views['coronal']),
-            "image_heatmap": encode_img(views['heatmap']),
+            "image": views['main'],
+            "image_sagittal": views['sagittal'],
+            "image_coronal": views['coronal'],
+            "image_heatmap": views['heatmap'],
             "metrics": metrics_data,
-            "report": report_text
+            "report": report_text,
+            "report_source": report_source,
+            "report_id": report_id
         }
         
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
+# Live-stream budget for the adaptive quality controller
+ADAPTIVE_CONFIG = {
+    "target_fps": 15,
+    "target_latency_ms": 120
+}
+
+# One capture + analysis loop per frame source, fanned out to every viewer;
+# the quality ladder lives on the shared source
+camera_hub = CameraHub(
+    engine,
+    adaptive_config=ADAPTIVE_CONFIG,
+    on_analysis=lambda analysis: telemetry.observe_stages(analysis.timings_ms)
+)
+
+# Video/image-folder sources selectable over /ws must live under these directories
+MEDIA_ROOTS = ["."]
+# Network streams selectable over /ws, e.g. {"schemes": ["rtsp"], "hosts": ["192.168.1.20"]};
+# empty = webcam indices only
+STREAM_ALLOWLIST = {"schemes": ["rtsp", "rtsps"], "hosts": []}
+
+@app.get("/streams")
+async def streams():
+    """Shared live sources with their viewer counts."""
+    return camera_hub.status()
+
+def limit_views(subscription, point):
+    """Caps a view subscription to the operating point's view count and JPEG quality."""
+    names = list(subscription)
+    if "main" in names:
+        # The main view goes first, the others follow in subscription order
+        names.remove("main")
+        names.insert(0, "main")
+    limited = {}
+    for name in names[:point.max_views]:
+        spec = subscription[name]
+        limited[name] = replace(spec, quality=min(spec.quality or 95, point.jpeg_quality))
+    return limited
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    await websocket.accept()
-    print("Client Connected.")
+    # Binary framing is negotiated via the WebSocket subprotocol; clients that
+    # offer none keep the legacy base64-in-JSON messages.
+    subprotocol = negotiate_subprotocol(websocket.scope.get("subprotocols", []))
+    binary = subprotocol == BINARY_SUBPROTOCOL
+    await websocket.accept(subprotocol=subprotocol)
+    print(f"Client Connected ({'binary' if binary else 'json'} protocol).")
+
+    if not engine_ready.is_set():
+        # Early clients wait for the background model load
+        await asyncio.to_thread(engine_ready.wait)
+    if not engine_available():
+        await websocket.close(code=1011, reason="Engine init failed")
+        return
     
     state = {
         "active": False,
         "mode": "medical",
         "recording": False,
-        "activity": "standing"
+        "activity": "standing",
+        "views": default_view_subscription(),
+        "debug": False,      # Adds per-stage timings to each message header
+        "last_send_ms": 0.0,
+        "source": DEFAULT_SOURCE
     }
 
-    async def stream_video():
-        cap = cv2.VideoCapture(0)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    # Shared source: the hub captures and analyzes each frame once for all
+    # viewers; this connection only renders and encodes its own views.
+    # Quality ladder (stride, YOLO imgsz, pose complexity, JPEG quality, views)
+    # is tuned per source to hold the latency/FPS budget on this host.
+    stream = {}  # Current hub subscription, render pipeline and sender task
+
+    def next_packet(viewer):
+        # Runs on the pipeline's capture thread; blocks until the hub has a new analyzed frame
+        packet = viewer.get()
+        if packet is None:
+            return None
+        _, frame, analysis = packet
+        return frame, analysis, viewer.source.adaptive
+
+    processed = {"count": 0}
+
+    def infer(packet, frame_id):
+        # Analysis already ran on the hub; only per-viewer side effects here
+        frame, analysis, _ = packet
         
-        try:
-            frame_count = 0
-            while True:
-                if not state["active"]:
-                    await asyncio.sleep(0.1)
-                    continue
-
-                ret, frame = cap.read()
-                if not ret:
-                    print("Camera read failed.")
-                    break
-                    
-                # Process
-                analysis = engine.process_frame(frame)
-                
-                # RAG Storage
-                if state["recording"] and frame_count % 30 == 0:
-                    entry_id = kb.save_entry(analysis, frame, activity_context=state["activity"])
-                    if entry_id:
-                        print(f"RAG Saved: {entry_id} [{state['activity']}]")
-                
-                frame_count += 1
-                
-                # Visualize
-                views = viz.render_multiview(frame, analysis)
-                
-                def encode_img(img):
-                    _, buffer = cv2.imencode('.jpg', img)
-                    return base64.b64encode(buffer).decode('utf-8')
+        # RAG Storage
+        if state["recording"] and processed["count"] % 30 == 0:
+            entry_id = kb_writer.submit(analysis, frame, activity_context=state["activity"])
+            if entry_id:
+                print(f"RAG Queued: {entry_id} [{state['activity']}]")
+            elif analysis.results:
+                print(f"RAG Dropped: writer backlog full ({kb_writer.dropped} dropped)")
+        
+        processed["count"] += 1
+        return analysis
 
-                # Metrics Initialization (Defensive)
-                metrics_data = {}
-                
-                if analysis.results:
-                    res = analysis.results[0]
-                    if res.metrics:
-                        metrics_data = {
-                            "cobb_angle": round(res.metrics.cobb_angle_thoracic, 1) if res.metrics.cobb_angle_thoracic else 0,
-                            "lumbar_flexion": round(res.metrics.lumbar_flexion, 1) if res.metrics.lumbar_flexion else 0,
-                            "cervical_flexion": round(res.metrics.cervical_flexion, 1) if res.metrics.cervical_flexion else 0,
-                            "symmetry_index": round(res.metrics.symmetry_index, 1) if res.metrics.symmetry_index else 0,
-                            "health_score": round(res.metrics.health_score, 1)
-                        }
-
-                response = {
-                    "image": encode_img(views['main']),
-                    "image_sagittal": encode_img(views['sagittal']),
-                    "image_coronal": encode_img(views['coronal']),
-                    "image_heatmap": encode_img(views['heatmap']),
-                    "metrics": metrics_data,
-                    "status": "recording" if state["recording"] else "active",
-                    "mode": state["mode"]
+    def render(packet, analysis):
+        # Runs on the render/encode worker thread; returns the finished wire message.
+        # Only subscribed views are rendered and encoded.
+        frame, _, adaptive = packet
+        start = time.perf_counter()
+        subscription = limit_views(state["views"], adaptive.current)
+        views = viz.render_multiview(frame, analysis, views=subscription.keys())
+        rendered = time.perf_counter()
+        segments = [(name, encode_view(views[name], spec)) for name, spec in subscription.items()]
+        encoded = time.perf_counter()
+        render_ms = (rendered - start) * 1000.0
+        encode_ms = (encoded - rendered) * 1000.0
+        telemetry.observe("stage", "render", render_ms)
+        telemetry.observe("stage", "encode", encode_ms)
+
+        # Metrics Initialization (Defensive)
+        metrics_data = {}
+        
+        if analysis.results:
+            res = analysis.results[0]
+            if res.metrics:
+                metrics_data = {
+                    "cobb_angle": round(res.metrics.cobb_angle_thoracic, 1) if res.metrics.cobb_angle_thoracic else 0,
+                    "lumbar_flexion": round(res.metrics.lumbar_flexion, 1) if res.metrics.lumbar_flexion else 0,
+                    "cervical_flexion": round(res.metrics.cervical_flexion, 1) if res.metrics.cervical_flexion else 0,
+                    "symmetry_index": round(res.metrics.symmetry_index, 1) if res.metrics.symmetry_index else 0,
+                    "health_score": round(res.metrics.health_score, 1)
                 }
-                
-                await websocket.send_json(response)
-                await asyncio.sleep(0.03)
-                
+
+        header = {
+            "metrics": metrics_data,
+            "detection": analysis.detection_mode,
+            "status": "recording" if state["recording"] else "active",
+            "mode": state["mode"],
+            "source": state["source"]["type"],
+            "frame_id": analysis.frame_id,
+            "timestamp_ms": round(analysis.timestamp_ms, 1),
+            "operating_point": adaptive.status()
+        }
+        if state["debug"]:
+            # "send" is the previous message's; this one has not been sent yet
+            header["timings_ms"] = {
+                **{k: round(v, 2) for k, v in analysis.timings_ms.items()},
+                "render": round(render_ms, 2),
+                "encode": round(encode_ms, 2),
+                "send": round(state["last_send_ms"], 2)
+            }
+
+        message = pack_binary_frame(header, segments) if binary else pack_json_frame(header, segments)
+        adaptive.record("render", time.perf_counter() - start)
+        # Processing time carried with the payload, for the per-message latency
+        processing_ms = analysis.timings_ms.get("total", 0.0) + (time.perf_counter() - start) * 1000.0
+        return message, processing_ms
+
+    def open_stream(spec):
+        # hub packets -> per-viewer side effects -> render/encode worker -> async sender
+        viewer = camera_hub.subscribe(spec)
+        pipeline = StreamPipeline(
+            partial(next_packet, viewer), infer, render,
+            on_close=viewer.close  # The last viewer to leave releases the source
+        )
+        pipeline.start()
+        if state["active"]:
+            viewer.resume()
+            pipeline.resume()
+        stream.update(viewer=viewer, pipeline=pipeline, task=asyncio.create_task(stream_video(pipeline, viewer)))
+
+    def close_stream(pipeline=None, viewer=None):
+        pipeline = pipeline or stream.get("pipeline")
+        viewer = viewer or stream.get("viewer")
+        if pipeline is not None:
+            pipeline.stop()
+        if viewer is not None:
+            viewer.close()  # Also unblocks a capture thread waiting in next_packet()
+
+    async def stream_video(pipeline, viewer):
+        try:
+            async for message, processing_ms in pipeline.results():
+                start = time.perf_counter()
+                if binary:
+                    await websocket.send_bytes(message)
+                else:
+                    await websocket.send_text(message)
+                send_ms = (time.perf_counter() - start) * 1000.0
+                state["last_send_ms"] = send_ms
+                telemetry.observe("stage", "send", send_ms)
+                telemetry.observe("endpoint", "/ws", processing_ms + send_ms)
+                telemetry.increment("spine_ws_messages_total")
+
+            error = viewer.source.error
+            if error and stream.get("viewer") is viewer:
+                # Source failed (e.g. could not be opened): tell the client instead of going quiet
+                await websocket.send_json({"error": f"Source failed: {error}"})
+
         except Exception as e:
             print(f"Stream Error: {e}")
             import traceback
             traceback.print_exc()
         finally:
-            cap.release()
-            print("Camera released.")
+            close_stream(pipeline, viewer)
 
-    stream_task = asyncio.create_task(stream_video())
+    open_stream(state["source"])
 
     try:
         while True:
@@ -197,10 +508,14 @@ async def websocket_endpoint(websocket: WebSocket):
             
             if command == "start":
                 state["active"] = True
+                stream["viewer"].resume()
+                stream["pipeline"].resume()
                 print("Stream Started.")
             elif command == "stop":
                 state["active"] = False
                 state["recording"] = False
+                stream["viewer"].pause()
+                stream["pipeline"].pause()
                 print("Stream Stopped.")
             elif command == "set_mode":
                 state["mode"] = data.get("value", "medical")
@@ -209,13 +524,38 @@ async def websocket_endpoint(websocket: WebSocket):
                 print(f"Recording State: {state['recording']}")
             elif command == "set_activity":
                 state["activity"] = data.get("value", "standing")
+            elif command == "set_debug":
+                state["debug"] = bool(data.get("value", False))
+            elif command == "subscribe_views":
+                # e.g. {"main": {"width": 960, "quality": 80}, "heatmap": {"width": 320}}
+                try:
+                    state["views"] = parse_view_subscription(data.get("value", {}))
+                except (ValueError, TypeError) as e:
+                    print(f"Invalid view subscription: {e}")
+                    await websocket.send_json({"error": f"Invalid view subscription: {e}"})
+            elif command == "set_source":
+                # e.g. {"type": "video", "path": "clips/squat.mp4", "realtime": false}
+                try:
+                    spec = parse_source_spec(data.get("value"), allowed_roots=MEDIA_ROOTS,
+                                             allowed_streams=STREAM_ALLOWLIST)
+                except (ValueError, TypeError) as e:
+                    print(f"Invalid source: {e}")
+                    await websocket.send_json({"error": f"Invalid source: {e}"})
+                else:
+                    # The sender task of the old stream ends on its own once its pipeline stops
+                    close_stream()
+                    state["source"] = spec
+                    open_stream(spec)
+                    print(f"Source switched: {spec['type']}")
                 
     except WebSocketDisconnect:
         print("WebSocket Disconnected.")
-        stream_task.cancel()
+        stream["task"].cancel()
+        close_stream()
     except Exception as e:
         print(f"WebSocket Error: {e}")
-        stream_task.cancel()
+        stream["task"].cancel()
+        close_stream()
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
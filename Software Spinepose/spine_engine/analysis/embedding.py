@@ -0,0 +1,43 @@
+import numpy as np
+from typing import Any
+
+from ..core.types import Landmarks, LANDMARK_INDEX, NUM_LANDMARKS
+
+_LS, _RS = LANDMARK_INDEX['LEFT_SHOULDER'], LANDMARK_INDEX['RIGHT_SHOULDER']
+_LH, _RH = LANDMARK_INDEX['LEFT_HIP'], LANDMARK_INDEX['RIGHT_HIP']
+
+# 33 landmarks x (x, y)
+EMBEDDING_DIM = NUM_LANDMARKS * 2
+
+def pose_embeddings(landmarks: np.ndarray) -> np.ndarray:
+    """
+    Translation- and scale-invariant pose embeddings for a batch.
+    landmarks: (N, 33, >=2) array in MediaPipe order (normalized image coords).
+    Returns (N, 66) float32, unit L2 norm per row.
+
+    Each skeleton is centered on the mid-hip and divided by its torso length
+    (mid-hip to mid-shoulder), so position in frame and distance from the camera
+    drop out; what remains is the posture itself.
+    """
+    lm = np.asarray(landmarks, dtype=np.float32)
+    if lm.ndim == 2:
+        lm = lm[None]
+    xy = lm[:, :, :2]
+
+    mid_hip = (xy[:, _LH] + xy[:, _RH]) / 2
+    mid_shoulder = (xy[:, _LS] + xy[:, _RS]) / 2
+    centered = xy - mid_hip[:, None, :]
+
+    torso = np.linalg.norm(mid_shoulder - mid_hip, axis=1)
+    # Degenerate torso (e.g. occluded): fall back to the skeleton's extent
+    extent = np.abs(centered).reshape(len(xy), -1).max(axis=1)
+    scale = np.where(torso > 1e-6, torso, np.maximum(extent, 1e-6))
+
+    flat = (centered / scale[:, None, None]).reshape(len(xy), EMBEDDING_DIM)
+    norms = np.linalg.norm(flat, axis=1, keepdims=True)
+    return (flat / np.maximum(norms, 1e-12)).astype(np.float32)
+
+def pose_embedding(landmarks: Any) -> np.ndarray:
+    """Single-person pose_embeddings(). Accepts Landmarks or a (33, >=2) array."""
+    data = landmarks.data if isinstance(landmarks, Landmarks) else landmarks
+    return pose_embeddings(np.asarray(data))[0]
@@ -1,5 +1,5 @@
 import numpy as np
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from ..core.types import Keypoint, SpineMetrics
 
 def calculate_angle_3d(a: Keypoint, b: Keypoint, c: Keypoint) -> float:
@@ -26,7 +26,10 @@ def calculate_slope_angle(p1: Keypoint, p2: Keypoint) -> float:
     return np.degrees(np.arctan2(dy, dx))
 
 def analyze_biomechanics(landmarks: Dict[str, Keypoint]) -> SpineMetrics:
-    """Compute biomechanical metrics from landmarks."""
+    """
+    Compute biomechanical metrics from a name -> Keypoint mapping (legacy callers).
+    The engine uses analyze_biomechanics_batch() on the landmark array instead.
+    """
     metrics = SpineMetrics()
     
     # Extract key landmarks
@@ -130,3 +133,95 @@ def analyze_biomechanics(landmarks: Dict[str, Keypoint]) -> SpineMetrics:
         metrics.health_score = max(0.0, score)
         
     return metrics
+
+# Landmark indices (MediaPipe order) used by the batch path
+_NOSE, _LE, _RE = 0, 7, 8
+_LS, _RS, _LH, _RH = 11, 12, 23, 24
+
+def analyze_biomechanics_batch(landmarks: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized analyze_biomechanics() over a batch of people/frames.
+    landmarks: (N, 33, 4) array of (x, y, z, visibility) in MediaPipe order.
+    Returns a dict of (N,) arrays keyed by SpineMetrics field name.
+
+    Mirrors the scalar path operation for operation (in float64), so results are
+    identical to calling analyze_biomechanics() per row; the scalar path stays the reference.
+    """
+    lm = np.asarray(landmarks, dtype=np.float32).astype(np.float64)
+    if lm.ndim == 2:
+        lm = lm[None]
+    n = lm.shape[0]
+
+    ls, rs = lm[:, _LS, :3], lm[:, _RS, :3]
+    lh, rh = lm[:, _LH, :3], lm[:, _RH, :3]
+    le, re = lm[:, _LE, :3], lm[:, _RE, :3]
+
+    # 1. Estimated Cobb Angle (shoulder line vs hip line)
+    shoulder_slope = np.degrees(np.arctan2(rs[:, 1] - ls[:, 1], rs[:, 0] - ls[:, 0]))
+    hip_slope = np.degrees(np.arctan2(rh[:, 1] - lh[:, 1], rh[:, 0] - lh[:, 0]))
+    cobb = np.abs(shoulder_slope - hip_slope)
+
+    # 2. Lumbar Flexion: trunk vector (mid-hip -> mid-shoulder) against vertical (0, -1, 0)
+    mid_hip = (lh + rh) / 2
+    mid_shoulder = (ls + rs) / 2
+    trunk_vec = mid_shoulder - mid_hip
+    flexion = _angle_to_vertical(trunk_vec)
+
+    # 3. Cervical Flexion: mid-shoulder -> mid-ear against vertical
+    mid_ear = (le + re) / 2
+    neck_vec = mid_ear - mid_shoulder
+    cervical = _angle_to_vertical(neck_vec)
+
+    # 4. Symmetry Index: left vs right shoulder->hip length (2D)
+    left_len = _row_norm(ls[:, :2] - lh[:, :2])
+    right_len = _row_norm(rs[:, :2] - rh[:, :2])
+    longer = np.where(right_len > left_len, right_len, left_len)
+    shorter = np.where(right_len < left_len, right_len, left_len)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        symmetry = np.where(longer > 0, (shorter / longer) * 100, 100.0)
+
+    # 5. Health Score
+    score = np.full(n, 100.0)
+    score = np.where(cobb > 5, score - (cobb - 5) * 3, score)
+    forward_head = cervical > 20
+    score = np.where(forward_head, score - (cervical - 20) * 1.5, score)
+    score = np.where(symmetry < 95, score - (95 - symmetry) * 2, score)
+    health = np.where(score > 0.0, score, 0.0)
+
+    return {
+        "cobb_angle_thoracic": cobb,
+        "lumbar_flexion": flexion,
+        "cervical_flexion": cervical,
+        "symmetry_index": symmetry,
+        "health_score": health,
+        "posture_type": np.where(forward_head, "Forward Head", "Neutral"),
+    }
+
+def _angle_to_vertical(vec: np.ndarray) -> np.ndarray:
+    """Row-wise angle (degrees) between 3D vectors and the image 'up' axis (0, -1, 0)."""
+    vertical_vec = np.array([0, -1, 0])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cosine = (vec @ vertical_vec) / (_row_norm(vec) * np.linalg.norm(vertical_vec))
+    return np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+
+def _row_norm(vec: np.ndarray) -> np.ndarray:
+    """
+    Row-wise L2 norm, computed as sqrt(v . v) with stacked matmul: the same
+    accumulation as np.linalg.norm on a single vector, so results match bit for bit.
+    """
+    vec = np.ascontiguousarray(vec)
+    return np.sqrt(np.matmul(vec[:, None, :], vec[:, :, None])[:, 0, 0])
+
+def batch_to_metrics(batch: Dict[str, np.ndarray]) -> List[SpineMetrics]:
+    """Unpacks analyze_biomechanics_batch() output into per-row SpineMetrics."""
+    return [
+        SpineMetrics(
+            cobb_angle_thoracic=float(batch["cobb_angle_thoracic"][i]),
+            lumbar_flexion=float(batch["lumbar_flexion"][i]),
+            cervical_flexion=float(batch["cervical_flexion"][i]),
+            symmetry_index=float(batch["symmetry_index"][i]),
+            health_score=float(batch["health_score"][i]),
+            posture_type=str(batch["posture_type"][i]),
+        )
+        for i in range(len(batch["health_score"]))
+    ]
@@ -0,0 +1,129 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from ..core.types import SpineMetrics
+
+class ReportCache:
+    """
+    Memoizes reasoner reports by context type + quantized metrics.
+    Postures that differ by less than a bin share one report, so repeated
+    uploads and steady-state checks skip the remote call.
+
+    Tiers: an in-memory LRU, plus an optional SQLite file that survives restarts.
+    Entries older than the TTL are treated as misses in both tiers.
+
+    Config keys (all optional):
+    - cobb_bin, flexion_bin, score_bin: Quantization step per metric (degrees / points)
+    - max_entries: LRU capacity
+    - ttl_s: Entry lifetime in seconds (None = no expiry)
+    - disk_path: SQLite file for the persistent tier (None = memory only)
+    """
+
+    def __init__(self, config: Optional[dict] = None):
+        self.config = config or {}
+        self.cobb_bin = self.config.get("cobb_bin", 1.0)
+        self.flexion_bin = self.config.get("flexion_bin", 1.0)
+        self.score_bin = self.config.get("score_bin", 2.0)
+        self.max_entries = self.config.get("max_entries", 512)
+        self.ttl_s = self.config.get("ttl_s", 24 * 3600)
+        self.disk_path = self.config.get("disk_path")
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._disk: Optional[sqlite3.Connection] = None
+        if self.disk_path:
+            os.makedirs(os.path.dirname(self.disk_path) or ".", exist_ok=True)
+            self._disk = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS reports (key TEXT PRIMARY KEY, report TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._disk.commit()
+
+        # Stats
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, context_type: str, metrics: SpineMetrics) -> str:
+        def q(value: Optional[float], step: float):
+            if value is None:
+                return None
+            if not math.isfinite(value):
+                return str(value)  # 'nan' / 'inf' / '-inf': round() would raise
+            return round(round(value / step) * step, 3) if step else round(value, 3)
+
+        return (
+            f"{context_type}"
+            f"|cobb={q(metrics.cobb_angle_thoracic, self.cobb_bin)}"
+            f"|flex={q(metrics.lumbar_flexion, self.flexion_bin)}"
+            f"|score={q(metrics.health_score, self.score_bin)}"
+        )
+
+    def get(self, context_type: str, metrics: SpineMetrics) -> Optional[str]:
+        key = self.key(context_type, metrics)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and not self._expired(entry[1], now):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            if self._disk is not None:
+                row = self._disk.execute("SELECT report, created FROM reports WHERE key = ?", (key,)).fetchone()
+                if row and not self._expired(row[1], now):
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, context_type: str, metrics: SpineMetrics, report: str):
+        key = self.key(context_type, metrics)
+        created = time.time()
+        with self._lock:
+            self._remember(key, report, created)
+            if self._disk is not None:
+                with self._disk:
+                    self._disk.execute(
+                        "INSERT OR REPLACE INTO reports (key, report, created) VALUES (?, ?, ?)",
+                        (key, report, created)
+                    )
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+            "entries": len(self._memory),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                with self._disk:
+                    self._disk.execute("DELETE FROM reports")
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_s is not None and now - created > self.ttl_s
+
+    def _remember(self, key: str, report: str, created: float):
+        self._memory[key] = (report, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
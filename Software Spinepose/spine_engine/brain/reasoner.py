@@ -1,17 +1,49 @@
-from google import genai
+import asyncio
 import os
-from typing import Optional, Dict
+from dataclasses import dataclass
+from typing import Any, Optional, Dict
 from ..core.types import SpineMetrics
+from .cache import ReportCache
+from .templates import template_report
+
+MODEL_NAME = "gemini-3-flash-preview"
+
+@dataclass
+class Report:
+    """A reasoner report and where it came from."""
+    text: str
+    source: str                              # "remote" | "cache" | "template"
+    pending: Optional[asyncio.Task] = None   # Remote report still in flight after a template fallback
+
+def _log_late_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"AI Error (late): {task.exception()}")
 
 class GeminiReasoner:
     """
     Interface to Google Gemini 3 (Flash Preview)
     for high-level reasoning about biomechanics.
+
+    analyze_context() is the blocking call. analyze() is the async variant: it
+    runs at most `max_concurrent` remote calls at once and falls back to a local
+    template report when the deadline passes or no key is configured.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[ReportCache] = None,
+                 client: Any = None, max_concurrent: int = 4, deadline_s: float = 8.0):
         self.api_key = api_key or os.getenv('GEMINI_API_KEY')
-        if self.api_key:
+        # Near-identical metrics reuse the previous report instead of a remote call
+        self.cache = cache if cache is not None else ReportCache()
+        self.max_concurrent = max_concurrent
+        self.deadline_s = deadline_s
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        if client is not None:
+            # Injected client (e.g. a local stub); anything with models.generate_content()
+            self.client = client
+            self.available = True
+        elif self.api_key:
+            from google import genai
             # The new Client automatically looks for GEMINI_API_KEY or can take it directly
             self.client = genai.Client(api_key=self.api_key)
             self.available = True
@@ -26,7 +58,50 @@ class GeminiReasoner:
         """
         if not self.available:
             return "AI Analysis Unavailable (Key Missing)"
-            
+
+        cached = self.cache.get(context_type, metrics)
+        if cached is not None:
+            return cached
+
+        try:
+            return self._generate(metrics, context_type)
+        except Exception as e:
+            return f"AI Error: {str(e)}"
+
+    async def analyze(self, metrics: SpineMetrics, context_type: str = "medical",
+                      deadline_s: Optional[float] = None) -> Report:
+        """
+        Non-blocking report. Waits at most `deadline_s` (default self.deadline_s)
+        for the remote model, including time queued behind other requests. On
+        timeout the template report is returned and the remote call keeps running
+        in `Report.pending`; its result also lands in the cache.
+        """
+        cached = self.cache.get(context_type, metrics)
+        if cached is not None:
+            return Report(cached, "cache")
+        if not self.available:
+            return Report(template_report(metrics, context_type), "template")
+
+        task = asyncio.ensure_future(self._generate_async(metrics, context_type))
+        try:
+            text = await asyncio.wait_for(asyncio.shield(task), deadline_s or self.deadline_s)
+            return Report(text, "remote")
+        except asyncio.TimeoutError:
+            task.add_done_callback(_log_late_failure)
+            return Report(template_report(metrics, context_type), "template", pending=task)
+        except Exception as e:
+            print(f"AI Error: {e}")
+            return Report(template_report(metrics, context_type), "template")
+
+    async def _generate_async(self, metrics: SpineMetrics, context_type: str) -> str:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        async with self._slots:
+            # The client is blocking; keep it off the event loop
+            return await asyncio.to_thread(self._generate, metrics, context_type)
+
+    def _generate(self, metrics: SpineMetrics, context_type: str) -> str:
+        """Remote call. Raises on failure; successful reports are cached."""
         prompt = ""
         if context_type == "medical":
             prompt = f"""
@@ -57,11 +132,11 @@ class GeminiReasoner:
             Keep it punchy and actionable (e.g., "Cue: Brace core...").
             """
             
-        try:
-            response = self.client.models.generate_content(
-                model="gemini-3-flash-preview",
-                contents=prompt,
-            )
-            return response.text.strip()
-        except Exception as e:
-            return f"AI Error: {str(e)}"
+        response = self.client.models.generate_content(
+            model=MODEL_NAME,
+            contents=prompt,
+        )
+        report = response.text.strip()
+        # Only successful reports are cached; errors retry next time
+        self.cache.put(context_type, metrics, report)
+        return report
@@ -0,0 +1,61 @@
+from typing import List
+
+from ..core.types import SpineMetrics
+
+# Rule-based reports used when the remote reasoner is unavailable or too slow.
+# Output is deterministic for a given SpineMetrics.
+
+def _cobb_finding(cobb: float) -> str:
+    # The metric is an unsigned shoulder/pelvis tilt difference: no curve direction
+    magnitude = abs(cobb)
+    if magnitude < 10:
+        return f"Estimated thoracic Cobb angle {magnitude:.1f}°, within normal limits; no scoliotic curvature suggested."
+    if magnitude < 25:
+        grade = "Mild"
+    elif magnitude < 40:
+        grade = "Moderate"
+    else:
+        grade = "Severe"
+    return f"{grade} thoracic curvature suggestive of scoliosis (estimated Cobb angle {magnitude:.1f}°)."
+
+def _trunk_flexion_finding(flexion: float) -> str:
+    # lumbar_flexion is the trunk's inclination from vertical, not lordosis
+    if flexion < 20:
+        return f"Trunk flexion {flexion:.1f}° from vertical, upright."
+    if flexion < 45:
+        return f"Trunk flexion {flexion:.1f}° from vertical, moderate forward lean."
+    return f"Trunk flexion {flexion:.1f}° from vertical, marked forward flexion."
+
+def medical_report(metrics: SpineMetrics) -> str:
+    findings: List[str] = []
+    if metrics.cobb_angle_thoracic is not None:
+        findings.append(_cobb_finding(metrics.cobb_angle_thoracic))
+    if metrics.lumbar_flexion is not None:
+        findings.append(_trunk_flexion_finding(metrics.lumbar_flexion))
+    if metrics.posture_type and metrics.posture_type != "Neutral":
+        findings.append(f"{metrics.posture_type} posture noted.")
+    if metrics.symmetry_index < 95:
+        findings.append(f"Trunk asymmetry (symmetry index {metrics.symmetry_index:.0f}/100).")
+    findings.append(f"Postural Health Index {metrics.health_score:.0f}/100.")
+    return "IMPRESSION (automated, rule-based): " + " ".join(findings)
+
+def sports_report(metrics: SpineMetrics) -> str:
+    flexion = metrics.lumbar_flexion
+    if flexion is None:
+        cue = "Cue: Hold a neutral spine; re-screen with the full torso in frame."
+    elif flexion > 45:
+        cue = "Cue: Brace core and hinge from the hips. Trunk flexion is high, which loads the lower back."
+    elif flexion < 10:
+        cue = "Cue: Good neutral spine. Keep the brace through the full range."
+    else:
+        cue = "Cue: Moderate forward lean. Ribs down, brace, and push the hips back."
+    return f"{cue} (Stability Index {metrics.health_score:.0f}/100)"
+
+def template_report(metrics: SpineMetrics, context_type: str = "medical") -> str:
+    """
+    Local report for `metrics` in the style of the remote reasoner.
+    context_type: 'medical' | 'sports'
+    """
+    if context_type == "medical":
+        return medical_report(metrics)
+    return sports_report(metrics)
@@ -0,0 +1,129 @@
+import threading
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+@dataclass(frozen=True)
+class OperatingPoint:
+    """One rung of the quality ladder."""
+    level: int
+    stride: int          # Process every Nth camera frame
+    imgsz: int           # YOLO input size (multiple of 32)
+    complexity: int      # MediaPipe model_complexity (0=Lite, 1=Full, 2=Heavy)
+    jpeg_quality: int    # Upper bound on the subscribed JPEG quality
+    max_views: int       # Upper bound on encoded views per message (main is always kept)
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+# Best quality first. Each step down trims the cheapest-to-lose quality first.
+DEFAULT_LADDER = [
+    (1, 640, 2, 90, 4),
+    (1, 640, 1, 85, 4),   # Previous fixed settings
+    (1, 480, 1, 80, 4),
+    (1, 416, 1, 75, 3),
+    (1, 320, 0, 70, 2),
+    (2, 320, 0, 65, 2),
+    (3, 256, 0, 60, 1),
+]
+
+class AdaptiveController:
+    """
+    Feedback controller that holds a live stream within a latency/FPS budget.
+
+    Stage timings are fed in with record(); their moving averages give the
+    frame latency (sum of stages) and sustainable FPS (slowest stage, since the
+    stages run in parallel). Over budget steps one rung down the ladder, well
+    under budget steps one rung up; a cooldown after each change lets the
+    averages settle, so the controller does not oscillate.
+
+    Config keys (all optional):
+    - enabled: False pins the start level
+    - target_fps: Minimum source frames per second to keep up with (None = ignore);
+      at stride N only every Nth frame is analyzed, so each has N / target_fps seconds
+    - target_latency_ms: Maximum per-frame processing latency (None = ignore)
+    - start_level: Initial ladder index
+    - headroom: Step up only when load is below this fraction of the budget
+    - cooldown_frames: Frames to wait after a change before the next decision
+    - smoothing: EWMA weight of each new sample
+    - ladder: [(stride, imgsz, complexity, jpeg_quality, max_views), ...] best first
+    """
+
+    def __init__(self, config: Optional[dict] = None):
+        self.config = config or {}
+        self.enabled = self.config.get('enabled', True)
+        self.target_fps = self.config.get('target_fps', 15.0)
+        self.target_latency_ms = self.config.get('target_latency_ms', 120.0)
+        self.headroom = self.config.get('headroom', 0.7)
+        self.cooldown_frames = self.config.get('cooldown_frames', 30)
+        self.smoothing = self.config.get('smoothing', 0.1)
+
+        ladder = self.config.get('ladder', DEFAULT_LADDER)
+        self.ladder: List[OperatingPoint] = [OperatingPoint(i, *rung) for i, rung in enumerate(ladder)]
+        start = self.config.get('start_level', 1)
+        self._current = self.ladder[max(0, min(start, len(self.ladder) - 1))]
+
+        self._lock = threading.Lock()
+        self._stage_ms: Dict[str, float] = {}
+        self._frames_since_change = 0
+
+    @property
+    def current(self) -> OperatingPoint:
+        return self._current
+
+    @property
+    def latency_ms(self) -> float:
+        """Smoothed processing latency per frame (sum of stages)."""
+        return sum(self._stage_ms.values())
+
+    @property
+    def fps_estimate(self) -> float:
+        """Sustainable frame rate, bounded by the slowest stage."""
+        slowest = max(self._stage_ms.values(), default=0.0)
+        return 1000.0 / slowest if slowest > 0 else 0.0
+
+    def record(self, stage: str, seconds: float):
+        """Adds one timing sample for `stage` (e.g. 'inference', 'render')."""
+        ms = seconds * 1000.0
+        with self._lock:
+            prev = self._stage_ms.get(stage)
+            self._stage_ms[stage] = ms if prev is None else prev + self.smoothing * (ms - prev)
+
+    def end_frame(self) -> OperatingPoint:
+        """Called once per delivered frame; may move to another operating point."""
+        with self._lock:
+            self._frames_since_change += 1
+            if not self.enabled or self._frames_since_change < self.cooldown_frames:
+                return self._current
+
+            load = self._load()
+            level = self._current.level
+            if load > 1.0 and level < len(self.ladder) - 1:
+                level += 1
+            elif load < self.headroom and level > 0:
+                level -= 1
+
+            if level != self._current.level:
+                self._current = self.ladder[level]
+                self._frames_since_change = 0
+                # Old timings describe the previous settings
+                self._stage_ms.clear()
+            return self._current
+
+    def _load(self) -> float:
+        """Worst ratio of measured cost to budget (>1 means over budget)."""
+        ratios = [0.0]
+        if self.target_latency_ms:
+            ratios.append(self.latency_ms / self.target_latency_ms)
+        if self.target_fps:
+            # Frames actually analyzed per second: stride rungs lower the load
+            analyzed_fps = self.target_fps / self._current.stride
+            ratios.append(max(self._stage_ms.values(), default=0.0) * analyzed_fps / 1000.0)
+        return max(ratios)
+
+    def status(self) -> Dict:
+        """Operating point plus the measurements behind it, for the stream header."""
+        return {
+            **self._current.as_dict(),
+            "latency_ms": round(self.latency_ms, 1),
+            "fps_estimate": round(self.fps_estimate, 1),
+        }
@@ -0,0 +1,465 @@
+import base64
+import math
+import multiprocessing as mp
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .types import FrameAnalysis
+from ..utils.media import is_video, list_images, iter_video_frames, analysis_rows
+
+@dataclass
+class WorkItem:
+    """One shard of offline work: an image file, or a frame range of a video."""
+    index: int                    # Position in the input order
+    path: str
+    start_frame: int = 0
+    end_frame: Optional[int] = None
+    frame_index: int = 0          # Images: position in the directory listing (as in the serial reader)
+
+    @property
+    def is_video(self) -> bool:
+        return is_video(self.path)
+
+@dataclass
+class ItemResult:
+    """Outcome of one WorkItem; failures are isolated per item."""
+    index: int
+    path: str
+    ok: bool
+    rows: List[dict] = field(default_factory=list)  # analysis_rows() per frame
+    frames: int = 0
+    error: Optional[str] = None
+    elapsed_s: float = 0.0
+    worker_pid: int = 0
+
+@dataclass
+class BatchSummary:
+    items: int = 0
+    failed: int = 0
+    frames: int = 0
+    elapsed_s: float = 0.0
+    frames_by_worker: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def fps(self) -> float:
+        return self.frames / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.items} items ({self.failed} failed), {self.frames} frames in "
+            f"{self.elapsed_s:.1f}s = {self.fps:.1f} FPS across {len(self.frames_by_worker)} workers"
+        )
+
+# --- Worker Process State ---
+# Each worker loads its own HybridEngine exactly once, in the pool initializer.
+
+_engine = None
+_stride = 1
+
+def _init_worker(engine_config: Optional[dict], threads_per_worker: int, stride: int):
+    global _engine, _stride
+    # Keep N workers x M library threads from oversubscribing the cores
+    cv2.setNumThreads(threads_per_worker)
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+
+    from .session import HybridEngine
+    _engine = HybridEngine(engine_config)
+    _engine.load_models()
+    _engine.warmup()
+    _stride = stride
+
+def _run_item(item: WorkItem) -> ItemResult:
+    start = time.perf_counter()
+    result = ItemResult(index=item.index, path=item.path, ok=True, worker_pid=os.getpid())
+    try:
+        if item.is_video:
+            # Tracking restarts at each segment boundary
+            stream = _engine.create_stream()
+            try:
+                for frame in iter_video_frames(item.path, item.start_frame, item.end_frame, stride=_stride):
+                    analysis = _engine.process_frame(frame.image, frame_id=frame.index, stream=stream,
+                                                     timestamp_ms=frame.timestamp_ms)
+                    result.rows.extend(analysis_rows(frame.index, frame.source, frame.timestamp_ms, analysis))
+                    result.frames += 1
+            finally:
+                stream.close()
+        else:
+            image = cv2.imread(item.path)
+            if image is None:
+                raise IOError(f"Could not read image {item.path}")
+            analysis = _engine.process_frame(image, frame_id=item.frame_index, timestamp_ms=0.0)
+            result.rows = analysis_rows(item.frame_index, item.path, 0.0, analysis)
+            result.frames = 1
+    except Exception as e:
+        result.ok = False
+        result.error = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+    result.elapsed_s = time.perf_counter() - start
+    return result
+
+class BatchExecutor:
+    """
+    Multiprocess offline analysis.
+    Starts N worker processes, each loading its own HybridEngine once. Work is
+    sharded by image file or video segment; results come back in input order,
+    and one failing item never takes down the batch.
+
+    A worker that dies (segfault, OOM kill) or hangs past `item_timeout_s`
+    breaks the process pool: the pool is torn down and restarted, and the items
+    that were in flight are retried one at a time; one that fails again is
+    reported as failed.
+    Workers that cannot start (e.g. a missing model) raise RuntimeError.
+    """
+
+    def __init__(self, workers: Optional[int] = None, engine_config: Optional[dict] = None,
+                 stride: int = 1, segment_frames: int = 300, threads_per_worker: int = 1,
+                 item_timeout_s: Optional[float] = 600.0, start_timeout_s: Optional[float] = 300.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.engine_config = engine_config
+        self.stride = max(1, stride)
+        self.segment_frames = segment_frames   # Video shard size
+        self.threads_per_worker = threads_per_worker
+        self.item_timeout_s = item_timeout_s   # Per item, from when its result is awaited
+        self.start_timeout_s = start_timeout_s # Worker startup (engine load + warmup)
+        self.summary = BatchSummary()
+
+    def plan(self, inputs: List[str]) -> List[WorkItem]:
+        """Expands files/directories/videos into ordered work items."""
+        items: List[WorkItem] = []
+        for path in inputs:
+            if os.path.isdir(path):
+                # Same frames and numbering as ThreadedFrameReader: every stride-th image, by position
+                files = list_images(path)
+                for position in range(0, len(files), self.stride):
+                    items.append(WorkItem(len(items), files[position], frame_index=position))
+            elif is_video(path):
+                for start, end in self._segments(path):
+                    items.append(WorkItem(len(items), path, start, end))
+            else:
+                items.append(WorkItem(len(items), path))
+        return items
+
+    def _segments(self, path: str):
+        cap = cv2.VideoCapture(path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if total <= 0:
+            # Unknown length: one shard for the whole video
+            yield 0, None
+            return
+        # Keep segment starts on the stride grid so output matches a single pass
+        size = max(self.stride, self.segment_frames - self.segment_frames % self.stride)
+        for start in range(0, total, size):
+            yield start, min(total, start + size)
+
+    def run(self, inputs: List[str]) -> Iterator[ItemResult]:
+        """
+        Processes `inputs` (files and/or directories) and yields ItemResults
+        in input order. `self.summary` holds throughput stats once exhausted.
+        """
+        items = self.plan(inputs)
+        self.summary = BatchSummary()
+        start = time.perf_counter()
+        workers = min(self.workers, max(1, len(items)))
+
+        queued = deque(items)
+        # [item, future] in input order; future is None while waiting for (re)submission
+        in_flight: "deque[list]" = deque()
+        attempts: Dict[int, int] = {}
+        executor: Optional[ProcessPoolExecutor] = None
+        try:
+            while queued or in_flight:
+                if executor is None:
+                    executor = self._start_pool(workers)
+                # Items in flight during a pool failure are retried one at a time,
+                # so a second crash pins the item that caused it
+                retrying = any(entry[1] is None and attempts.get(entry[0].index) for entry in in_flight)
+                # Otherwise a small window keeps every worker busy without queueing the whole batch
+                while not retrying and queued and len(in_flight) < 2 * workers:
+                    in_flight.append([queued.popleft(), None])
+
+                item = in_flight[0][0]
+                try:
+                    # submit() itself raises once a worker has died
+                    for entry in in_flight:
+                        if entry[1] is None:
+                            if retrying and any(f is not None and not f.done() for _, f in in_flight):
+                                break  # One suspect at a time
+                            entry[1] = executor.submit(_run_item, entry[0])
+                            if retrying:
+                                break
+                    result = in_flight[0][1].result(timeout=self.item_timeout_s)
+                except (BrokenProcessPool, FutureTimeout) as e:
+                    timed_out = isinstance(e, FutureTimeout)
+                    print(f"Warning: Batch worker {'timed out' if timed_out else 'died'} on {item.path}; restarting workers.")
+                    self._kill_pool(executor)
+                    executor = None
+                    self._recover(in_flight, attempts, timed_out)
+                    continue
+
+                in_flight.popleft()
+                self.summary.items += 1
+                self.summary.frames += result.frames
+                if not result.ok:
+                    self.summary.failed += 1
+                by_worker = self.summary.frames_by_worker
+                by_worker[result.worker_pid] = by_worker.get(result.worker_pid, 0) + result.frames
+                self.summary.elapsed_s = time.perf_counter() - start
+                yield result
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def _start_pool(self, workers: int) -> ProcessPoolExecutor:
+        # spawn: a clean interpreter per worker (fork is unsafe with torch/mediapipe threads)
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.engine_config, self.threads_per_worker, self.stride),
+        )
+        try:
+            # A failing initializer breaks the pool here instead of respawning forever
+            pings = [executor.submit(_ping) for _ in range(workers)]
+            for ping in pings:
+                ping.result(timeout=self.start_timeout_s)
+        except Exception as e:
+            self._kill_pool(executor)
+            raise RuntimeError(f"Batch workers failed to start: {type(e).__name__}: {e}") from e
+        return executor
+
+    def _kill_pool(self, executor: ProcessPoolExecutor):
+        # shutdown() alone would wait on a hung worker; terminate them (CPython keeps them in _processes)
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def _recover(self, in_flight: "deque[list]", attempts: Dict[int, int], timed_out: bool):
+        """After a pool failure: keep finished results, retry the rest once, fail repeat offenders."""
+        for position, entry in enumerate(in_flight):
+            item, future = entry
+            if future is None:
+                continue  # Not submitted to the failed pool
+            if future.done() and not future.cancelled() and future.exception() is None:
+                continue
+            attempts[item.index] = attempts.get(item.index, 0) + 1
+            if (timed_out and position == 0) or attempts[item.index] > 1:
+                reason = "timed out" if timed_out and position == 0 else "worker process died"
+                failed: Future = Future()
+                failed.set_result(ItemResult(index=item.index, path=item.path, ok=False,
+                                             error=f"WorkerError: {reason}"))
+                entry[1] = failed
+            else:
+                entry[1] = None
+
+# --- Upload Worker Pool ---
+
+UPLOAD_VIEWS = ("main", "sagittal", "coronal", "heatmap")
+
+@dataclass
+class UploadResult:
+    """Analysis of one uploaded image, with every view JPEG-encoded (base64)."""
+    analysis: FrameAnalysis
+    views: Dict[str, str]
+    elapsed_s: float = 0.0
+    worker_pid: int = 0
+    timings_ms: Dict[str, float] = field(default_factory=dict)  # render, encode (engine stages are on analysis)
+
+class PoolBusy(Exception):
+    """Raised when the pool's admission queue is full."""
+
+    def __init__(self, retry_after_s: int):
+        super().__init__(f"Engine pool busy, retry in {retry_after_s}s")
+        self.retry_after_s = retry_after_s
+
+def analyze_upload(engine, viz, frame: np.ndarray) -> UploadResult:
+    """Engine pass, multiview render and JPEG encode for one uploaded frame."""
+    start = time.perf_counter()
+    analysis = engine.process_frame(frame)
+    render_start = time.perf_counter()
+    rendered = viz.render_multiview(frame, analysis, views=UPLOAD_VIEWS)
+    encode_start = time.perf_counter()
+    views = {}
+    for name in UPLOAD_VIEWS:
+        _, buffer = cv2.imencode('.jpg', rendered[name])
+        views[name] = base64.b64encode(buffer).decode('utf-8')
+    end = time.perf_counter()
+    timings = {"render": (encode_start - render_start) * 1000.0, "encode": (end - encode_start) * 1000.0}
+    return UploadResult(analysis, views, end - start, os.getpid(), timings)
+
+_viz = None
+
+def _init_upload_worker(engine_config: Optional[dict], threads_per_worker: int):
+    global _viz
+    _init_worker(engine_config, threads_per_worker, stride=1)
+    from ..utils.visualization import Visualizer
+    _viz = Visualizer()
+
+def _ping() -> int:
+    return os.getpid()
+
+def _run_upload(shm_name: str, shape: Tuple[int, ...], dtype: str) -> UploadResult:
+    # The frame is read in place from the parent's shared memory; only the
+    # (small) analysis and encoded views are pickled back.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        frame = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        try:
+            return analyze_upload(_engine, _viz, frame)
+        finally:
+            del frame  # The buffer cannot be closed while an array still exports it
+    finally:
+        shm.close()
+
+class EnginePool:
+    """
+    Worker processes for request/response analysis (/analyze_file), each with
+    its own HybridEngine loaded once in the pool initializer.
+
+    Decoded frames are handed over through multiprocessing.shared_memory rather
+    than pickled. Admission is bounded: when `max_pending` jobs are queued or
+    running, submit() raises PoolBusy with a Retry-After estimate instead of
+    queueing without limit.
+
+    A worker that dies (crash, OOM kill) breaks the whole executor; the pool
+    then reports `broken`, submit() raises BrokenProcessPool and the owner
+    calls restart() to spawn fresh workers.
+    """
+
+    def __init__(self, workers: Optional[int] = None, engine_config: Optional[dict] = None,
+                 threads_per_worker: int = 1, max_pending: Optional[int] = None):
+        self.workers = workers or max(1, (os.cpu_count() or 2) // threads_per_worker)
+        self.engine_config = engine_config
+        self.threads_per_worker = threads_per_worker
+        self.max_pending = max_pending or 2 * self.workers
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._restart_lock = threading.Lock()
+        self.broken = False
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.restarts = 0
+        self.mean_service_s = 1.0  # Smoothed per-job time, for Retry-After
+
+    def start(self, timeout: Optional[float] = None) -> "EnginePool":
+        """Spawns the workers and blocks until they have loaded their engines."""
+        # spawn: a clean interpreter per worker (fork is unsafe with torch/mediapipe threads)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_upload_worker,
+            initargs=(self.engine_config, self.threads_per_worker),
+        )
+        try:
+            # One no-op per worker forces every process up (and through the initializer) now
+            pings = [self._executor.submit(_ping) for _ in range(self.workers)]
+            for ping in pings:
+                ping.result(timeout=timeout)
+        except Exception:
+            # Don't leave half-started workers behind
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            raise
+        self.broken = False
+        return self
+
+    def restart(self, timeout: Optional[float] = None) -> bool:
+        """Replaces a broken executor with fresh workers. Returns True if a restart happened."""
+        with self._restart_lock:
+            if not self.broken:
+                return False  # Already restarted by another caller
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            self.start(timeout)
+            self.restarts += 1
+            return True
+
+    def retry_after_s(self) -> int:
+        """Rough time until a slot frees up: queued work spread over the workers."""
+        return max(1, math.ceil(self.pending / self.workers * self.mean_service_s))
+
+    def submit(self, frame: np.ndarray) -> "Future[UploadResult]":
+        """
+        Queues one BGR frame. Raises PoolBusy when the admission queue is full
+        and BrokenProcessPool while the workers need a restart().
+        """
+        executor = self._executor
+        if self.broken or executor is None:
+            raise BrokenProcessPool("Upload pool is not running")
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PoolBusy(self.retry_after_s())
+
+        frame = np.ascontiguousarray(frame)
+        try:
+            shm = shared_memory.SharedMemory(create=True, size=max(1, frame.nbytes))
+        except Exception:
+            self._slots.release()
+            raise
+        try:
+            np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)[...] = frame
+            future = executor.submit(_run_upload, shm.name, frame.shape, frame.dtype.str)
+        except Exception as e:
+            self._release(shm)
+            if isinstance(e, BrokenProcessPool):
+                self.broken = True
+            raise
+
+        with self._lock:
+            self.pending += 1
+        future.add_done_callback(lambda f: self._finish(f, shm))
+        return future
+
+    def _finish(self, future: Future, shm: shared_memory.SharedMemory):
+        with self._lock:
+            self.pending -= 1
+            error = None if future.cancelled() else future.exception()
+            if isinstance(error, BrokenProcessPool):
+                self.broken = True
+            elif not future.cancelled() and error is None:
+                self.completed += 1
+                self.mean_service_s += 0.2 * (future.result().elapsed_s - self.mean_service_s)
+        self._release(shm)
+
+    def _release(self, shm: shared_memory.SharedMemory):
+        shm.close()
+        shm.unlink()
+        self._slots.release()
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "broken": self.broken,
+            "restarts": self.restarts,
+            "mean_service_ms": round(self.mean_service_s * 1000.0, 1),
+        }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,269 @@
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .adaptive import AdaptiveController
+from .pipeline import LatestQueue
+from .sources import DEFAULT_SOURCE, FrameSource, create_source, source_key
+from .types import FrameAnalysis
+
+# (frame_id, frame, analysis) as delivered to each subscriber
+Packet = Tuple[int, np.ndarray, FrameAnalysis]
+
+class Subscription:
+    """
+    One viewer of a SharedSource. Receives the latest analyzed packet
+    (older ones are dropped if the viewer falls behind).
+    The source only runs while at least one subscription is active.
+    """
+
+    def __init__(self, source: "SharedSource"):
+        self.source = source
+        self._queue = LatestQueue(1)
+        self._active = False
+        self._closed = False
+
+    @property
+    def active(self) -> bool:
+        return self._active and not self._closed
+
+    def resume(self):
+        self._active = True
+        self.source._update_active()
+
+    def pause(self):
+        self._active = False
+        self.source._update_active()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Packet]:
+        """Next packet; None once the subscription or its source is closed."""
+        return self._queue.get(timeout)
+
+    def close(self):
+        """Leaves the source; the last subscriber to leave releases it. Idempotent."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.close()
+        self.source.hub._unsubscribe(self)
+
+    def _deliver(self, packet: Packet):
+        self._queue.put(packet)
+
+class SharedSource:
+    """
+    One FrameSource, one tracking state and one engine pass per frame,
+    fanned out to every subscriber. Frame IDs and timestamps come from the
+    source and are carried into each FrameAnalysis.
+    capture thread -> inference thread -> subscriber queues
+
+    The quality ladder (stride, imgsz, pose complexity) is per source, since
+    all viewers share the same inference work.
+    """
+
+    def __init__(self, hub: "CameraHub", spec: Dict, previous: Optional["SharedSource"] = None):
+        self.hub = hub
+        self.spec = spec
+        self.key = source_key(spec)
+        self.engine = hub.engine
+        self.adaptive = AdaptiveController(hub.adaptive_config)
+        self._previous = previous  # A stopping source on the same device, released first
+
+        self._subscribers: List[Subscription] = []
+        self._frames = LatestQueue(1)
+        self._has_active = threading.Event()
+        self._stopped = threading.Event()
+        self._released = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.frames_analyzed = 0
+        self.error: Optional[str] = None  # Why capture failed (open or read), for the viewers
+
+    @property
+    def viewers(self) -> int:
+        return len(self._subscribers)
+
+    def start(self) -> "SharedSource":
+        for name, target in (("capture", self._capture_loop), ("inference", self._inference_loop)):
+            t = threading.Thread(target=target, name=f"spine-hub-{name}-{self.spec['type']}", daemon=True)
+            self._threads.append(t)
+            t.start()
+        return self
+
+    def stop(self):
+        """Non-blocking; the capture thread releases the source on exit."""
+        self._stopped.set()
+        self._has_active.set()  # Wake a paused capture thread
+        self._frames.close()
+
+    def wait_released(self, timeout: Optional[float] = None) -> bool:
+        return self._released.wait(timeout)
+
+    def _update_active(self):
+        if any(s.active for s in list(self._subscribers)):
+            self._has_active.set()
+        else:
+            self._has_active.clear()
+
+    # --- Stages ---
+
+    def _capture_loop(self):
+        source: Optional[FrameSource] = None
+        try:
+            if self._previous is not None:
+                self._previous.wait_released(timeout=5)
+                self._previous = None
+            while not self._stopped.is_set():
+                if not self._has_active.wait(timeout=0.1):
+                    continue
+                if self._stopped.is_set():
+                    break
+                if source is None:
+                    # Opened on the first active viewer, off the event loop
+                    source = self.hub.open_source(self.spec)
+                # Frame stride: skipped frames are never decoded where the source allows
+                stride = self.adaptive.current.stride
+                if stride > 1:
+                    source.skip(stride - 1)
+                frame = source.read()
+                if frame is None:
+                    print(f"Source ended ({self.key}).")
+                    break
+                # Live sources: latest wins. Replays (realtime=False): wait for inference, drop nothing
+                self._frames.put(frame, block=source.lossless)
+        except Exception as e:
+            self.error = str(e)
+            print(f"Capture Error ({self.key}): {e}")
+            traceback.print_exc()
+        finally:
+            self._frames.close()
+            if source is not None:
+                source.release()
+                print(f"Source released ({self.key}).")
+            self._released.set()
+            self.hub._source_released(self)
+
+    def _inference_loop(self):
+        # Tracking state: YOLO re-runs only periodically, ROIs follow the landmarks
+        tracking = self.engine.create_stream()
+        try:
+            while True:
+                item = self._frames.get()
+                if item is None:
+                    break
+                frame_id, frame = item.index, item.image
+                point = self.adaptive.current
+                tracking.configure(detector_imgsz=point.imgsz, pose_complexity=point.complexity)
+                start = time.perf_counter()
+                try:
+                    analysis = self.engine.process_frame(
+                        frame, frame_id=frame_id, stream=tracking, timestamp_ms=item.timestamp_ms
+                    )
+                except Exception as e:
+                    print(f"Inference Error ({self.key}): {e}")
+                    traceback.print_exc()
+                    continue
+                self.adaptive.record("inference", time.perf_counter() - start)
+                self.adaptive.end_frame()
+                self.frames_analyzed += 1
+                if self.hub.on_analysis:
+                    self.hub.on_analysis(analysis)
+
+                for subscriber in list(self._subscribers):
+                    if subscriber.active:
+                        subscriber._deliver((frame_id, frame, analysis))
+        finally:
+            tracking.close()  # Free per-person MediaPipe graphs
+            # Source ended (exhausted, camera lost or last viewer left): end every subscription
+            for subscriber in list(self._subscribers):
+                subscriber._queue.close()
+            self.hub._source_ended(self)
+
+class CameraHub:
+    """
+    Capture-and-analysis sources keyed by source_key() (see core/sources.py),
+    shared by all viewers. Each source is opened once and analyzed once per
+    frame no matter how many sockets watch it; sources are reference counted
+    and released when the last subscriber leaves.
+    """
+
+    def __init__(self, engine: Any,
+                 open_source: Callable[[Dict], FrameSource] = create_source,
+                 adaptive_config: Optional[dict] = None,
+                 on_analysis: Optional[Callable[[FrameAnalysis], None]] = None):
+        """
+        open_source: Validated spec -> opened FrameSource.
+        on_analysis: Called on the inference thread once per analyzed frame (e.g. telemetry).
+        """
+        self.engine = engine
+        self.open_source = open_source
+        self.adaptive_config = adaptive_config or {}
+        self.on_analysis = on_analysis
+        self._sources: Dict[str, SharedSource] = {}
+        self._stopping: Dict[str, SharedSource] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, spec: Optional[Dict] = None) -> Subscription:
+        """
+        Joins (or opens) the source for a validated spec. Starts paused; call resume().
+        A camera is shared per device: if it is already open, the viewer joins it
+        with the capture options (width/height) it was opened with.
+        """
+        spec = spec or DEFAULT_SOURCE
+        key = source_key(spec)
+        with self._lock:
+            source = self._sources.get(key)
+            if source is not None and source.spec != spec:
+                # Same device, other capture options: it is already open, join it as is
+                print(f"Source {key} already open with {source.spec}; joining it instead of {spec}.")
+            if source is None:
+                source = SharedSource(self, spec, previous=self._stopping.pop(key, None))
+                self._sources[key] = source
+                source.start()
+                print(f"Source opened ({key}).")
+            subscription = Subscription(source)
+            source._subscribers.append(subscription)
+            print(f"Viewer joined ({key}): {source.viewers} watching.")
+            return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        source = subscription.source
+        with self._lock:
+            if subscription in source._subscribers:
+                source._subscribers.remove(subscription)
+            remaining = source.viewers
+            if remaining == 0 and self._sources.get(source.key) is source:
+                # Last viewer left: release the source
+                del self._sources[source.key]
+                self._stopping[source.key] = source
+        source._update_active()
+        if remaining == 0:
+            source.stop()
+        print(f"Viewer left ({source.key}): {remaining} watching.")
+
+    def _source_ended(self, source: SharedSource):
+        with self._lock:
+            if self._sources.get(source.key) is source:
+                del self._sources[source.key]
+        source.stop()
+
+    def _source_released(self, source: SharedSource):
+        # Device is free: a new source on this key no longer has to wait for it
+        with self._lock:
+            if self._stopping.get(source.key) is source:
+                del self._stopping[source.key]
+
+    def status(self) -> Dict[str, Dict]:
+        with self._lock:
+            sources = list(self._sources.values())
+        return {
+            s.key: {
+                "viewers": s.viewers,
+                "active_viewers": sum(1 for sub in s._subscribers if sub.active),
+                "frames_analyzed": s.frames_analyzed,
+                "operating_point": s.adaptive.status()
+            }
+            for s in sources
+        }
@@ -0,0 +1,286 @@
+import asyncio
+import threading
+import traceback
+from collections import deque
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+
+
+class LatestQueue:
+    """
+    Bounded, thread-safe "latest frame wins" queue.
+    A put() on a full queue evicts the oldest item instead of blocking,
+    so a slow consumer never builds up a backlog of stale frames.
+    put(block=True) waits for room instead, for lossless hand-off.
+    """
+
+    def __init__(self, maxsize: int = 1):
+        self._items = deque(maxlen=max(1, maxsize))
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item: Any, block: bool = False) -> None:
+        with self._cond:
+            if block:
+                self._cond.wait_for(lambda: len(self._items) < self._items.maxlen or self._closed)
+            if self._closed:
+                return
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """
+        Returns the oldest queued item.
+        Returns None on timeout, or once the queue is closed and drained.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self._closed, timeout)
+            if self._items:
+                item = self._items.popleft()
+                self._cond.notify_all()  # Wake a blocked put()
+                return item
+            return None
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+class AsyncLatestSlot:
+    """
+    Single-slot hand-off from worker threads to an asyncio consumer.
+    Worker threads publish with put_threadsafe(); the event loop only awaits get().
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._item = None
+        self._has_item = False
+        self._closed = False
+        self._event = asyncio.Event()
+        self.dropped = 0
+
+    def put_threadsafe(self, item: Any) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._set, item)
+        except RuntimeError:
+            pass  # Loop already closed
+
+    def close_threadsafe(self) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._close)
+        except RuntimeError:
+            pass
+
+    def _set(self, item: Any) -> None:
+        if self._has_item:
+            self.dropped += 1
+        self._item = item
+        self._has_item = True
+        self._event.set()
+
+    def _close(self) -> None:
+        self._closed = True
+        self._event.set()
+
+    async def get(self) -> Any:
+        """Waits for the next item. Returns None once closed."""
+        while not self._has_item:
+            if self._closed:
+                return None
+            self._event.clear()
+            await self._event.wait()
+        item = self._item
+        self._item = None
+        self._has_item = False
+        return item
+
+
+class StreamPipeline:
+    """
+    Staged live-analysis pipeline.
+    capture thread -> inference worker(s) -> render/encode worker(s) -> async consumer
+
+    Stages are joined by bounded LatestQueues, so end-to-end latency stays at
+    roughly one frame: when a stage falls behind, older frames are dropped
+    rather than queued. The event loop never runs capture, inference or encoding;
+    it only awaits finished payloads from results().
+    """
+
+    def __init__(self,
+                 capture: Callable[[], Optional[np.ndarray]],
+                 infer: Callable[[np.ndarray, int], Any],
+                 render: Callable[[np.ndarray, Any], Any],
+                 inference_workers: int = 1,
+                 render_workers: int = 1,
+                 queue_size: int = 1,
+                 on_close: Optional[Callable[[], None]] = None,
+                 on_inference_done: Optional[Callable[[], None]] = None):
+        """
+        capture: Returns the next frame (or packet), or None when the source is exhausted.
+        infer: (frame, frame_id) -> analysis. Runs on the inference worker(s);
+               more than one worker requires an engine that tolerates concurrent calls.
+        render: (frame, analysis) -> payload. Runs on the render/encode worker(s).
+        on_close: Called from the capture thread once capture stops (e.g. release camera).
+        on_inference_done: Called from the last inference worker on exit (e.g. free model state).
+        """
+        self._capture = capture
+        self._infer = infer
+        self._render = render
+        self._on_close = on_close
+        self._on_inference_done = on_inference_done
+        self.inference_workers = max(1, inference_workers)
+        self.render_workers = max(1, render_workers)
+
+        self._frames = LatestQueue(queue_size)
+        self._analyses = LatestQueue(queue_size)
+        self._slot: Optional[AsyncLatestSlot] = None
+
+        self._active = threading.Event()
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._last_delivered = -1
+        self._live_workers = {"inference": 0, "render": 0}
+        self._stage_lock = threading.Lock()
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> "StreamPipeline":
+        loop = loop or asyncio.get_running_loop()
+        self._slot = AsyncLatestSlot(loop)
+
+        self._live_workers["inference"] = self.inference_workers
+        self._live_workers["render"] = self.render_workers
+
+        self._spawn("capture", self._capture_loop)
+        for i in range(self.inference_workers):
+            self._spawn(f"inference-{i}", self._inference_loop)
+        for i in range(self.render_workers):
+            self._spawn(f"render-{i}", self._render_loop)
+        return self
+
+    def _spawn(self, name: str, target: Callable[[], None]):
+        t = threading.Thread(target=target, name=f"spine-{name}", daemon=True)
+        self._threads.append(t)
+        t.start()
+
+    # --- Flow Control ---
+
+    def resume(self):
+        self._active.set()
+
+    def pause(self):
+        self._active.clear()
+
+    @property
+    def active(self) -> bool:
+        return self._active.is_set()
+
+    def stop(self):
+        """Signals all stages to exit. Non-blocking; safe to call from the event loop."""
+        self._stopped.set()
+        self._active.set()  # Wake a paused capture thread so it can exit
+        self._frames.close()
+        self._analyses.close()
+
+    @property
+    def dropped_frames(self) -> int:
+        dropped = self._frames.dropped + self._analyses.dropped
+        if self._slot:
+            dropped += self._slot.dropped
+        return dropped
+
+    # --- Stages ---
+
+    def _capture_loop(self):
+        frame_id = 0
+        try:
+            while not self._stopped.is_set():
+                if not self._active.wait(timeout=0.1):
+                    continue
+                if self._stopped.is_set():
+                    break
+
+                frame = self._capture()
+                if frame is None:
+                    print("Capture ended.")
+                    break
+
+                self._frames.put((frame_id, frame))
+                frame_id += 1
+        except Exception as e:
+            print(f"Capture Error: {e}")
+            traceback.print_exc()
+        finally:
+            self._frames.close()
+            if self._on_close:
+                self._on_close()
+
+    def _inference_loop(self):
+        try:
+            while True:
+                item = self._frames.get()
+                if item is None:
+                    break
+                frame_id, frame = item
+                try:
+                    analysis = self._infer(frame, frame_id)
+                except Exception as e:
+                    print(f"Inference Error: {e}")
+                    traceback.print_exc()
+                    continue
+                self._analyses.put((frame_id, frame, analysis))
+        finally:
+            if self._exit_stage("inference"):
+                self._analyses.close()
+                if self._on_inference_done:
+                    self._on_inference_done()
+
+    def _render_loop(self):
+        try:
+            while True:
+                item = self._analyses.get()
+                if item is None:
+                    break
+                frame_id, frame, analysis = item
+                try:
+                    payload = self._render(frame, analysis)
+                except Exception as e:
+                    print(f"Render Error: {e}")
+                    traceback.print_exc()
+                    continue
+                self._slot.put_threadsafe((frame_id, payload))
+        finally:
+            if self._exit_stage("render"):
+                self._slot.close_threadsafe()
+
+    def _exit_stage(self, stage: str) -> bool:
+        """Returns True when the last worker of `stage` exits."""
+        with self._stage_lock:
+            self._live_workers[stage] -= 1
+            return self._live_workers[stage] == 0
+
+    # --- Consumer ---
+
+    async def results(self):
+        """
+        Async iterator of rendered payloads, oldest-first.
+        With several workers, payloads finishing out of order are dropped
+        so the consumer never goes back in time.
+        """
+        while True:
+            item = await self._slot.get()
+            if item is None:
+                return
+            frame_id, payload = item
+            if frame_id <= self._last_delivered:
+                continue
+            self._last_delivered = frame_id
+            yield payload
@@ -0,0 +1,181 @@
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .types import BoundingBox
+
+@dataclass
+class _Request:
+    image: np.ndarray
+    imgsz: Optional[int]
+    future: Future
+    submitter: int                               # Calling thread, for the active-client count
+    enqueued: float = field(default_factory=time.perf_counter)
+
+class DetectionScheduler:
+    """
+    Central person-detection scheduler shared by all sessions and uploads.
+    Callers submit frames from their own threads; a single scheduler thread
+    gathers them into one batched detector call and resolves each caller's future.
+
+    A batch is flushed when it holds one frame from every recently active caller
+    (so a lone client never waits), when it reaches `max_batch`, or when the
+    oldest frame has waited `window_ms`, never longer than `max_latency_ms`.
+    Requests are served FIFO, so each caller's frames keep their order.
+    The detector runs on this thread, or under the same lock in a caller whose
+    result timed out.
+
+    Config keys (all optional):
+    - window_ms: Max time to hold a batch open for more callers
+    - max_batch: Max frames per detector call
+    - max_latency_ms: Hard cap on queueing delay before a batch is flushed
+    - active_window_s: A caller counts as active this long after its last frame
+    - result_timeout_s: detect() stops waiting after this long and runs the
+      detector directly (a stalled scheduler must not hang every stream)
+    """
+
+    def __init__(self, detector: Any, config: Optional[dict] = None):
+        self.detector = detector
+        self.config = config or {}
+        self.window_ms = self.config.get('window_ms', 5.0)
+        self.max_batch = self.config.get('max_batch', 8)
+        self.max_latency_ms = self.config.get('max_latency_ms', 20.0)
+        self.active_window_s = self.config.get('active_window_s', 1.0)
+        self.result_timeout_s = self.config.get('result_timeout_s', 2.0)
+
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._last_seen: Dict[int, float] = {}
+        self._seen_lock = threading.Lock()  # _last_seen is written by callers, pruned by the scheduler
+        self._detector_lock = threading.Lock()  # Batches and timeout fallbacks share one detector
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        # Stats
+        self.batches = 0
+        self.requests = 0
+        self.fallbacks = 0
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.requests / self.batches if self.batches else 0.0
+
+    def start(self) -> "DetectionScheduler":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="spine-detect-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, image: np.ndarray, imgsz: Optional[int] = None) -> Future:
+        future: Future = Future()
+        if self._closed:
+            future.set_exception(RuntimeError("Detection scheduler is closed"))
+            return future
+        submitter = threading.get_ident()
+        with self._seen_lock:
+            self._last_seen[submitter] = time.perf_counter()
+        self._queue.put(_Request(image, imgsz, future, submitter))
+        return future
+
+    def detect(self, image: np.ndarray, imgsz: Optional[int] = None) -> List[BoundingBox]:
+        """
+        Blocking submit(); drop-in for detector.detect().
+        Falls back to a direct detector call if the scheduler does not answer in time.
+        """
+        future = self.submit(image, imgsz)
+        try:
+            return future.result(timeout=self.result_timeout_s)
+        except FutureTimeout:
+            future.cancel()
+            self.fallbacks += 1
+            print(f"Warning: Detection scheduler timed out after {self.result_timeout_s}s, detecting directly.")
+            with self._detector_lock:
+                return self.detector.process_batch([image], imgsz=imgsz)[0]
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    # --- Scheduler Thread ---
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            try:
+                batch = self._collect(first)
+                self._execute(batch)
+            except Exception as e:
+                # Fail this batch, keep the scheduler alive for the next one
+                print(f"Detection Scheduler Error: {e}")
+                traceback.print_exc()
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+        # Fail anything submitted after close()
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                request.future.set_exception(RuntimeError("Detection scheduler is closed"))
+
+    def _collect(self, first: _Request) -> List[_Request]:
+        batch = [first]
+        hold_s = min(self.window_ms, self.max_latency_ms) / 1000.0
+        deadline = first.enqueued + hold_s
+        while len(batch) < self.max_batch:
+            if len(batch) >= self._active_callers():
+                break  # Everyone who is streaming is already in
+            remaining = deadline - time.perf_counter()
+            try:
+                # Past the deadline, still take whatever is already queued
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)  # Re-post the close marker for _run()
+                break
+            batch.append(request)
+        return batch
+
+    def _active_callers(self) -> int:
+        cutoff = time.perf_counter() - self.active_window_s
+        with self._seen_lock:
+            for submitter in [s for s, seen in self._last_seen.items() if seen < cutoff]:
+                del self._last_seen[submitter]
+            return max(1, len(self._last_seen))
+
+    def _execute(self, batch: List[_Request]):
+        # Frames for different input sizes cannot share a forward pass
+        groups: Dict[Optional[int], List[_Request]] = {}
+        for request in batch:
+            groups.setdefault(request.imgsz, []).append(request)
+
+        for imgsz, requests in groups.items():
+            # Callers that timed out (and detected directly) have cancelled their futures
+            requests = [r for r in requests if r.future.set_running_or_notify_cancel()]
+            if not requests:
+                continue
+            try:
+                with self._detector_lock:
+                    results = self.detector.process_batch([r.image for r in requests], imgsz=imgsz)
+            except Exception as e:
+                for r in requests:
+                    r.future.set_exception(e)
+                continue
+            for r, boxes in zip(requests, results):
+                r.future.set_result(boxes)
+
+        self.batches += 1
+        self.requests += len(batch)
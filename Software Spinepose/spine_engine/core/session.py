@@ -1,98 +1,313 @@
 import cv2
+import threading
+import time
 import numpy as np
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 
-from .types import FrameAnalysis, AnalysisResult, BoundingBox
-from ..detectors.yolo_model import YOLODetector
-from ..detectors.pose_model import PoseEstimator
-from ..analysis.geometry import analyze_biomechanics
+from .types import FrameAnalysis, AnalysisResult, BoundingBox, Landmarks, LANDMARK_INDEX
+from .tracker import PersonTracker
+from .scheduler import DetectionScheduler
+from ..detectors.base import create_detector
+from ..detectors.pose_model import PoseEstimator, PosePool
+from ..analysis.geometry import analyze_biomechanics_batch, batch_to_metrics
+
+# Landmarks used to judge whether a tracked ROI still holds the patient
+TORSO_LANDMARKS = ('LEFT_SHOULDER', 'RIGHT_SHOULDER', 'LEFT_HIP', 'RIGHT_HIP')
+TORSO_INDICES = [LANDMARK_INDEX[name] for name in TORSO_LANDMARKS]
+
+class StreamState:
+    """
+    Per-stream state for the detect-once, track-many ROI mode.
+    Create one per live source with HybridEngine.create_stream(); stateless
+    callers (single uploads) pass no stream and always run detection.
+    """
+
+    def __init__(self, tracker_config: Optional[dict] = None,
+                 pose_config: Optional[dict] = None, max_pose_instances: int = 4):
+        self.rois: List[Tuple[int, BoundingBox]] = [] # (person_id, next crop)
+        self.frames_since_detection = 0
+        self.force_detect = True
+        # Stable person IDs across frames
+        self.tracker = PersonTracker(tracker_config)
+        # One MediaPipe instance per person, so each keeps its landmark tracking
+        self.pose_pool = PosePool(pose_config, max_instances=max_pose_instances)
+        # Per-stream quality overrides (None = engine config)
+        self.detector_imgsz: Optional[int] = None
+
+    def configure(self, detector_imgsz: Optional[int] = None, pose_complexity: Optional[int] = None):
+        """Applies quality settings to this stream only. Call from the inference thread."""
+        self.detector_imgsz = detector_imgsz
+        if pose_complexity is not None and self.pose_pool.set_complexity(pose_complexity):
+            # Fresh graphs have no landmark history; re-acquire via detection
+            self.force_detect = True
+
+    def close(self):
+        self.pose_pool.close()
 
 class HybridEngine:
     """
     The Core Engine.
     Orchestrates YOLO (Detection) -> MediaPipe (Pose) -> Analysis (Geometry/Gemini).
+
+    Tracking mode (per stream): after a detection, the next frame's ROI is the
+    expanded bbox of the previous landmarks, and YOLO only re-runs every
+    `redetect_interval` frames or when landmark quality drops.
+
+    Batching (batching_config["enabled"]): person detection for every caller
+    goes through one DetectionScheduler, which merges frames from concurrent
+    streams and uploads into a single batched YOLO call.
+
+    process_frame() may be called from several threads (one per live source,
+    plus uploads). The shared YOLO and single-image Pose models are not
+    thread-safe, so calls into them are serialized; per-stream pose graphs
+    are only ever used by their own stream's thread.
     """
-    
+
     def __init__(self, config: Optional[dict] = None):
         self.config = config or {}
-        self.yolo = YOLODetector(self.config.get('yolo_config', {}))
-        self.pose = PoseEstimator(self.config.get('pose_config', {}))
-        
+        # Runtimes are pluggable: yolo_config["backend"] = "ultralytics" | "onnx"
+        self.yolo = create_detector("person", self.config.get('yolo_config', {}))
+        self.pose = create_detector("pose", self.config.get('pose_config', {}))
+
+        tracking = self.config.get('tracking_config', {})
+        self.tracking_enabled = tracking.get('enabled', True)
+        self.redetect_interval = tracking.get('redetect_interval', 15)   # Frames between forced YOLO runs
+        self.min_visibility = tracking.get('min_visibility', 0.5)        # Min torso landmark visibility
+        self.min_pose_confidence = tracking.get('min_pose_confidence', 0.5)  # Min mean landmark visibility
+        self.roi_expand = tracking.get('roi_expand', 0.25)               # ROI growth per side (fraction of bbox)
+        self.max_pose_instances = tracking.get('max_pose_instances', 4)  # Live MediaPipe graphs per stream
+
+        self.batching_config = self.config.get('batching_config', {})
+        self.scheduler: Optional[DetectionScheduler] = None
+        self._yolo_lock = threading.Lock()   # Direct YOLO calls (the scheduler serializes its own)
+        self._pose_lock = threading.Lock()   # self.pose, shared by every stateless caller
+
     def load_models(self):
         print("Loading YOLO...")
         self.yolo.load_model()
         print("Loading Pose Estimator...")
         self.pose.load_model()
+        if self.batching_config.get('enabled', False):
+            self.scheduler = DetectionScheduler(self.yolo, self.batching_config).start()
         print("Models Loaded.")
-        
-    def process_frame(self, frame: np.ndarray, frame_id: int = 0) -> FrameAnalysis:
+
+    def warmup(self, image_size: Tuple[int, int] = (480, 640)):
+        """
+        One dummy pass through every path a first frame can take, so it runs at
+        steady-state latency: YOLO, the single-image Pose model, a pooled
+        video-mode Pose graph (live streams) and the batching scheduler if enabled.
+        """
+        print("Warming up models...")
+        dummy = np.zeros((*image_size, 3), dtype=np.uint8)
+        self.yolo.warmup(image_size)
+        self.pose.warmup(image_size)
+        stream = self.create_stream()
+        try:
+            stream.pose_pool.get(0).process(dummy)
+        finally:
+            stream.close()
+        if self.scheduler is not None:
+            self.scheduler.detect(dummy)
+
+    def close(self):
+        """Stops the detection scheduler (if batching); pending callers get an error."""
+        if self.scheduler is not None:
+            self.scheduler.close()
+
+    def create_stream(self) -> StreamState:
+        """New tracking state for a live source (one per camera/video)."""
+        return StreamState(
+            self.config.get('tracker_config', {}),
+            pose_config=self.config.get('pose_config', {}),
+            max_pose_instances=self.max_pose_instances
+        )
+
+    def process_frame(self, frame: np.ndarray, frame_id: int = 0,
+                      stream: Optional[StreamState] = None,
+                      timestamp_ms: Optional[float] = None) -> FrameAnalysis:
         """
         Full pipeline for a single frame.
-        1. Detect Persons
+        1. Detect Persons (or reuse ROIs tracked from the previous frame)
         2. For each person, Crop & Estimate Pose
         3. Analyze Biomechanics
+
+        timestamp_ms defaults to the current wall-clock time. Stage timings
+        (detection, pose, geometry, total) are returned in `timings_ms`.
         """
-        # 1. Detection
-        # YOLO expects RGB usually, but OpenCV gives BGR.
-        # Ultralytics handles BGR/RGB automatically if passed as numpy.
-        # Let's keep it as is.
-        boxes: List[BoundingBox] = self.yolo.process(frame)
-        
+        start = time.perf_counter()
+        if timestamp_ms is None:
+            timestamp_ms = time.time() * 1000.0
+        timings = {"pose": 0.0, "geometry": 0.0}  # "detection" only when YOLO runs
         analysis_results = []
-        
-        for box in boxes:
-            # ROI Extraction with padding
-            h, w, _ = frame.shape
-            pad = 10
-            x1 = max(0, box.x1 - pad)
-            y1 = max(0, box.y1 - pad)
-            x2 = min(w, box.x2 + pad)
-            y2 = min(h, box.y2 + pad)
-            
-            crop = frame[y1:y2, x1:x2]
-            
-            if crop.size == 0:
-                continue
-            
-            # 2. Pose Estimation
-            # Convert crop to RGB for MediaPipe
-            crop_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
-            landmarks = self.pose.process(crop_rgb)
-            
-            if landmarks:
-                # 3. De-normalize coordinates
-                # Landmarks are normalized [0,1] relative to the CROP.
-                # Need to map back to FULL IMAGE.
-                
-                crop_h, crop_w, _ = crop.shape
-                
-                for name, kp in landmarks.items():
-                    # Denormalize to crop pixel space
-                    px = kp.x * crop_w
-                    py = kp.y * crop_h
-                    
-                    # Add offset
-                    full_x = px + x1
-                    full_y = py + y1
-                    
-                    # Normalize back to full image [0,1]
-                    kp.x = full_x / w
-                    kp.y = full_y / h
-                    # Z is relative, keep as is
-                    
-                # 4. Biomechanical Analysis
-                metrics = analyze_biomechanics(landmarks)
-                
-                result = AnalysisResult(
-                    person_id=0, # TODO: Tracking ID
-                    bbox=box,
-                    keypoints=landmarks,
-                    metrics=metrics
+        mode = "detected"
+        h, w = frame.shape[:2]
+
+        if stream is not None and self._can_track(stream):
+            # 1a. Tracking: ROIs derived from last frame's landmarks, no YOLO
+            person_ids = [person_id for person_id, _ in stream.rois]
+            rois = [roi for _, roi in stream.rois]
+            analysis_results = self._estimate_all(frame, rois, person_ids, stream, timings)
+            mode = "tracked"
+            for r in analysis_results:
+                # Report the person's extent, not the expanded search window
+                r.bbox = self._roi_from_landmarks(r.keypoints, w, h, expand=0.0)
+            if analysis_results:
+                stream.tracker.update(
+                    [r.bbox for r in analysis_results], frame.shape,
+                    hints=[r.person_id for r in analysis_results]
                 )
-                analysis_results.append(result)
-                
+
+        if mode == "detected" or not analysis_results:
+            # 1b. Detection
+            # YOLO expects RGB usually, but OpenCV gives BGR.
+            # Ultralytics handles BGR/RGB automatically if passed as numpy.
+            # Let's keep it as is.
+            imgsz = stream.detector_imgsz if stream is not None else None
+            t0 = time.perf_counter()
+            if self.scheduler is not None:
+                boxes: List[BoundingBox] = self.scheduler.detect(frame, imgsz=imgsz)
+            else:
+                with self._yolo_lock:
+                    boxes = self.yolo.detect(frame, imgsz=imgsz)
+            timings["detection"] = (time.perf_counter() - t0) * 1000.0
+            if stream is not None:
+                # Stable IDs before pose, so each person gets their own estimator
+                person_ids = stream.tracker.update(boxes, frame.shape)
+            else:
+                person_ids = list(range(len(boxes)))
+            analysis_results = self._estimate_all(frame, boxes, person_ids, stream, timings)
+            mode = "detected"
+
+        if stream is not None:
+            # results[0] is the longest-tracked person
+            analysis_results.sort(key=lambda r: r.person_id)
+            self._update_stream(stream, frame, analysis_results, mode)
+
+        timings["total"] = (time.perf_counter() - start) * 1000.0
         return FrameAnalysis(
             frame_id=frame_id,
-            timestamp_ms=0, # TODO
-            results=analysis_results
+            timestamp_ms=timestamp_ms,
+            results=analysis_results,
+            detection_mode=mode,
+            timings_ms=timings
+        )
+
+    def _estimate_all(self, frame: np.ndarray, boxes: List[BoundingBox], person_ids: List[int],
+                      stream: Optional[StreamState] = None,
+                      timings: Optional[Dict[str, float]] = None) -> List[AnalysisResult]:
+        analysis_results = []
+        for box, person_id in zip(boxes, person_ids):
+            estimator = stream.pose_pool.get(person_id, in_use=person_ids) if stream is not None else self.pose
+            result = self._estimate(frame, box, person_id, estimator, timings)
+            if result:
+                analysis_results.append(result)
+        return analysis_results
+
+    def _estimate(self, frame: np.ndarray, box: BoundingBox, person_id: int,
+                  estimator: PoseEstimator,
+                  timings: Optional[Dict[str, float]] = None) -> Optional[AnalysisResult]:
+        timings = timings if timings is not None else {}
+        t0 = time.perf_counter()
+        # ROI Extraction with padding
+        h, w, _ = frame.shape
+        pad = 10
+        x1 = max(0, box.x1 - pad)
+        y1 = max(0, box.y1 - pad)
+        x2 = min(w, box.x2 + pad)
+        y2 = min(h, box.y2 + pad)
+
+        crop = frame[y1:y2, x1:x2]
+
+        if crop.size == 0:
+            return None
+
+        # 2. Pose Estimation
+        # Convert crop to RGB for MediaPipe
+        crop_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        if estimator is self.pose:
+            with self._pose_lock:
+                landmarks = estimator.process(crop_rgb)
+        else:
+            landmarks = estimator.process(crop_rgb)
+        t1 = time.perf_counter()
+        timings["pose"] = timings.get("pose", 0.0) + (t1 - t0) * 1000.0
+
+        if not landmarks:
+            return None
+
+        # 3. De-normalize coordinates
+        # Landmarks are normalized [0,1] relative to the CROP.
+        # Map back to FULL IMAGE [0,1] in one affine step:
+        # full = (crop_norm * crop_size + crop_offset) / image_size
+        # Z is relative, keep as is
+        crop_h, crop_w, _ = crop.shape
+        landmarks.affine_(crop_w / w, crop_h / h, x1 / w, y1 / h)
+
+        # 4. Biomechanical Analysis
+        # Straight from the landmark array: no per-landmark Keypoint objects on the hot path
+        metrics = batch_to_metrics(analyze_biomechanics_batch(landmarks.data))[0]
+        timings["geometry"] = timings.get("geometry", 0.0) + (time.perf_counter() - t1) * 1000.0
+
+        return AnalysisResult(
+            person_id=person_id,
+            bbox=box,
+            keypoints=landmarks,
+            metrics=metrics
+        )
+
+    # --- Tracking Mode ---
+
+    def _can_track(self, stream: StreamState) -> bool:
+        return (
+            self.tracking_enabled
+            and not stream.force_detect
+            and bool(stream.rois)
+            and stream.frames_since_detection < self.redetect_interval
+        )
+
+    def _update_stream(self, stream: StreamState, frame: np.ndarray,
+                       results: List[AnalysisResult], mode: str):
+        h, w = frame.shape[:2]
+
+        if mode == "detected":
+            stream.frames_since_detection = 0
+        stream.frames_since_detection += 1
+
+        # A tracked person whose pose was lost is the clearest sign the ROIs need re-acquiring
+        lost_person = mode == "tracked" and len(results) < len(stream.rois)
+        stream.rois = [(r.person_id, self._roi_from_landmarks(r.keypoints, w, h)) for r in results]
+
+        # Free MediaPipe graphs of people who have left
+        stream.pose_pool.retain(stream.tracker.active_ids)
+
+        # Low-quality landmarks mean the ROI may have drifted off the patient
+        stream.force_detect = (
+            not results or lost_person
+            or any(not self._landmarks_reliable(r.keypoints) for r in results)
+        )
+
+    def _landmarks_reliable(self, landmarks: Landmarks) -> bool:
+        visibility = landmarks.visibility
+        if visibility[TORSO_INDICES].min() < self.min_visibility:
+            return False
+        return float(visibility.mean()) >= self.min_pose_confidence
+
+    def _roi_from_landmarks(self, landmarks: Landmarks, w: int, h: int,
+                            expand: Optional[float] = None) -> BoundingBox:
+        """Expanded landmark bbox in full-image pixels, used as next frame's crop."""
+        xy = landmarks.xy
+        bx1, by1 = xy.min(axis=0) * (w, h)
+        bx2, by2 = xy.max(axis=0) * (w, h)
+
+        expand = self.roi_expand if expand is None else expand
+        ex = (bx2 - bx1) * expand
+        ey = (by2 - by1) * expand
+        confidence = float(landmarks.visibility.mean())
+
+        return BoundingBox(
+            x1=int(max(0, bx1 - ex)),
+            y1=int(max(0, by1 - ey)),
+            x2=int(min(w, bx2 + ex)),
+            y2=int(min(h, by2 + ey)),
+            confidence=confidence
         )
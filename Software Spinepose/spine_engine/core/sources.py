@@ -0,0 +1,362 @@
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Union
+from urllib.parse import urlparse
+
+import cv2
+import numpy as np
+
+from ..utils.media import MediaFrame, is_video, list_images
+
+class FrameSource(ABC):
+    """
+    Base class for live frame sources.
+    read() returns the next frame as a MediaFrame: `index` is the frame ID
+    (monotonic for the life of the source, also across loops) and
+    `timestamp_ms` its capture/playback time. Returns None when exhausted.
+    """
+
+    kind = "base"
+
+    def __init__(self, config: Optional[dict] = None):
+        self.config = config or {}
+        self._next_id = 0
+
+    def open(self):
+        pass
+
+    @abstractmethod
+    def read(self) -> Optional[MediaFrame]:
+        """Next frame, or None when the source is exhausted."""
+        pass
+
+    def skip(self, count: int):
+        """Drops `count` frames (frame stride). Sources override this with a cheaper path."""
+        for _ in range(count):
+            if self.read() is None:
+                break
+
+    def release(self):
+        pass
+
+    @property
+    def lossless(self) -> bool:
+        """True if every frame must be analyzed (consumer-paced); False for live, latest-wins sources."""
+        return False
+
+    def _frame(self, image: np.ndarray, source: str, timestamp_ms: float) -> MediaFrame:
+        frame = MediaFrame(self._next_id, image, source, timestamp_ms)
+        self._next_id += 1
+        return frame
+
+class CameraSource(FrameSource):
+    """
+    Webcam (device index) or network stream (RTSP/HTTP URL) via cv2.VideoCapture.
+    Timestamps are wall-clock ms at read time.
+
+    Config keys:
+    - device: Device index, or a stream URL allowlisted in parse_source_spec() (default 0)
+    - width, height: Requested capture size (default 640x480; ignored by most streams)
+    """
+
+    kind = "camera"
+
+    def open(self):
+        self.device = self.config.get('device', 0)
+        self.cap = cv2.VideoCapture(self.device)
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open camera: {self.device}")
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.config.get('width', 640))
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.config.get('height', 480))
+
+    def read(self) -> Optional[MediaFrame]:
+        ret, image = self.cap.read()
+        if not ret:
+            return None
+        return self._frame(image, str(self.device), time.time() * 1000.0)
+
+    def skip(self, count: int):
+        # Grabbed but never decoded
+        for _ in range(count):
+            self.cap.grab()
+            self._next_id += 1
+
+    def release(self):
+        self.cap.release()
+
+class PacedSource(FrameSource):
+    """
+    Replay source with a nominal frame rate. With `realtime`, read() sleeps so
+    frames are delivered at that rate; otherwise as fast as they are consumed:
+    the hub hands each frame to inference without dropping any (see `lossless`),
+    so offline replays analyze the same frames on every run.
+    Timestamps are playback positions (frame ID / fps), not wall clock.
+    """
+
+    @property
+    def lossless(self) -> bool:
+        return not self.realtime
+
+    def open(self):
+        self.realtime = self.config.get('realtime', True)
+        self.loop = self.config.get('loop', True)
+        self._clock_start: Optional[float] = None
+
+    def _pace(self, frame_id: int):
+        if not self.realtime:
+            return
+        now = time.perf_counter()
+        if self._clock_start is None:
+            self._clock_start = now
+        due = self._clock_start + frame_id / self.fps
+        if due > now:
+            time.sleep(due - now)
+        elif now - due > 1.0:
+            self._clock_start = now - frame_id / self.fps  # Consumer stalled: don't burst to catch up
+
+    def _timestamp(self, frame_id: int) -> float:
+        return frame_id * 1000.0 / self.fps
+
+class VideoFileSource(PacedSource):
+    """
+    Video file, looped, at its native frame rate (`realtime`) or max rate.
+
+    Config keys:
+    - path: Video file
+    - loop: Restart at the end (default True)
+    - realtime: Pace to the file's FPS (default True); False replays at max rate
+    """
+
+    kind = "video"
+
+    def open(self):
+        super().open()
+        self.path = self.config['path']
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open video: {self.path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    def read(self) -> Optional[MediaFrame]:
+        ret, image = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, image = self.cap.read()
+        if not ret:
+            return None
+        self._pace(self._next_id)
+        return self._frame(image, self.path, self._timestamp(self._next_id))
+
+    def skip(self, count: int):
+        for _ in range(count):
+            if not self.cap.grab():
+                if not self.loop:
+                    return
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                self.cap.grab()
+            self._next_id += 1
+
+    def release(self):
+        self.cap.release()
+
+class ImageFolderSource(PacedSource):
+    """
+    Images in a directory (sorted by name), cycled at a fixed rate.
+
+    Config keys:
+    - path: Image directory
+    - fps: Nominal frame rate (default 10)
+    - loop, realtime: As for VideoFileSource
+    """
+
+    kind = "images"
+
+    def open(self):
+        super().open()
+        self.path = self.config['path']
+        self.fps = self.config.get('fps', 10.0)
+        self.files = list_images(self.path)
+        if not self.files:
+            raise IOError(f"No images in {self.path}")
+
+    def read(self) -> Optional[MediaFrame]:
+        # Unreadable files are skipped, but a folder of only bad files must not spin forever
+        for _ in range(len(self.files)):
+            frame_id = self._next_id
+            if frame_id >= len(self.files) and not self.loop:
+                return None
+            path = self.files[frame_id % len(self.files)]
+            image = cv2.imread(path)
+            if image is None:
+                print(f"Warning: Could not read image {path}, skipping.")
+                self._next_id += 1
+                continue
+            self._pace(frame_id)
+            return self._frame(image, path, self._timestamp(frame_id))
+        return None
+
+    def skip(self, count: int):
+        self._next_id += count
+
+class SyntheticSource(PacedSource):
+    """
+    Generated frames: smooth noise backgrounds with a moving figure, for
+    running the live path without a camera or media files.
+
+    Config keys:
+    - width, height: Frame size (default 640x480)
+    - fps: Nominal frame rate (default 30)
+    - realtime: Pace to `fps` (default True)
+    - seed: RNG seed for the backgrounds (default 0)
+    """
+
+    kind = "synthetic"
+    BACKGROUNDS = 16
+
+    def open(self):
+        super().open()
+        self.loop = True
+        self.fps = self.config.get('fps', 30.0)
+        self.width = self.config.get('width', 640)
+        self.height = self.config.get('height', 480)
+        rng = np.random.default_rng(self.config.get('seed', 0))
+        # Smooth noise compresses like a camera frame; pure noise would overstate JPEG cost
+        self._backgrounds: List[np.ndarray] = []
+        for _ in range(self.BACKGROUNDS):
+            small = rng.integers(0, 256, size=(self.height // 16, self.width // 16, 3), dtype=np.uint8)
+            self._backgrounds.append(cv2.resize(small, (self.width, self.height), interpolation=cv2.INTER_CUBIC))
+
+    def read(self) -> Optional[MediaFrame]:
+        frame_id = self._next_id
+        image = self._backgrounds[frame_id % self.BACKGROUNDS].copy()
+        self._draw_figure(image, frame_id)
+        self._pace(frame_id)
+        return self._frame(image, "synthetic", self._timestamp(frame_id))
+
+    def skip(self, count: int):
+        self._next_id += count
+
+    def _draw_figure(self, image: np.ndarray, frame_id: int):
+        # A stick figure swaying side to side
+        h, w = image.shape[:2]
+        phase = 2 * np.pi * frame_id / (2 * self.fps)
+        cx = int(w / 2 + 0.2 * w * np.sin(phase))
+        head, hip = (cx, int(0.2 * h)), (cx + int(0.03 * w * np.sin(2 * phase)), int(0.6 * h))
+        color, thickness = (240, 240, 240), max(2, w // 80)
+        cv2.circle(image, head, max(4, h // 20), color, -1)
+        cv2.line(image, head, hip, color, thickness)
+        for dx in (-1, 1):
+            cv2.line(image, (cx, int(0.3 * h)), (cx + dx * int(0.1 * w), int(0.45 * h)), color, thickness)
+            cv2.line(image, hip, (hip[0] + dx * int(0.06 * w), int(0.9 * h)), color, thickness)
+
+SOURCE_TYPES = {
+    CameraSource.kind: CameraSource,
+    VideoFileSource.kind: VideoFileSource,
+    ImageFolderSource.kind: ImageFolderSource,
+    SyntheticSource.kind: SyntheticSource,
+}
+
+DEFAULT_SOURCE = {"type": "camera", "device": 0}
+
+# Keys a client may set per source type
+SOURCE_KEYS = {
+    "camera": {"device", "width", "height"},
+    "video": {"path", "loop", "realtime"},
+    "images": {"path", "fps", "loop", "realtime"},
+    "synthetic": {"width", "height", "fps", "realtime", "seed"},
+}
+
+# Inclusive bounds for numeric keys
+NUMERIC_LIMITS = {
+    "fps": (1, 240),
+    "width": (16, 3840),
+    "height": (16, 2160),
+    "seed": (0, 2 ** 32 - 1),
+}
+BOOLEAN_KEYS = {"loop", "realtime"}
+MAX_DEVICE_INDEX = 63
+
+def parse_source_spec(spec: Union[dict, None], allowed_roots: Optional[Sequence[str]] = None,
+                      allowed_streams: Optional[dict] = None) -> Dict:
+    """
+    Validates a source spec from a client, e.g. {"type": "video", "path": "demo.mp4", "realtime": false}.
+    With `allowed_roots`, file sources must live under one of those directories.
+    Camera devices are integer indices; stream URLs are only accepted when their
+    scheme and host are in `allowed_streams` ({"schemes": [...], "hosts": [...]}).
+    Raises ValueError on an invalid spec.
+    """
+    if spec is not None and not isinstance(spec, dict):
+        raise ValueError("Source spec must be an object")
+    spec = dict(spec or DEFAULT_SOURCE)
+    kind = spec.get('type')
+    if kind not in SOURCE_TYPES:
+        raise ValueError(f"Unknown source type: {kind!r} (expected one of {sorted(SOURCE_TYPES)})")
+
+    unknown = set(spec) - SOURCE_KEYS[kind] - {"type"}
+    if unknown:
+        raise ValueError(f"Unknown keys for source {kind!r}: {sorted(unknown)}")
+    for key, (low, high) in NUMERIC_LIMITS.items():
+        if key not in spec:
+            continue
+        value = spec[key]
+        integral = key != "fps"
+        if isinstance(value, bool) or not isinstance(value, int if integral else (int, float)):
+            raise ValueError(f"{key} must be {'an integer' if integral else 'a number'}")
+        if not low <= value <= high:
+            raise ValueError(f"{key} must be between {low} and {high}")
+    for key in BOOLEAN_KEYS & set(spec):
+        if not isinstance(spec[key], bool):
+            raise ValueError(f"{key} must be true or false")
+
+    if kind == "camera":
+        spec['device'] = _check_device(spec.get('device', 0), allowed_streams or {})
+    if kind in ("video", "images"):
+        path = spec.get('path')
+        if not isinstance(path, str) or not path:
+            raise ValueError(f"Source type {kind!r} requires a path")
+        real = os.path.realpath(path)
+        if allowed_roots is not None and not any(
+            os.path.commonpath([real, os.path.realpath(root)]) == os.path.realpath(root)
+            for root in allowed_roots
+        ):
+            raise ValueError(f"Path outside the allowed media roots: {path}")
+        if kind == "video" and not (os.path.isfile(real) and is_video(real)):
+            raise ValueError(f"Not a video file: {path}")
+        if kind == "images" and not os.path.isdir(real):
+            raise ValueError(f"Not a directory: {path}")
+        spec['path'] = real
+    return spec
+
+def _check_device(device, allowed_streams: dict):
+    if isinstance(device, int) and not isinstance(device, bool):
+        if not 0 <= device <= MAX_DEVICE_INDEX:
+            raise ValueError(f"Camera index must be between 0 and {MAX_DEVICE_INDEX}")
+        return device
+    if not isinstance(device, str):
+        raise ValueError("Camera device must be an index or an allowed stream URL")
+    # Anything else handed to cv2.VideoCapture could open local files or arbitrary URLs
+    url = urlparse(device)
+    schemes = {s.lower() for s in allowed_streams.get('schemes', [])}
+    hosts = {h.lower() for h in allowed_streams.get('hosts', [])}
+    if url.scheme.lower() not in schemes or (url.hostname or "").lower() not in hosts:
+        raise ValueError("Stream URL not allowed (scheme and host must be allowlisted)")
+    return device
+
+def source_key(spec: Dict) -> str:
+    """
+    Canonical form of a spec; viewers with equal keys share one source.
+    Cameras are keyed by device alone (a device can only be opened once);
+    other sources by their full spec.
+    """
+    if spec.get('type') == CameraSource.kind:
+        spec = {'type': CameraSource.kind, 'device': spec.get('device', 0)}
+    return json.dumps(spec, sort_keys=True)
+
+def create_source(spec: Dict) -> FrameSource:
+    """Opens the FrameSource for a (validated) spec."""
+    config = {k: v for k, v in spec.items() if k != 'type'}
+    source = SOURCE_TYPES[spec['type']](config)
+    source.open()
+    return source
@@ -1,12 +1,24 @@
 
 import os
+import copy
 import json
+import sqlite3
 import time
+import threading
 import cv2
 import uuid
 from typing import Dict, Any, List, Optional
-from dataclasses import asdict
-from .types import FrameAnalysis
+from dataclasses import asdict, dataclass
+from .types import FrameAnalysis, Landmarks
+from .vectors import VectorStore
+from ..analysis.embedding import pose_embedding, EMBEDDING_DIM
+
+@dataclass
+class PendingEntry:
+    """A KnowledgeBase record that has been built but not yet written."""
+    record: Dict
+    image: Any
+    embedding: Optional[Any] = None
 
 class KnowledgeBase:
     """
@@ -16,8 +28,16 @@ class KnowledgeBase:
     - db/
         - index.jsonl (Metadata + Metrics)
         - images/ (Snapshots)
-        - vectors/ (Embeddings - generic placeholder)
+        - vectors/ (Pose embeddings, memory-mapped float32 matrix)
+
+    index.jsonl is mirrored in memory. Each query() only parses bytes appended
+    since the last call (tracked by file offset, mtime and inode), and hash
+    indexes on `activity`, `domain` and `type` make filtered queries O(matches).
     """
+
+    # Fields with a hash index. Entries without a "type" are pose analyses.
+    INDEXED_FIELDS = ("activity", "domain", "type")
+    DEFAULT_TYPE = "analysis"
     
     def __init__(self, db_root: str = "spine_db"):
         self.root = db_root
@@ -25,14 +45,47 @@ class KnowledgeBase:
         self.index_path = os.path.join(self.root, "index.jsonl")
         
         os.makedirs(self.images_dir, exist_ok=True)
+
+        # Resident index state
+        self._lock = threading.Lock()
+        self._reset_index()
+
+        # Pose similarity search
+        self.vectors = VectorStore(os.path.join(self.root, "vectors"), EMBEDDING_DIM)
         
     def save_entry(self, analysis: FrameAnalysis, image: Any, activity_context: str = "unknown", domain: str = "medical") -> str:
         """
         Saves a single frame analysis to the RAG DB.
         Returns the unique Entry ID.
         """
-        if not analysis.results:
+        entry = self.prepare_entry(analysis, image, activity_context, domain)
+        if entry is None:
             return ""
+        self.write_batch([entry])
+        return entry.record["id"]
+
+    def save_reference(self, image: Any, condition: str, description: str, domain: str = "medical") -> str:
+        """
+        Saves a reference image (e.g., Internet X-ray) without requiring pose analysis.
+        """
+        meta = {
+            "type": "reference",
+            "condition": condition,
+            "description": description,
+            "metrics": {} # Placeholder
+        }
+        entry = PendingEntry(self._make_record(condition, meta, domain), image)
+        self.write_batch([entry])
+        return entry.record["id"]
+
+    def prepare_entry(self, analysis: FrameAnalysis, image: Any, activity_context: str = "unknown",
+                      domain: str = "medical") -> Optional["PendingEntry"]:
+        """
+        Builds the record for an analysis without touching disk (ID, metadata, embedding).
+        Returns None when there is nothing to save.
+        """
+        if not analysis.results:
+            return None
             
         # Prepare Metadata from Analysis
         res = analysis.results[0]
@@ -44,112 +97,284 @@ class KnowledgeBase:
             },
             "keypoints_summary": list(res.keypoints.keys()) 
         }
-        
-        return self._persist(image, activity_context, meta, domain)
 
-    def save_reference(self, image: Any, condition: str, description: str, domain: str = "medical") -> str:
+        # Normalized pose embedding for nearest-posture retrieval
+        embedding = pose_embedding(res.keypoints) if isinstance(res.keypoints, Landmarks) else None
+        return PendingEntry(self._make_record(activity_context, meta, domain), image, embedding)
+
+    def write_batch(self, entries: List["PendingEntry"], fsync: bool = False):
         """
-        Saves a reference image (e.g., Internet X-ray) without requiring pose analysis.
+        Persists prepared entries: image snapshots, then a single index append.
+        With fsync=True the index is flushed to stable storage before returning.
         """
-        meta = {
-            "type": "reference",
-            "condition": condition,
-            "description": description,
-            "metrics": {} # Placeholder
-        }
-        return self._persist(image, condition, meta, domain)
+        if not entries:
+            return
+
+        # Save Image Snapshots
+        for entry in entries:
+            cv2.imwrite(entry.record["image_path"], entry.image)
+
+        # Append to Index (JSONL), one write for the whole batch
+        payload = "".join(json.dumps(entry.record) + "\n" for entry in entries)
+        with open(self.index_path, "a") as f:
+            f.write(payload)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        embedded = [e for e in entries if e.embedding is not None]
+        if embedded:
+            self.vectors.add_batch([e.record["id"] for e in embedded], [e.embedding for e in embedded])
+
+    def sync(self):
+        """Flushes the index file to stable storage."""
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "a") as f:
+                os.fsync(f.fileno())
 
-    def _persist(self, image: Any, activity: str, metadata: Dict, domain: str) -> str:
+    def _make_record(self, activity: str, metadata: Dict, domain: str) -> Dict:
         entry_id = str(uuid.uuid4())
-        timestamp = time.time()
-        
-        # Save Image Snapshot
-        img_filename = f"{entry_id}.jpg"
-        img_path = os.path.join(self.images_dir, img_filename)
-        cv2.imwrite(img_path, image)
-        
-        record = {
+        return {
             "id": entry_id,
-            "timestamp": timestamp,
+            "timestamp": time.time(),
             "activity": activity,
             "domain": domain, # medical or sports
-            "image_path": img_path,
+            "image_path": os.path.join(self.images_dir, f"{entry_id}.jpg"),
             **metadata
         }
-        
-        # Append to Index (JSONL)
-        with open(self.index_path, "a") as f:
-            f.write(json.dumps(record) + "\n")
-            
-        return entry_id
 
-    def query(self, activity_filter: Optional[str] = None) -> List[Dict]:
+    def query(self, activity_filter: Optional[str] = None, domain: Optional[str] = None,
+              entry_type: Optional[str] = None) -> List[Dict]:
         """
-        Simple retrieval by activity tag.
-        In a full RAG, this would use vector similarity.
+        Retrieval by activity tag, optionally narrowed by domain and entry type
+        ("reference" or "analysis"). Cost is O(matches), not a re-parse of the file.
+        Returned records are copies; callers may modify them freely.
+        For posture similarity, see nearest().
         """
-        results = []
-        if not os.path.exists(self.index_path):
+        filters = {
+            field: value for field, value in
+            (("activity", activity_filter), ("domain", domain), ("type", entry_type))
+            if value is not None
+        }
+
+        with self._lock:
+            self._refresh_index()
+
+            if not filters:
+                positions = range(len(self._records))
+            else:
+                # Walk the smallest posting list, check the remaining fields per record
+                postings = [self._postings[field].get(value, []) for field, value in filters.items()]
+                positions = min(postings, key=len)
+
+            results = []
+            for pos in positions:
+                record = self._records[pos]
+                if all(self._field_value(record, f) == v for f, v in filters.items()):
+                    # Deep copy: nested metrics/keypoints must not alias the resident index
+                    results.append(copy.deepcopy(record))
             return results
-            
-        with open(self.index_path, "r") as f:
-            for line in f:
-                try:
-                    record = json.loads(line)
-                    if activity_filter:
-                        if record.get("activity") == activity_filter:
-                            results.append(record)
-                    else:
-                        results.append(record)
-                except:
+
+    def nearest(self, landmarks: Any, k: int = 5, metric: str = "cosine",
+                domain: Optional[str] = None, n_probe: Optional[int] = None) -> List[Dict]:
+        """
+        Nearest reference postures to a live pose (Landmarks or (33, >=2) array).
+        Returns index records best first, each with an added "score"
+        (cosine similarity, or L2 distance for metric="l2").
+        """
+        # Over-fetch when filtering so k matches survive
+        fetch = k * 4 if domain else k
+        hits = self.vectors.search(pose_embedding(landmarks), k=fetch, metric=metric, n_probe=n_probe)
+
+        results = []
+        with self._lock:
+            self._refresh_index()
+            for entry_id, score in hits:
+                pos = self._by_id.get(entry_id)
+                if pos is None:
+                    continue
+                record = self._records[pos]
+                if domain and record.get("domain") != domain:
                     continue
+                results.append(dict(copy.deepcopy(record), score=score))
+                if len(results) == k:
+                    break
         return results
 
+    # --- Resident Index ---
+
+    def _reset_index(self):
+        self._records: List[Dict] = []
+        self._by_id: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[Any, List[int]]] = {f: {} for f in self.INDEXED_FIELDS}
+        self._offset = 0
+        self._size = None       # (size, mtime_ns) of index.jsonl at the last refresh
+        self._mtime_ns = None
+        self._inode = None
+
+    def _field_value(self, record: Dict, field: str) -> Any:
+        if field == "type":
+            return record.get("type", self.DEFAULT_TYPE)
+        return record.get(field)
+
+    def _refresh_index(self):
+        """Parses only the bytes appended to index.jsonl since the last refresh."""
+        try:
+            st = os.stat(self.index_path)
+        except FileNotFoundError:
+            self._reset_index()
+            return
+
+        if st.st_ino == self._inode and (st.st_size, st.st_mtime_ns) == (self._size, self._mtime_ns):
+            return  # Unchanged since the last refresh
+        if st.st_ino != self._inode or st.st_size < self._offset or st.st_size == self._size:
+            # Replaced, truncated, or rewritten in place (same size, new mtime): rebuild from scratch
+            self._reset_index()
+            self._inode = st.st_ino
+
+        with open(self.index_path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+
+        # Only consume complete lines; a partially written tail waits for the next refresh
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict):
+                continue
+            self._add_to_index(record)
+
+        self._offset += end
+        self._size = st.st_size
+        self._mtime_ns = st.st_mtime_ns
+
+    def _add_to_index(self, record: Dict):
+        pos = len(self._records)
+        self._records.append(record)
+        if "id" in record:
+            self._by_id[record["id"]] = pos
+        for field in self.INDEXED_FIELDS:
+            self._postings[field].setdefault(self._field_value(record, field), []).append(pos)
+
 class PatientDatabase:
     """
-    Simple JSON-based Patient Database.
+    SQLite-backed Patient Database (WAL mode).
+    Patients are stored as JSON documents keyed by ID, so lookups are a primary-key
+    hit and inserts are single atomic transactions instead of a whole-file rewrite.
+    A legacy patients.json is imported once; the import is recorded in the
+    database, so the file itself is left untouched.
     """
+
+    MAX_PAGE = 1000
+
     def __init__(self, db_root: str = "spine_db"):
         self.root = db_root
-        self.patients_file = os.path.join(self.root, "patients.json")
-        
-        if not os.path.exists(self.patients_file):
-            with open(self.patients_file, "w") as f:
-                json.dump([], f)
-    
+        self.db_path = os.path.join(self.root, "patients.sqlite")
+        self.legacy_file = os.path.join(self.root, "patients.json")
+        os.makedirs(self.root, exist_ok=True)
+
+        # One shared connection; the lock serializes access across threads
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS patients ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"  # Insertion order for listing
+            " id TEXT NOT NULL UNIQUE,"
+            " data TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+        self._migrate_legacy()
+
     def add_patient(self, patient_data: Dict) -> Dict:
         """
-        Adds a new patient.
+        Adds a new patient. Raises ValueError if the ID is already taken.
         """
-        patients = self.get_all_patients()
-        
         # Simple ID generation if not provided
         if "id" not in patient_data or not patient_data["id"]:
              patient_data["id"] = str(uuid.uuid4())[:8]
-             
-        patients.append(patient_data)
-        
-        with open(self.patients_file, "w") as f:
-            json.dump(patients, f, indent=4)
-            
+
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT INTO patients (id, data) VALUES (?, ?)",
+                    (str(patient_data["id"]), json.dumps(patient_data))
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Patient {patient_data['id']} already exists")
+
         return patient_data
-        
+
+    def get_patient(self, patient_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM patients WHERE id = ?", (patient_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_patients(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+        """One page of patients in insertion order."""
+        limit = max(0, min(limit, self.MAX_PAGE))
+        offset = max(0, offset)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM patients ORDER BY seq LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM patients").fetchone()[0]
+
     def get_all_patients(self) -> List[Dict]:
         """
-        Returns all patients.
+        Returns all patients. Prefer list_patients() for anything user-facing.
         """
-        if not os.path.exists(self.patients_file):
-            return []
-            
-        with open(self.patients_file, "r") as f:
-            try:
-                return json.load(f)
-            except:
-                return []
-    
-    def get_patient(self, patient_id: str) -> Optional[Dict]:
-        patients = self.get_all_patients()
-        for p in patients:
-            if p["id"] == patient_id:
-                return p
-        return None
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM patients ORDER BY seq").fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _migrate_legacy(self):
+        """One-shot import of patients.json (the previous storage format)."""
+        if not os.path.exists(self.legacy_file):
+            return
+        with self._lock:
+            done = self._conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_migrated'").fetchone()
+        if done:
+            return
+        try:
+            with open(self.legacy_file, "r") as f:
+                patients = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read {self.legacy_file} for migration: {e}")
+            return
+        if not isinstance(patients, list):
+            print(f"Warning: {self.legacy_file} is not a list of patients; skipping migration")
+            return
+
+        migrated = 0
+        with self._lock, self._conn:
+            for p in patients:
+                if not isinstance(p, dict):
+                    continue
+                if not p.get("id"):
+                    p["id"] = str(uuid.uuid4())[:8]
+                # Duplicate IDs in the old file: the first one wins, as in get_patient()
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO patients (id, data) VALUES (?, ?)",
+                    (str(p["id"]), json.dumps(p))
+                )
+                migrated += cursor.rowcount
+            # Same transaction as the import: a crash never imports twice
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_migrated', ?)",
+                (self.legacy_file,)
+            )
+        print(f"Migrated {migrated} patients from {self.legacy_file}")
@@ -0,0 +1,115 @@
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .types import BoundingBox
+
+def iou(a: BoundingBox, b: BoundingBox) -> float:
+    """Intersection-over-Union of two boxes."""
+    ix1, iy1 = max(a.x1, b.x1), max(a.y1, b.y1)
+    ix2, iy2 = min(a.x2, b.x2), min(a.y2, b.y2)
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = a.area + b.area - inter
+    return inter / union if union > 0 else 0.0
+
+@dataclass
+class Track:
+    """A person followed across frames."""
+    track_id: int
+    bbox: BoundingBox
+    hits: int = 1        # Frames matched since birth
+    misses: int = 0      # Consecutive frames without a match
+    state: Dict[str, Any] = field(default_factory=dict)  # Per-person caches (smoothing, etc.)
+
+class PersonTracker:
+    """
+    Lightweight multi-person tracker assigning stable person IDs.
+    Greedy IoU association with a centroid-distance fallback for fast movers;
+    unmatched boxes start new tracks, tracks unmatched for `max_misses`
+    consecutive frames die. Cost is O(tracks x boxes) per frame.
+    """
+
+    def __init__(self, config: Optional[dict] = None):
+        self.config = config or {}
+        self.iou_threshold = self.config.get('iou_threshold', 0.3)
+        self.max_centroid_dist = self.config.get('max_centroid_dist', 0.1)  # Fraction of frame diagonal
+        self.max_misses = self.config.get('max_misses', 10)
+
+        self.tracks: Dict[int, Track] = {}
+        self._next_id = 0
+
+    def update(self, boxes: List[BoundingBox], frame_shape: Tuple[int, ...],
+               hints: Optional[List[Optional[int]]] = None) -> List[int]:
+        """
+        Associates this frame's boxes with existing tracks.
+        hints: Known track ID per box (e.g. ROIs followed from that track's
+               landmarks); hinted boxes skip association.
+        Returns the track ID for each box, in input order.
+        """
+        h, w = frame_shape[:2]
+        max_dist = self.max_centroid_dist * math.hypot(w, h)
+
+        assigned: List[Optional[int]] = [None] * len(boxes)
+        matched_tracks = set()
+        for i, hint in enumerate(hints or []):
+            if hint is not None and hint in self.tracks and hint not in matched_tracks:
+                assigned[i] = hint
+                matched_tracks.add(hint)
+                self._match(self.tracks[hint], boxes[i])
+
+        # Score every (track, box) pair that passes either gate
+        candidates = []
+        for track in self.tracks.values():
+            if track.track_id in matched_tracks:
+                continue
+            tcx, tcy = track.bbox.center
+            for i, box in enumerate(boxes):
+                if assigned[i] is not None:
+                    continue
+                overlap = iou(track.bbox, box)
+                bcx, bcy = box.center
+                dist = math.hypot(tcx - bcx, tcy - bcy)
+                if overlap >= self.iou_threshold or dist <= max_dist:
+                    candidates.append((-overlap, dist, track.track_id, i))
+
+        # Greedy: best overlap first, then nearest centroid
+        candidates.sort()
+        for _, _, track_id, i in candidates:
+            if assigned[i] is not None or track_id in matched_tracks:
+                continue
+            assigned[i] = track_id
+            matched_tracks.add(track_id)
+            self._match(self.tracks[track_id], boxes[i])
+
+        # Death: tracks that went unmatched for too long
+        for track_id in list(self.tracks):
+            if track_id not in matched_tracks:
+                track = self.tracks[track_id]
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    del self.tracks[track_id]
+
+        # Birth: unmatched boxes become new tracks
+        for i, box in enumerate(boxes):
+            if assigned[i] is None:
+                track = Track(track_id=self._next_id, bbox=box)
+                self.tracks[track.track_id] = track
+                assigned[i] = track.track_id
+                self._next_id += 1
+
+        return assigned
+
+    def _match(self, track: Track, box: BoundingBox):
+        track.bbox = box
+        track.hits += 1
+        track.misses = 0
+
+    def get(self, track_id: int) -> Optional[Track]:
+        return self.tracks.get(track_id)
+
+    @property
+    def active_ids(self) -> List[int]:
+        return list(self.tracks)
+
+    def reset(self):
+        self.tracks.clear()
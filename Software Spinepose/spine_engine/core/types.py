@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Tuple, Dict, Iterator, Mapping
 import numpy as np
 
 @dataclass
@@ -12,6 +12,75 @@ class Keypoint:
     z: float  # Depth (relative)
     visibility: float  # [0, 1] confidence
 
+# MediaPipe Pose landmark order (mp_pose.PoseLandmark)
+LANDMARK_NAMES = (
+    'NOSE', 'LEFT_EYE_INNER', 'LEFT_EYE', 'LEFT_EYE_OUTER',
+    'RIGHT_EYE_INNER', 'RIGHT_EYE', 'RIGHT_EYE_OUTER',
+    'LEFT_EAR', 'RIGHT_EAR', 'MOUTH_LEFT', 'MOUTH_RIGHT',
+    'LEFT_SHOULDER', 'RIGHT_SHOULDER', 'LEFT_ELBOW', 'RIGHT_ELBOW',
+    'LEFT_WRIST', 'RIGHT_WRIST', 'LEFT_PINKY', 'RIGHT_PINKY',
+    'LEFT_INDEX', 'RIGHT_INDEX', 'LEFT_THUMB', 'RIGHT_THUMB',
+    'LEFT_HIP', 'RIGHT_HIP', 'LEFT_KNEE', 'RIGHT_KNEE',
+    'LEFT_ANKLE', 'RIGHT_ANKLE', 'LEFT_HEEL', 'RIGHT_HEEL',
+    'LEFT_FOOT_INDEX', 'RIGHT_FOOT_INDEX',
+)
+LANDMARK_INDEX = {name: i for i, name in enumerate(LANDMARK_NAMES)}
+NUM_LANDMARKS = len(LANDMARK_NAMES)
+
+class Landmarks(Mapping):
+    """
+    Compact landmark container for one person.
+    Backed by a single (33, 4) float32 array of (x, y, z, visibility) rows in
+    MediaPipe order. Name lookup (landmarks['LEFT_HIP'], .get(), .items())
+    is a compatibility view that builds Keypoint snapshots on demand;
+    hot paths should use `.data` directly.
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data: np.ndarray):
+        self.data = np.asarray(data, dtype=np.float32).reshape(NUM_LANDMARKS, 4)
+
+    @classmethod
+    def from_keypoints(cls, keypoints: Mapping) -> "Landmarks":
+        """Builds from a name -> Keypoint mapping; missing landmarks get visibility 0."""
+        data = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        for name, kp in keypoints.items():
+            data[LANDMARK_INDEX[name]] = (kp.x, kp.y, kp.z, kp.visibility)
+        return cls(data)
+
+    def __getitem__(self, name: str) -> Keypoint:
+        idx = LANDMARK_INDEX[name]
+        x, y, z, v = self.data[idx].tolist()
+        return Keypoint(id=idx, name=name, x=x, y=y, z=z, visibility=v)
+
+    def __contains__(self, name) -> bool:
+        return name in LANDMARK_INDEX
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(LANDMARK_NAMES)
+
+    def __len__(self) -> int:
+        return NUM_LANDMARKS
+
+    def __repr__(self) -> str:
+        return f"Landmarks({self.data!r})"
+
+    @property
+    def xy(self) -> np.ndarray:
+        return self.data[:, :2]
+
+    @property
+    def visibility(self) -> np.ndarray:
+        return self.data[:, 3]
+
+    def affine_(self, scale_x: float, scale_y: float, offset_x: float, offset_y: float) -> "Landmarks":
+        """In-place x' = x * scale_x + offset_x, y' = y * scale_y + offset_y. Z is untouched."""
+        self.data[:, 0] *= scale_x
+        self.data[:, 0] += offset_x
+        self.data[:, 1] *= scale_y
+        self.data[:, 1] += offset_y
+        return self
+
 @dataclass
 class BoundingBox:
     """Represents a detected person's bounding box."""
@@ -59,7 +128,7 @@ class AnalysisResult:
     """Complete analysis for a single person in a frame."""
     person_id: int
     bbox: BoundingBox
-    keypoints: Dict[str, Keypoint] = field(default_factory=dict)
+    keypoints: Mapping[str, Keypoint] = field(default_factory=dict) # Landmarks from the engine
     metrics: Optional[SpineMetrics] = None
     raw_landmarks: Optional[List[Keypoint]] = None # Full MediaPipe output
     
@@ -67,5 +136,7 @@ class AnalysisResult:
 class FrameAnalysis:
     """Container for all analysis in a single video frame."""
     frame_id: int
-    timestamp_ms: float
+    timestamp_ms: float  # Wall-clock capture time (epoch ms), or position in a video file
     results: List[AnalysisResult] = field(default_factory=list)
+    detection_mode: str = "detected" # "detected" (YOLO ran) | "tracked" (ROI from previous landmarks)
+    timings_ms: Dict[str, float] = field(default_factory=dict) # Per-stage wall time: detection, pose, geometry, ...
@@ -0,0 +1,199 @@
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+class VectorStore:
+    """
+    Append-only embedding store for the RAG knowledge base.
+    Layout (under db/vectors/):
+    - embeddings.f32: Row-major float32 matrix, one row per entry (memory-mapped for search)
+    - ids.txt: Entry ID per row, same order. It is the commit record: only rows
+      with an ID count, and rows past the last ID are truncated before the next append
+    - partitions.npz: Optional coarse partition index (k-means centroids + row assignments)
+
+    search() is exact brute force by default. After build_partitions(), passing
+    n_probe restricts the scan to the rows of the n_probe nearest partitions,
+    plus any rows appended since the build.
+    """
+
+    CHUNK_ROWS = 65536  # Rows scored per step, bounds temporary memory
+
+    def __init__(self, root: str, dim: int):
+        self.root = root
+        self.dim = dim
+        self.matrix_path = os.path.join(root, "embeddings.f32")
+        self.ids_path = os.path.join(root, "ids.txt")
+        self.partitions_path = os.path.join(root, "partitions.npz")
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._ids_offset = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments: Optional[np.ndarray] = None
+        self._load_partitions()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._count()
+
+    # --- Writes ---
+
+    def add(self, entry_id: str, vector: np.ndarray):
+        self.add_batch([entry_id], [vector])
+
+    def add_batch(self, entry_ids: List[str], vectors: List[np.ndarray]):
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(entry_ids), self.dim)
+        with self._lock:
+            self._refresh()
+            self._truncate_uncommitted()
+            # Vectors first: a crash between the writes leaves uncommitted rows
+            # (dropped by the next append), never a dangling ID
+            with open(self.matrix_path, "ab") as f:
+                f.write(matrix.tobytes())
+            with open(self.ids_path, "a") as f:
+                f.write("".join(entry_id + "\n" for entry_id in entry_ids))
+
+    # --- Search ---
+
+    def search(self, query: np.ndarray, k: int = 5, metric: str = "cosine",
+               n_probe: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Top-k nearest entries to `query`.
+        metric: "cosine" (higher is closer) or "l2" (Euclidean distance, lower is closer).
+        Returns [(entry_id, score)] best first.
+        """
+        if metric not in ("cosine", "l2"):
+            raise ValueError(f"Unknown metric: {metric}")
+        q = np.asarray(query, dtype=np.float32).reshape(self.dim)
+
+        with self._lock:
+            self._refresh()
+            count = self._count()
+            if count == 0 or k <= 0:
+                return []
+            matrix = self._matrix[:count]
+            rows = self._candidate_rows(q, count, n_probe)
+            ids = self._ids
+
+        scores = self._score(matrix, q, metric, rows)
+        if len(scores) == 0:
+            return []
+        k = min(k, len(scores))
+        # Higher-is-better ordering for both metrics
+        keyed = scores if metric == "cosine" else -scores
+        top = np.argpartition(-keyed, k - 1)[:k]
+        top = top[np.argsort(-keyed[top])]
+
+        row_ids = rows[top] if rows is not None else top
+        return [(ids[int(r)], float(scores[t])) for r, t in zip(row_ids, top)]
+
+    def _score(self, matrix: np.ndarray, q: np.ndarray, metric: str,
+               rows: Optional[np.ndarray]) -> np.ndarray:
+        q_norm = float(np.linalg.norm(q)) or 1e-12
+        n = len(rows) if rows is not None else len(matrix)
+        out = np.empty(n, dtype=np.float32)
+        for start in range(0, n, self.CHUNK_ROWS):
+            stop = min(n, start + self.CHUNK_ROWS)
+            block = matrix[rows[start:stop]] if rows is not None else np.asarray(matrix[start:stop])
+            dots = block @ q
+            sq_norms = np.einsum('ij,ij->i', block, block)
+            if metric == "cosine":
+                out[start:stop] = dots / (np.sqrt(sq_norms) * q_norm + 1e-12)
+            else:
+                out[start:stop] = np.sqrt(np.maximum(sq_norms + q_norm ** 2 - 2 * dots, 0.0))
+        return out
+
+    def _candidate_rows(self, q: np.ndarray, count: int, n_probe: Optional[int]) -> Optional[np.ndarray]:
+        if not n_probe or self._centroids is None:
+            return None
+        assigned = self._assignments[:count]
+        nearest = np.argsort(((self._centroids - q) ** 2).sum(axis=1))[:n_probe]
+        rows = np.flatnonzero(np.isin(assigned, nearest))
+        # Rows appended after the last build are always scanned
+        tail = np.arange(len(assigned), count)
+        return np.concatenate([rows, tail])
+
+    # --- Coarse Partition Index ---
+
+    def build_partitions(self, n_partitions: int = 64, iterations: int = 10, seed: int = 0) -> int:
+        """
+        Clusters stored vectors with k-means and saves the partition index.
+        Worth it for large stores (tens of thousands of rows and up).
+        Returns the number of partitions built.
+        """
+        with self._lock:
+            self._refresh()
+            count = self._count()
+            if count == 0:
+                return 0
+            data = np.asarray(self._matrix[:count])
+
+        rng = np.random.default_rng(seed)
+        n_partitions = min(n_partitions, count)
+        centroids = data[rng.choice(count, n_partitions, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = self._nearest_centroid(data, centroids)
+            for c in range(n_partitions):
+                members = data[assignments == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+        assignments = self._nearest_centroid(data, centroids)
+
+        np.savez(self.partitions_path, centroids=centroids, assignments=assignments)
+        with self._lock:
+            self._centroids = centroids
+            self._assignments = assignments
+        return n_partitions
+
+    def _nearest_centroid(self, data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        out = np.empty(len(data), dtype=np.int32)
+        c_sq = (centroids ** 2).sum(axis=1)
+        for start in range(0, len(data), self.CHUNK_ROWS):
+            block = data[start:start + self.CHUNK_ROWS]
+            d = c_sq[None, :] - 2 * block @ centroids.T
+            out[start:start + len(block)] = d.argmin(axis=1)
+        return out
+
+    def _load_partitions(self):
+        if os.path.exists(self.partitions_path):
+            saved = np.load(self.partitions_path)
+            self._centroids = saved["centroids"]
+            self._assignments = saved["assignments"]
+
+    # --- Memory Map ---
+
+    def _count(self) -> int:
+        rows = len(self._matrix) if self._matrix is not None else 0
+        return min(rows, len(self._ids))
+
+    def _truncate_uncommitted(self):
+        """
+        Cuts the matrix back to one row per stored ID. Rows left by a crash
+        between the two appends would otherwise shift every later ID onto the
+        wrong vector. Rows past the last ID are never read, so live memmaps are safe.
+        """
+        committed = len(self._ids) * self.dim * 4
+        if os.path.exists(self.matrix_path) and os.path.getsize(self.matrix_path) > committed:
+            print(f"VectorStore: dropping {os.path.getsize(self.matrix_path) - committed} bytes of uncommitted rows.")
+            os.truncate(self.matrix_path, committed)
+
+    def _refresh(self):
+        """Picks up rows appended since the last call (by this or another process)."""
+        if os.path.exists(self.ids_path):
+            with open(self.ids_path, "rb") as f:
+                f.seek(self._ids_offset)
+                chunk = f.read()
+            end = chunk.rfind(b"\n") + 1
+            self._ids.extend(chunk[:end].decode("utf-8").splitlines())
+            self._ids_offset += end
+
+        if not os.path.exists(self.matrix_path):
+            return
+        rows = os.path.getsize(self.matrix_path) // (self.dim * 4)
+        if self._matrix is None or len(self._matrix) != rows:
+            self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(rows, self.dim)) if rows else None
@@ -0,0 +1,148 @@
+import queue
+import threading
+import time
+from typing import Any, List, Optional
+
+from .storage import KnowledgeBase, PendingEntry
+from .types import FrameAnalysis
+
+class KnowledgeBaseWriter:
+    """
+    Background writer for the RAG KnowledgeBase.
+    submit() only builds the record and enqueues it; a writer thread encodes
+    the snapshots and appends index lines in batches. The queue is bounded:
+    when the disk falls behind, submit() drops the entry (counted in `dropped`)
+    instead of stalling the caller, unless asked to block.
+
+    Config keys (all optional):
+    - max_pending: Queue capacity (entries)
+    - batch_size: Max entries per write
+    - flush_interval: Seconds a partial batch may wait before it is written
+    - fsync_interval: Seconds between fsyncs of the index (0 = every batch, None = never)
+    """
+
+    def __init__(self, kb: KnowledgeBase, config: Optional[dict] = None):
+        self.kb = kb
+        self.config = config or {}
+        self.max_pending = self.config.get("max_pending", 64)
+        self.batch_size = self.config.get("batch_size", 16)
+        self.flush_interval = self.config.get("flush_interval", 0.5)
+        self.fsync_interval = self.config.get("fsync_interval", 5.0)
+
+        self._queue: "queue.Queue[PendingEntry]" = queue.Queue(maxsize=self.max_pending)
+        # Guards _closing against enqueues and the `dropped` counter
+        self._lock = threading.Lock()
+        self._closing = threading.Event()
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+
+        # Stats
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+        self._thread = threading.Thread(target=self._run, name="spine-kb-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, analysis: FrameAnalysis, image: Any, activity_context: str = "unknown",
+               domain: str = "medical", block: bool = False, timeout: Optional[float] = None) -> str:
+        """
+        Queues an analysis for saving. Returns its Entry ID, or "" when there was
+        nothing to save or the entry was dropped (queue full / writer closed).
+        block=True waits up to `timeout` for space instead (for offline callers).
+        A non-empty ID means the entry will be written before close() returns.
+        """
+        if self._closing.is_set():
+            self._count_dropped()
+            return ""
+
+        # The snapshot is written later; the caller may reuse its frame buffer
+        entry = self.kb.prepare_entry(analysis, image.copy(), activity_context, domain)
+        if entry is None:
+            return ""
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # Enqueue under the lock so close() cannot drain in between
+            with self._lock:
+                if self._closing.is_set():
+                    self.dropped += 1
+                    return ""
+                try:
+                    self._queue.put_nowait(entry)
+                    return entry.record["id"]
+                except queue.Full:
+                    if not block or (deadline is not None and time.monotonic() >= deadline):
+                        self.dropped += 1
+                        return ""
+            time.sleep(0.01)
+
+    def close(self, timeout: Optional[float] = None):
+        """Stops accepting entries and waits until everything queued is on disk."""
+        with self._lock:
+            self._closing.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"Warning: KB writer still draining {self.pending} entries.")
+
+    def _count_dropped(self):
+        with self._lock:
+            self.dropped += 1
+
+    # --- Writer Thread ---
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+            elif self._closing.is_set() and self._queue.empty():
+                break
+            self._maybe_fsync(force=False)
+        self._maybe_fsync(force=True)
+
+    def _next_batch(self) -> List[PendingEntry]:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        # Let a partial batch fill for up to flush_interval (no waiting while draining)
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0 or self._closing.is_set():
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[PendingEntry]):
+        fsync = self.fsync_interval == 0
+        try:
+            self.kb.write_batch(batch, fsync=fsync)
+            self.written += len(batch)
+            self.batches += 1
+            self._unsynced = not fsync
+        except Exception as e:
+            # A failed batch is lost, but the writer keeps going
+            self.failed += len(batch)
+            print(f"KB Writer Error: {e}")
+
+    def _maybe_fsync(self, force: bool):
+        if not self._unsynced or self.fsync_interval is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_fsync >= self.fsync_interval:
+            self.kb.sync()
+            self._last_fsync = now
+            self._unsynced = False
@@ -1,5 +1,6 @@
+import importlib
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Type, Union
 import numpy as np
 
 class BaseDetector(ABC):
@@ -28,8 +29,48 @@ class BaseDetector(ABC):
         """Convert raw model output to standard types."""
         pass
     
+    def warmup(self, image_size=(480, 640)):
+        """Runs one dummy frame so the first real frame does not pay one-time init costs."""
+        self.process(np.zeros((*image_size, 3), dtype=np.uint8))
+
     def process(self, image: np.ndarray) -> Any:
         """Full pipeline execution: Pre -> Predict -> Post."""
         processed = self.preprocess(image)
         raw = self.predict(processed)
         return self.postprocess(raw)
+
+# --- Backend Registry ---
+# Detector kind -> backend name -> class, or "module:Class" relative to this package
+# (imported on first use, so unused runtimes are never loaded).
+# Select with the "backend" config key: a registered name, or a "package.module:Class"
+# path (works in spawned worker processes, where register_backend() calls are not inherited).
+
+DETECTOR_BACKENDS: Dict[str, Dict[str, Union[str, Type[BaseDetector]]]] = {
+    "person": {
+        "ultralytics": ".yolo_model:YOLODetector",
+        "onnx": ".onnx_model:ONNXPersonDetector",
+    },
+    "pose": {
+        "mediapipe": ".pose_model:PoseEstimator",
+    },
+}
+
+DEFAULT_BACKENDS = {"person": "ultralytics", "pose": "mediapipe"}
+
+def register_backend(kind: str, name: str, detector: Union[str, Type[BaseDetector]]):
+    """Adds (or replaces) a backend, e.g. register_backend("person", "openvino", MyDetector)."""
+    DETECTOR_BACKENDS.setdefault(kind, {})[name] = detector
+
+def create_detector(kind: str, config: Optional[dict] = None) -> BaseDetector:
+    """Instantiates the backend named by config["backend"] (default per kind)."""
+    config = config or {}
+    name = config.get("backend", DEFAULT_BACKENDS.get(kind))
+    try:
+        detector = name if isinstance(name, str) and ":" in name else DETECTOR_BACKENDS[kind][name]
+    except KeyError:
+        available = ", ".join(DETECTOR_BACKENDS.get(kind, {}))
+        raise ValueError(f"Unknown {kind} backend '{name}' (available: {available})")
+    if isinstance(detector, str):
+        module_name, class_name = detector.split(":")
+        detector = getattr(importlib.import_module(module_name, package=__package__), class_name)
+    return detector(config)
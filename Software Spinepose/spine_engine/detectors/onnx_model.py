@@ -0,0 +1,155 @@
+import os
+from typing import Any, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ..core.types import BoundingBox
+from .base import BaseDetector
+
+class ONNXPersonDetector(BaseDetector):
+    """
+    YOLOv8 person detector on ONNX Runtime (CPU by default).
+    Runs an exported model (`yolo export model=yolov8n.pt format=onnx`) with a
+    NumPy letterbox and NMS instead of the ultralytics/PyTorch pipeline.
+
+    Config keys:
+    - model_path: Exported .onnx file (default yolov8n.onnx)
+    - imgsz: Input size; ignored for models exported with a fixed shape
+    - conf_threshold, iou_threshold: Same defaults as ultralytics predict (0.25 / 0.7)
+    - threads: ONNX Runtime intra-op threads (0 = runtime default)
+    - providers: Execution providers, e.g. ["OpenVINOExecutionProvider", "CPUExecutionProvider"]
+    """
+
+    PERSON_CLASS = 0
+    PAD_VALUE = 114  # Letterbox fill, as in ultralytics
+
+    def load_model(self):
+        import onnxruntime as ort
+
+        model_path = self.config.get('model_path', 'yolov8n.onnx')
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"ONNX model not found: {model_path} (export with: yolo export model=yolov8n.pt format=onnx)"
+            )
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.config.get('threads', 0)
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        providers = self.config.get('providers', ["CPUExecutionProvider"])
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=providers)
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Fixed-shape exports pin the input size; dynamic ones accept imgsz overrides
+        height = model_input.shape[2]
+        self.fixed_size = height if isinstance(height, int) else None
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+        self.conf_threshold = self.config.get('conf_threshold', 0.25)
+        self.iou_threshold = self.config.get('iou_threshold', 0.7)
+
+    def _input_size(self, imgsz: Optional[int]) -> int:
+        if self.fixed_size:
+            return self.fixed_size
+        return imgsz or self.config.get('imgsz', 640)
+
+    def preprocess(self, image: np.ndarray, imgsz: Optional[int] = None) -> Tuple[np.ndarray, Tuple]:
+        blob, ratio, pad = letterbox(image, self._input_size(imgsz), self.PAD_VALUE)
+        return blob, (ratio, pad, image.shape[:2])
+
+    def predict(self, input_data: Tuple[np.ndarray, Tuple]) -> Any:
+        blob, meta = input_data
+        output = self.session.run(None, {self.input_name: blob})[0]
+        return output, meta
+
+    def postprocess(self, raw_output: Any) -> List[BoundingBox]:
+        output, (ratio, pad, shape) = raw_output
+        # (1, 4 + classes, anchors) -> (anchors, 4 + classes)
+        preds = output[0].T
+        # As ultralytics with classes=[0]: each box takes its best class, and only person boxes are kept
+        class_scores = preds[:, 4:]
+        scores = class_scores[:, self.PERSON_CLASS]
+        keep = (class_scores.argmax(axis=1) == self.PERSON_CLASS) & (scores > self.conf_threshold)
+        preds, scores = preds[keep], scores[keep]
+        if not len(scores):
+            return []
+
+        boxes = xywh_to_xyxy(preds[:, :4])
+        keep = nms(boxes, scores, self.iou_threshold)
+        boxes, scores = boxes[keep], scores[keep]
+
+        # Undo the letterbox, clip to the frame
+        h, w = shape
+        boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - pad[0]) / ratio).clip(0, w)
+        boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - pad[1]) / ratio).clip(0, h)
+
+        return [
+            BoundingBox(x1=int(b[0]), y1=int(b[1]), x2=int(b[2]), y2=int(b[3]), confidence=float(s))
+            for b, s in zip(boxes, scores)
+        ]
+
+    def detect(self, image: np.ndarray, imgsz: Optional[int] = None) -> List[BoundingBox]:
+        """process() with a per-call input size (dynamic-shape models only)."""
+        return self.postprocess(self.predict(self.preprocess(image, imgsz)))
+
+    def process_batch(self, images: List[np.ndarray], imgsz: Optional[int] = None) -> List[List[BoundingBox]]:
+        """
+        Boxes per frame, in input order. Runs one session call when the model was
+        exported with a dynamic batch axis (`dynamic=True`), else one call per frame.
+        """
+        if not self.dynamic_batch or len(images) < 2:
+            return [self.detect(image, imgsz) for image in images]
+        prepared = [self.preprocess(image, imgsz) for image in images]
+        blob = np.concatenate([blob for blob, _ in prepared])
+        outputs = self.session.run(None, {self.input_name: blob})[0]
+        return [
+            self.postprocess((output[None], meta))
+            for output, (_, meta) in zip(outputs, prepared)
+        ]
+
+def letterbox(image: np.ndarray, size: int, pad_value: int = 114) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """
+    Aspect-preserving resize into a size x size canvas, centered.
+    Returns the NCHW float32 RGB blob in [0, 1], the scale ratio and the (x, y) padding.
+    """
+    h, w = image.shape[:2]
+    ratio = min(size / h, size / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    dw, dh = (size - new_w) / 2, (size - new_h) / 2
+
+    if (new_w, new_h) != (w, h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    canvas = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT,
+                                value=(pad_value, pad_value, pad_value))
+
+    # BGR HWC uint8 -> RGB NCHW float32
+    blob = canvas[:, :, ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+    return np.ascontiguousarray(blob), ratio, (left, top)
+
+def xywh_to_xyxy(xywh: np.ndarray) -> np.ndarray:
+    xyxy = np.empty_like(xywh)
+    half_w, half_h = xywh[:, 2] / 2, xywh[:, 3] / 2
+    xyxy[:, 0] = xywh[:, 0] - half_w
+    xyxy[:, 1] = xywh[:, 1] - half_h
+    xyxy[:, 2] = xywh[:, 0] + half_w
+    xyxy[:, 3] = xywh[:, 1] + half_h
+    return xyxy
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy non-maximum suppression. Returns kept indices, highest score first."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+        h = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+        inter = w * h
+        overlap = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[overlap <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
@@ -1,33 +1,40 @@
-import mediapipe as mp
 import numpy as np
-from typing import Dict, Any, List, Optional
-from ..core.types import Keypoint
-from .base import BaseDetector
-
-# Robust import for MediaPipe Pose
-try:
-    from mediapipe.python.solutions import pose as mp_pose
-except ImportError:
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Hashable, Iterable
+from ..core.types import Landmarks
+from .base import BaseDetector, create_detector
+
+_mp_pose = None
+
+def _load_mp_pose():
+    """
+    Robust import for MediaPipe Pose.
+    Deferred to the first model load so importing this module stays cheap.
+    """
+    global _mp_pose
+    if _mp_pose is not None:
+        return _mp_pose
     try:
-        from mediapipe.solutions import pose as mp_pose
+        from mediapipe.python.solutions import pose as mp_pose
     except ImportError:
-         print("Warning: Could not import mediapipe.solutions.pose directly. Relying on mp.solutions attribute.")
-         mp_pose = None
+        try:
+            from mediapipe.solutions import pose as mp_pose
+        except ImportError:
+            print("Warning: Could not import mediapipe.solutions.pose directly. Relying on mp.solutions attribute.")
+            import mediapipe as mp
+            if hasattr(mp, 'solutions') and hasattr(mp.solutions, 'pose'):
+                mp_pose = mp.solutions.pose
+            else:
+                raise ImportError("Fatal: mediapipe.solutions.pose could not be loaded. Please check your mediapipe installation.")
+    _mp_pose = mp_pose
+    return _mp_pose
 
 class PoseEstimator(BaseDetector):
     """MediaPipe Pose Wrapper for Skeletal Estimation."""
     
     def load_model(self):
         complexity = self.config.get('complexity', 1) # 1=Full, 2=Heavy
-        
-        # Use the imported module, or fall back to mp.solutions.pose
-        if mp_pose:
-            self.mp_pose_module = mp_pose
-        else:
-             if hasattr(mp, 'solutions') and hasattr(mp.solutions, 'pose'):
-                 self.mp_pose_module = mp.solutions.pose
-             else:
-                 raise ImportError("Fatal: mediapipe.solutions.pose could not be loaded. Please check your mediapipe installation.")
+        self.mp_pose_module = _load_mp_pose()
 
         self.pose = self.mp_pose_module.Pose(
             static_image_mode=self.config.get('static_image_mode', False),
@@ -36,6 +43,13 @@ class PoseEstimator(BaseDetector):
             min_detection_confidence=0.5
         )
         
+    def close(self):
+        """Releases the MediaPipe graph."""
+        pose = getattr(self, 'pose', None)
+        if pose is not None:
+            pose.close()
+            self.pose = None
+
     def preprocess(self, image: np.ndarray) -> np.ndarray:
         # MediaPipe expects RGB
         # If input is BGR (OpenCV default), we should convert it.
@@ -50,26 +64,92 @@ class PoseEstimator(BaseDetector):
         results = self.pose.process(input_data)
         return results
         
-    def postprocess(self, raw_output: Any) -> Optional[Dict[str, Keypoint]]:
+    def postprocess(self, raw_output: Any) -> Optional[Landmarks]:
         if not raw_output.pose_landmarks:
             return None
             
-        landmarks = {}
+        # MediaPipe provides 33 landmarks, packed straight into one (33, 4) array
         mp_landmarks = raw_output.pose_landmarks.landmark
-        
-        # Map MediaPipe landmarks to our Keypoint type
-        for idx, lm in enumerate(mp_landmarks):
-            # MediaPipe provides 33 landmarks
-            name = self.mp_pose_module.PoseLandmark(idx).name
-            
-            k = Keypoint(
-                id=idx,
-                name=name,
-                x=lm.x,
-                y=lm.y,
-                z=lm.z,
-                visibility=lm.visibility
-            )
-            landmarks[name] = k
-            
-        return landmarks
+        data = np.array(
+            [(lm.x, lm.y, lm.z, lm.visibility) for lm in mp_landmarks],
+            dtype=np.float32
+        )
+        return Landmarks(data)
+
+class PosePool:
+    """
+    Pool of PoseEstimators keyed by track/person ID.
+    A single stateful mp Pose fed crops of different people resets its ROI
+    tracking on every call; giving each person their own instance keeps
+    MediaPipe on its fast landmark-tracking path frame to frame.
+    Instances are created lazily and evicted least-recently-used once
+    `max_instances` are live. Keys in use for the current frame are never
+    evicted: people beyond `max_instances` share one overflow estimator
+    instead of rebuilding a graph on every frame.
+    """
+
+    def __init__(self, config: Optional[dict] = None, max_instances: int = 4):
+        # Pooled instances must run in video mode to keep tracking state
+        self.config = {**(config or {}), 'static_image_mode': False}
+        self.max_instances = max(1, max_instances)
+        self._estimators: "OrderedDict[Hashable, PoseEstimator]" = OrderedDict()
+        self._overflow: Optional[PoseEstimator] = None
+
+    def get(self, key: Hashable, in_use: Iterable[Hashable] = ()) -> PoseEstimator:
+        """
+        Estimator for `key`. `in_use` are the keys needed for the current frame;
+        they are never evicted to make room.
+        """
+        estimator = self._estimators.get(key)
+        if estimator is not None:
+            self._estimators.move_to_end(key)
+            return estimator
+
+        if len(self._estimators) >= self.max_instances:
+            protected = set(in_use)
+            protected.add(key)
+            # Oldest first; OrderedDict iteration order is LRU order
+            evictable = next((k for k in self._estimators if k not in protected), None)
+            if evictable is None:
+                return self._overflow_estimator()
+            self.release(evictable)
+
+        estimator = create_detector("pose", self.config)  # Configured backend (MediaPipe by default)
+        estimator.load_model()
+        self._estimators[key] = estimator
+        return estimator
+
+    def _overflow_estimator(self) -> PoseEstimator:
+        if self._overflow is None:
+            self._overflow = create_detector("pose", self.config)
+            self._overflow.load_model()
+        return self._overflow
+
+    def set_complexity(self, complexity: int) -> bool:
+        """Switches model_complexity for new instances and drops the live ones. Returns True if changed."""
+        if self.config.get('complexity', 1) == complexity:
+            return False
+        self.config['complexity'] = complexity
+        self.close()
+        return True
+
+    def release(self, key: Hashable):
+        estimator = self._estimators.pop(key, None)
+        if estimator is not None:
+            estimator.close()
+
+    def retain(self, keys: Iterable[Hashable]):
+        """Releases every instance whose key is not in `keys` (e.g. dead tracks)."""
+        keep = set(keys)
+        for key in [k for k in self._estimators if k not in keep]:
+            self.release(key)
+
+    def close(self):
+        for key in list(self._estimators):
+            self.release(key)
+        if self._overflow is not None:
+            self._overflow.close()
+            self._overflow = None
+
+    def __len__(self) -> int:
+        return len(self._estimators)
@@ -1,6 +1,5 @@
-from typing import List, Any
+from typing import List, Any, Optional
 import numpy as np
-from ultralytics import YOLO
 from ..core.types import BoundingBox
 from .base import BaseDetector
 
@@ -8,18 +7,30 @@ class YOLODetector(BaseDetector):
     """YOLOv8 Wrapper for Person Detection."""
     
     def load_model(self):
+        # Imported here: ultralytics pulls in torch, which dominates startup time
+        from ultralytics import YOLO
         model_path = self.config.get('model_path', 'yolov8n.pt')
         self.model = YOLO(model_path)
-        # Warmup
-        # self.model(np.zeros((640, 640, 3), dtype=np.uint8))
         
     def preprocess(self, image: np.ndarray) -> np.ndarray:
         return image # YOLO handles preprocessing internally
         
-    def predict(self, input_data: np.ndarray) -> Any:
+    def predict(self, input_data: np.ndarray, imgsz: Optional[int] = None) -> Any:
         # Run inference, enforcing class 0 (person)
-        results = self.model(input_data, classes=[0], verbose=False)
+        imgsz = imgsz or self.config.get('imgsz', 640)
+        results = self.model(input_data, classes=[0], imgsz=imgsz, verbose=False)
         return results
+
+    def detect(self, image: np.ndarray, imgsz: Optional[int] = None) -> List[BoundingBox]:
+        """process() with a per-call input size (e.g. lowered by the adaptive controller)."""
+        return self.postprocess(self.predict(self.preprocess(image), imgsz=imgsz))
+
+    def process_batch(self, images: List[np.ndarray], imgsz: Optional[int] = None) -> List[List[BoundingBox]]:
+        """One batched forward pass over several frames; boxes per frame, in input order."""
+        if not images:
+            return []
+        results = self.predict([self.preprocess(image) for image in images], imgsz=imgsz)
+        return [self.postprocess([result]) for result in results]
         
     def postprocess(self, raw_output: Any) -> List[BoundingBox]:
         boxes = []
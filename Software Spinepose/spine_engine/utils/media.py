@@ -0,0 +1,243 @@
+import csv
+import json
+import os
+import queue
+import threading
+from dataclasses import dataclass
+from typing import IO, Iterator, List, Optional
+
+import cv2
+import numpy as np
+
+from ..core.types import FrameAnalysis
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff'}
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.webm', '.m4v', '.mpg', '.mpeg'}
+
+def is_video(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS
+
+def is_image(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+def list_images(directory: str) -> List[str]:
+    """Image files in `directory`, sorted by name (non-recursive)."""
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if is_image(name)
+    )
+
+@dataclass
+class MediaFrame:
+    """One decoded frame from a video, image, or image directory."""
+    index: int           # Position in the source (before stride)
+    image: np.ndarray
+    source: str          # File path (images) or video path
+    timestamp_ms: float  # Position in the video, 0 for still images
+
+class ThreadedFrameReader:
+    """
+    Decodes frames on a background thread into a bounded queue, so decoding
+    overlaps with inference. Unlike the live pipeline nothing is dropped:
+    every (strided) frame is delivered in order.
+
+    Accepts a video file, a single image, or a directory of images.
+    """
+
+    _END = object()
+
+    def __init__(self, path: str, stride: int = 1, max_frames: Optional[int] = None, queue_size: int = 8):
+        self.path = path
+        self.stride = max(1, stride)
+        self.max_frames = max_frames
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.error: Optional[Exception] = None
+
+        self.fps = 30.0
+        self.total_frames: Optional[int] = None
+        if os.path.isdir(path):
+            self._files = list_images(path)
+            self.total_frames = len(self._files)
+        elif is_video(path):
+            self._files = None
+            cap = cv2.VideoCapture(path)
+            if not cap.isOpened():
+                raise IOError(f"Could not open video: {path}")
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            self.total_frames = count if count > 0 else None
+            cap.release()
+        else:
+            self._files = [path]
+            self.total_frames = 1
+
+    @property
+    def expected_frames(self) -> Optional[int]:
+        """Frames that will be delivered after stride/max_frames, if known."""
+        if self.total_frames is None:
+            return self.max_frames
+        n = (self.total_frames + self.stride - 1) // self.stride
+        return min(n, self.max_frames) if self.max_frames else n
+
+    def start(self) -> "ThreadedFrameReader":
+        self._thread = threading.Thread(target=self._run, name="spine-reader", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def __iter__(self) -> Iterator[MediaFrame]:
+        if self._thread is None:
+            self.start()
+        while True:
+            item = self._queue.get()
+            if item is self._END:
+                break
+            yield item
+        if self.error:
+            raise self.error
+
+    def _emit(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        try:
+            if self._files is not None:
+                self._read_images()
+            else:
+                self._read_video()
+        except Exception as e:
+            self.error = e
+        finally:
+            self._stop.set()
+            # The end marker must arrive even if the consumer is slow
+            self._queue.put(self._END)
+
+    def _read_images(self):
+        delivered = 0
+        for index in range(0, len(self._files), self.stride):
+            if self.max_frames and delivered >= self.max_frames:
+                break
+            path = self._files[index]
+            image = cv2.imread(path)
+            if image is None:
+                print(f"Warning: Could not read image {path}, skipping.")
+                continue
+            if not self._emit(MediaFrame(index, image, path, 0.0)):
+                break
+            delivered += 1
+
+    def _read_video(self):
+        for frame in iter_video_frames(self.path, stride=self.stride, max_frames=self.max_frames):
+            if not self._emit(frame):
+                break
+
+def iter_video_frames(path: str, start: int = 0, end: Optional[int] = None, stride: int = 1,
+                      max_frames: Optional[int] = None) -> Iterator[MediaFrame]:
+    """
+    Synchronously decodes frames [start, end) of a video, every `stride`-th one.
+    Skipped frames are grabbed but never decoded.
+    """
+    cap = cv2.VideoCapture(path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        index = start
+        delivered = 0
+        while (end is None or index < end) and (not max_frames or delivered < max_frames):
+            if (index - start) % stride:
+                if not cap.grab():
+                    break
+                index += 1
+                continue
+            ret, image = cap.read()
+            if not ret:
+                break
+            yield MediaFrame(index, image, path, index * 1000.0 / fps)
+            delivered += 1
+            index += 1
+    finally:
+        cap.release()
+
+def analysis_rows(frame_index: int, source: str, timestamp_ms: float, analysis: FrameAnalysis) -> List[dict]:
+    """
+    Flattens one frame's analysis into metrics rows: one per detected person,
+    or a single row without metrics when nobody was found.
+    """
+    base = {
+        "frame_index": frame_index,
+        "source": source,
+        "timestamp_ms": round(timestamp_ms, 1),
+        "detection_mode": analysis.detection_mode,
+    }
+    if not analysis.results:
+        return [base]
+
+    rows = []
+    for res in analysis.results:
+        row = dict(base, person_id=res.person_id)
+        if res.metrics:
+            m = res.metrics
+            row.update(
+                cobb_angle_thoracic=m.cobb_angle_thoracic,
+                lumbar_flexion=m.lumbar_flexion,
+                cervical_flexion=m.cervical_flexion,
+                symmetry_index=m.symmetry_index,
+                health_score=m.health_score,
+                posture_type=m.posture_type,
+            )
+        rows.append(row)
+    return rows
+
+class FrameMetricsWriter:
+    """
+    Per-frame metrics export: one row per detected person (or one empty row
+    per frame with nobody in it). Format follows the extension: .csv or .jsonl.
+    """
+
+    FIELDS = [
+        "frame_index", "source", "timestamp_ms", "detection_mode", "person_id",
+        "cobb_angle_thoracic", "lumbar_flexion", "cervical_flexion",
+        "symmetry_index", "health_score", "posture_type",
+    ]
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = "jsonl" if path.lower().endswith((".jsonl", ".json")) else "csv"
+        self._file: IO = open(path, "w", newline="")
+        self._csv = None
+        if self.format == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=self.FIELDS)
+            self._csv.writeheader()
+
+    def write(self, frame: MediaFrame, analysis: FrameAnalysis):
+        self.write_rows(analysis_rows(frame.index, frame.source, frame.timestamp_ms, analysis))
+
+    def write_rows(self, rows: List[dict]):
+        for row in rows:
+            self._write_row(row)
+
+    def _write_row(self, row: dict):
+        if self._csv:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row) + "\n")
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
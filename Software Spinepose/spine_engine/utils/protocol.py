@@ -0,0 +1,160 @@
+"""
+/ws Wire Protocol.
+
+Negotiated at connect time through the WebSocket subprotocol header:
+- "spine.v1.binary": Binary frames sent with send_bytes (preferred).
+- "spine.v1.json":   Legacy base64-in-JSON text frames.
+Clients that offer no subprotocol get the legacy JSON mode.
+
+Binary frame layout (all integers big-endian):
+    [2s  magic  b"SP"]
+    [B   version]
+    [B   segment count]
+    [I   header length]  [header: UTF-8 JSON]
+    then per segment:
+    [I   segment length] [segment: raw JPEG bytes]
+
+The JSON header carries the metrics/status fields plus a "segments" list
+naming each JPEG in order (e.g. ["main", "sagittal", "coronal", "heatmap"]).
+"""
+
+import base64
+import json
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+PROTOCOL_VERSION = 1
+BINARY_SUBPROTOCOL = "spine.v1.binary"
+JSON_SUBPROTOCOL = "spine.v1.json"
+
+MAGIC = b"SP"
+_PREFIX = struct.Struct(">2sBBI")
+_SEGMENT_LEN = struct.Struct(">I")
+
+# Legacy JSON keys for each rendered view
+JSON_IMAGE_KEYS = {
+    "main": "image",
+    "sagittal": "image_sagittal",
+    "coronal": "image_coronal",
+    "heatmap": "image_heatmap",
+}
+
+
+ALL_VIEWS = ("main", "sagittal", "coronal", "heatmap")
+
+
+@dataclass
+class ViewSpec:
+    """A client's subscription to one rendered view."""
+    name: str
+    max_width: Optional[int] = None   # Downscale (keeping aspect) if wider
+    max_height: Optional[int] = None
+    quality: Optional[int] = None     # JPEG quality 1-100, None = encoder default
+
+
+def default_view_subscription() -> Dict[str, ViewSpec]:
+    return {name: ViewSpec(name) for name in ALL_VIEWS}
+
+
+def parse_view_subscription(value: Any) -> Dict[str, ViewSpec]:
+    """
+    Parses the `subscribe_views` command value. Accepts either a list of view names
+    or a mapping of view name -> {"width", "height", "quality"}.
+    Unknown view names are ignored.
+    """
+    if isinstance(value, (list, tuple)):
+        value = {name: {} for name in value}
+    if not isinstance(value, dict):
+        raise ValueError("View subscription must be a list or an object")
+
+    specs = {}
+    for name, opts in value.items():
+        if name not in ALL_VIEWS:
+            continue
+        opts = opts or {}
+        if not isinstance(opts, dict):
+            raise ValueError(f"Options for view {name!r} must be an object")
+        quality = opts.get("quality")
+        specs[name] = ViewSpec(
+            name=name,
+            max_width=int(opts["width"]) if opts.get("width") else None,
+            max_height=int(opts["height"]) if opts.get("height") else None,
+            quality=max(1, min(100, int(quality))) if quality else None,
+        )
+    return specs
+
+
+def negotiate_subprotocol(offered: List[str]) -> Optional[str]:
+    """Picks the best protocol the client offered. None means legacy JSON, no header echoed."""
+    for candidate in (BINARY_SUBPROTOCOL, JSON_SUBPROTOCOL):
+        if candidate in offered:
+            return candidate
+    return None
+
+
+def encode_jpeg(img: np.ndarray, quality: Optional[int] = None) -> bytes:
+    params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)] if quality else []
+    _, buffer = cv2.imencode('.jpg', img, params)
+    return buffer.tobytes()
+
+
+def encode_view(img: np.ndarray, spec: ViewSpec) -> bytes:
+    """Downscales to the subscribed resolution, then JPEG-encodes at the subscribed quality."""
+    h, w = img.shape[:2]
+    scale = 1.0
+    if spec.max_width and w > spec.max_width:
+        scale = spec.max_width / w
+    if spec.max_height and h * scale > spec.max_height:
+        scale = spec.max_height / h
+    if scale < 1.0:
+        size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+    return encode_jpeg(img, spec.quality)
+
+
+def pack_binary_frame(header: Dict, segments: List[Tuple[str, bytes]]) -> bytes:
+    """Builds one binary message: prefix + JSON header + length-prefixed JPEG segments."""
+    header = dict(header)
+    header["v"] = PROTOCOL_VERSION
+    header["segments"] = [name for name, _ in segments]
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+    parts = [_PREFIX.pack(MAGIC, PROTOCOL_VERSION, len(segments), len(header_bytes)), header_bytes]
+    for _, data in segments:
+        parts.append(_SEGMENT_LEN.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def unpack_binary_frame(data: bytes) -> Tuple[Dict, Dict[str, bytes]]:
+    """Inverse of pack_binary_frame(). Used by tools and Python clients."""
+    magic, version, count, header_len = _PREFIX.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a Spine binary frame")
+    if version != PROTOCOL_VERSION:
+        raise ValueError(f"Unsupported protocol version: {version}")
+
+    offset = _PREFIX.size
+    header = json.loads(data[offset:offset + header_len].decode("utf-8"))
+    offset += header_len
+
+    segments = {}
+    for name in header.get("segments", [])[:count]:
+        (seg_len,) = _SEGMENT_LEN.unpack_from(data, offset)
+        offset += _SEGMENT_LEN.size
+        segments[name] = bytes(data[offset:offset + seg_len])
+        offset += seg_len
+    return header, segments
+
+
+def pack_json_frame(header: Dict, segments: List[Tuple[str, bytes]]) -> str:
+    """Legacy text frame: base64 images under the original `image*` keys."""
+    message = dict(header)
+    for name, data in segments:
+        key = JSON_IMAGE_KEYS.get(name, f"image_{name}")
+        message[key] = base64.b64encode(data).decode('utf-8')
+    return json.dumps(message)
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+class RollingHistogram:
+    """
+    Latency samples over a sliding window (the last `window` observations),
+    plus lifetime count/sum for Prometheus summaries.
+    """
+
+    def __init__(self, window: int = 1024):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def quantiles(self, qs=QUANTILES) -> Dict[float, float]:
+        if not self._samples:
+            return {q: 0.0 for q in qs}
+        values = np.percentile(np.fromiter(self._samples, dtype=np.float64), [q * 100 for q in qs])
+        return dict(zip(qs, values.tolist()))
+
+class Telemetry:
+    """
+    Rolling latency histograms keyed by (metric, label value), e.g.
+    ("stage", "detection") or ("endpoint", "/analyze_file").
+    Values are recorded in milliseconds and exported in seconds.
+    """
+
+    # metric name -> (Prometheus name, label name, help text)
+    METRICS = {
+        "stage": ("spine_stage_latency_seconds", "stage", "Per-stage frame processing latency"),
+        "endpoint": ("spine_request_latency_seconds", "endpoint", "HTTP request / WebSocket message latency"),
+    }
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], RollingHistogram] = {}
+        self._counters: Dict[str, float] = {}
+
+    def observe(self, metric: str, label: str, ms: float):
+        with self._lock:
+            hist = self._histograms.get((metric, label))
+            if hist is None:
+                hist = self._histograms[(metric, label)] = RollingHistogram(self.window)
+            hist.observe(ms)
+
+    def observe_stages(self, timings_ms: Dict[str, float]):
+        for stage, ms in timings_ms.items():
+            self.observe("stage", stage, ms)
+
+    def increment(self, name: str, amount: float = 1.0):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0.0) + amount
+
+    @contextmanager
+    def timer(self, metric: str, label: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(metric, label, (time.perf_counter() - start) * 1000.0)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """{metric: {label: {"p50", "p95", "p99", "count"}}} in milliseconds."""
+        out: Dict[str, Dict[str, Dict[str, float]]] = {}
+        with self._lock:
+            for (metric, label), hist in self._histograms.items():
+                q = hist.quantiles()
+                out.setdefault(metric, {})[label] = {
+                    "p50": round(q[0.5], 2),
+                    "p95": round(q[0.95], 2),
+                    "p99": round(q[0.99], 2),
+                    "count": hist.count,
+                }
+        return out
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (summaries + counters)."""
+        lines: List[str] = []
+        with self._lock:
+            for metric, (name, label_name, help_text) in self.METRICS.items():
+                series = sorted(((label, h) for (m, label), h in self._histograms.items() if m == metric), key=lambda s: s[0])
+                if not series:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} summary")
+                for label, hist in series:
+                    label_value = _escape(label)
+                    for q, value in hist.quantiles().items():
+                        lines.append(f'{name}{{{label_name}="{label_value}",quantile="{q}"}} {value / 1000.0:.6f}')
+                    lines.append(f'{name}_sum{{{label_name}="{label_value}"}} {hist.total / 1000.0:.6f}')
+                    lines.append(f'{name}_count{{{label_name}="{label_value}"}} {hist.count}')
+            for name, value in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
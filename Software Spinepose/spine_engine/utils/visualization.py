@@ -1,8 +1,8 @@
 
 import cv2
 import numpy as np
-from typing import Dict, Any, Tuple
-from ..core.types import FrameAnalysis, AnalysisResult, Keypoint
+from typing import Dict, Any, Tuple, Iterable, Optional, Mapping
+from ..core.types import FrameAnalysis, AnalysisResult, Keypoint, Landmarks, LANDMARK_NAMES
 
 class Visualizer:
     """
@@ -23,7 +23,7 @@ class Visualizer:
         self.C_TORSO = (255, 200, 0) # Light Blue looking
         self.C_FACE = (255, 255, 0)  # Cyan
 
-    def draw_skeleton(self, img: np.ndarray, keypoints: Dict[str, Keypoint]):
+    def draw_skeleton(self, img: np.ndarray, keypoints: Mapping[str, Keypoint]):
         """
         Draws skeleton with fixed aesthetic:
         - Points: Red with White Border
@@ -62,42 +62,48 @@ class Visualizer:
             ('RIGHT_SHOULDER', 'RIGHT_HIP', self.C_RIGHT),
         ]
         
+        # Normalized -> pixel coordinates, vectorized for array-backed landmarks
+        if isinstance(keypoints, Landmarks):
+            px = (keypoints.xy * (w, h)).astype(np.int32).tolist()
+            norm = keypoints.xy.tolist()
+            points = {name: tuple(p) for name, p in zip(LANDMARK_NAMES, px)}
+            norm_points = dict(zip(LANDMARK_NAMES, norm))
+        else:
+            points = {name: (int(kp.x * w), int(kp.y * h)) for name, kp in keypoints.items()}
+            norm_points = {name: (kp.x, kp.y) for name, kp in keypoints.items()}
+        
         # 2. Draw Limb Lines
         for start_name, end_name, color in connections:
-            kp1 = keypoints.get(start_name)
-            kp2 = keypoints.get(end_name)
+            p1 = points.get(start_name)
+            p2 = points.get(end_name)
             
-            if kp1 and kp2:
-                p1 = (int(kp1.x * w), int(kp1.y * h))
-                p2 = (int(kp2.x * w), int(kp2.y * h))
+            if p1 and p2:
                 cv2.line(img, p1, p2, color, 2, cv2.LINE_AA)
 
         # 3. Draw Virtual Spine (Central Line)
         # Mid-Shoulder to Mid-Hip
-        ls = keypoints.get('LEFT_SHOULDER')
-        rs = keypoints.get('RIGHT_SHOULDER')
-        lh = keypoints.get('LEFT_HIP')
-        rh = keypoints.get('RIGHT_HIP')
+        ls = norm_points.get('LEFT_SHOULDER')
+        rs = norm_points.get('RIGHT_SHOULDER')
+        lh = norm_points.get('LEFT_HIP')
+        rh = norm_points.get('RIGHT_HIP')
         
         if ls and rs and lh and rh:
-            mx_shoulder = int((ls.x + rs.x) / 2 * w)
-            my_shoulder = int((ls.y + rs.y) / 2 * h)
+            mx_shoulder = int((ls[0] + rs[0]) / 2 * w)
+            my_shoulder = int((ls[1] + rs[1]) / 2 * h)
             
-            mx_hip = int((lh.x + rh.x) / 2 * w)
-            my_hip = int((lh.y + rh.y) / 2 * h)
+            mx_hip = int((lh[0] + rh[0]) / 2 * w)
+            my_hip = int((lh[1] + rh[1]) / 2 * h)
             
             # Draw Spine Line (Blue)
             cv2.line(img, (mx_shoulder, my_shoulder), (mx_hip, my_hip), self.C_TORSO, 2, cv2.LINE_AA)
             
             # Draw Neck (Nose to Mid-Shoulder) - Optional but usually good
-            nose = keypoints.get('NOSE')
+            nose = points.get('NOSE')
             if nose:
-                nx, ny = int(nose.x * w), int(nose.y * h)
-                cv2.line(img, (nx, ny), (mx_shoulder, my_shoulder), self.C_FACE, 2, cv2.LINE_AA)
+                cv2.line(img, nose, (mx_shoulder, my_shoulder), self.C_FACE, 2, cv2.LINE_AA)
 
         # 4. Draw Points (Last so they are on top)
-        for name, kp in keypoints.items():
-            cx, cy = int(kp.x * w), int(kp.y * h)
+        for cx, cy in points.values():
             # Outer White Ring
             cv2.circle(img, (cx, cy), 5, self.WHITE, 2) 
             # Inner Red Dot
@@ -148,41 +154,45 @@ class Visualizer:
         cv2.putText(heatmap, "STRESS MAP", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, self.WHITE, 2)
         return heatmap
 
-    def render_multiview(self, img: np.ndarray, analysis: FrameAnalysis) -> Dict[str, np.ndarray]:
-        """Returns main, sagittal, coronal, heatmap views."""
-        main_view = img.copy()
-        sagittal_view = np.zeros_like(img)
-        coronal_view = np.zeros_like(img)
-        heatmap_view = np.zeros_like(img)
+    def render_multiview(self, img: np.ndarray, analysis: FrameAnalysis,
+                         views: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Returns main, sagittal, coronal, heatmap views.
+        If `views` is given, only those views are built (unsubscribed panels cost nothing).
+        """
+        wanted = set(views) if views is not None else {"main", "sagittal", "coronal", "heatmap"}
+        out: Dict[str, np.ndarray] = {}
         
         if not analysis.results:
-            return {
-                "main": main_view,
-                "sagittal": sagittal_view,
-                "coronal": coronal_view,
-                "heatmap": heatmap_view
-            }
+            for name in wanted:
+                out[name] = img.copy() if name == "main" else np.zeros_like(img)
+            return out
             
         res = analysis.results[0]
         
         # 1. Main View Rendering (Simple Skeleton)
-        if res.keypoints:
-            self.draw_skeleton(main_view, res.keypoints)
+        # Sagittal/Coronal are crops of the annotated main view.
+        if wanted & {"main", "sagittal", "coronal"}:
+            main_view = img.copy()
+            if res.keypoints:
+                self.draw_skeleton(main_view, res.keypoints)
+                
+            # Draw HUD (Simplified)
+            self.draw_hud(main_view, res)
             
-        # Draw HUD (Simplified)
-        self.draw_hud(main_view, res)
+            if "main" in wanted:
+                out["main"] = main_view
         
-        # 2. Gen Sub-Views
-        sagittal_view = self._create_crop(main_view, res.bbox, "SAGITTAL")
-        coronal_view = self._create_crop(main_view, res.bbox, "CORONAL")
-        heatmap_view = self._create_heatmap(img, res.bbox)
+            # 2. Gen Sub-Views
+            if "sagittal" in wanted:
+                out["sagittal"] = self._create_crop(main_view, res.bbox, "SAGITTAL")
+            if "coronal" in wanted:
+                out["coronal"] = self._create_crop(main_view, res.bbox, "CORONAL")
+                
+        if "heatmap" in wanted:
+            out["heatmap"] = self._create_heatmap(img, res.bbox)
         
-        return {
-            "main": main_view,
-            "sagittal": sagittal_view,
-            "coronal": coronal_view,
-            "heatmap": heatmap_view
-        }
+        return out
 
     def draw_hud(self, img: np.ndarray, result: AnalysisResult):
         """Draws floating text stats."""
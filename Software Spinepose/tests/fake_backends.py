@@ -0,0 +1,74 @@
+"""Model-free detector backends, selectable by path so spawned workers can load them."""
+import os
+import time
+
+import numpy as np
+
+from spine_engine.core.types import NUM_LANDMARKS, Landmarks
+from spine_engine.detectors.base import BaseDetector
+
+# Frame contents that make a worker misbehave (all pixels equal to the value)
+CRASH_PIXEL = 255
+HANG_PIXEL = 128
+
+PERSON_BACKEND = "tests.fake_backends:FakePersonDetector"
+POSE_BACKEND = "tests.fake_backends:FakePoseEstimator"
+ENGINE_CONFIG = {"yolo_config": {"backend": PERSON_BACKEND}, "pose_config": {"backend": POSE_BACKEND}}
+
+
+class FakePersonDetector(BaseDetector):
+    def load_model(self):
+        pass
+
+    def preprocess(self, image):
+        return image
+
+    def predict(self, input_data, imgsz=None):
+        if input_data.size and input_data.min() == input_data.max():
+            if input_data.flat[0] == CRASH_PIXEL:
+                os._exit(1)  # Like a segfault or OOM kill: no exception, the process is gone
+            if input_data.flat[0] == HANG_PIXEL:
+                time.sleep(3600)
+        return input_data
+
+    def postprocess(self, raw_output):
+        return []
+
+    def detect(self, image: np.ndarray, imgsz=None):
+        return self.postprocess(self.predict(self.preprocess(image), imgsz=imgsz))
+
+    def process_batch(self, images, imgsz=None):
+        return [self.detect(image, imgsz) for image in images]
+
+
+class FakePoseEstimator(BaseDetector):
+    def load_model(self):
+        pass
+
+    def preprocess(self, image):
+        return image
+
+    def predict(self, input_data):
+        return None
+
+    def postprocess(self, raw_output):
+        return None
+
+    def close(self):
+        pass
+
+
+class FakeLandmarkEstimator(FakePoseEstimator):
+    """Finds a person in any crop that is not all black (landmarks spread over the crop)."""
+
+    def predict(self, input_data):
+        if not input_data.size or input_data.max() == 0:
+            return None
+        data = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        data[:, 0] = np.linspace(0.3, 0.7, NUM_LANDMARKS)
+        data[:, 1] = np.linspace(0.1, 0.9, NUM_LANDMARKS)
+        data[:, 3] = 1.0
+        return Landmarks(data)
+
+    def postprocess(self, raw_output):
+        return raw_output
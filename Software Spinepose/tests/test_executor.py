@@ -0,0 +1,53 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from spine_engine.core.executor import BatchExecutor, analyze_upload
+from spine_engine.core.session import HybridEngine
+from spine_engine.utils.visualization import Visualizer
+from tests.fake_backends import CRASH_PIXEL, ENGINE_CONFIG, HANG_PIXEL
+
+
+def _write_images(folder, pixels):
+    for i, value in enumerate(pixels):
+        image = np.full((32, 32, 3), value, dtype=np.uint8)
+        image[0, 0] = value if value in (CRASH_PIXEL, HANG_PIXEL) else 0
+        cv2.imwrite(os.path.join(folder, f"{i:03d}.png"), image)
+
+
+def test_killed_worker_fails_its_item_only(tmp_path):
+    _write_images(str(tmp_path), [10, 20, CRASH_PIXEL, 30, 40])
+    executor = BatchExecutor(workers=2, engine_config=ENGINE_CONFIG, item_timeout_s=60)
+    results = list(executor.run([str(tmp_path)]))
+
+    assert [r.index for r in results] == [0, 1, 2, 3, 4]
+    assert [r.ok for r in results] == [True, True, False, True, True]
+    assert "died" in results[2].error
+    assert executor.summary.failed == 1
+
+
+def test_hung_worker_times_out(tmp_path):
+    _write_images(str(tmp_path), [10, HANG_PIXEL, 20])
+    executor = BatchExecutor(workers=1, engine_config=ENGINE_CONFIG, item_timeout_s=3)
+    results = list(executor.run([str(tmp_path)]))
+
+    assert [r.ok for r in results] == [True, False, True]
+    assert "timed out" in results[1].error
+
+
+def test_failing_initializer_raises(tmp_path):
+    _write_images(str(tmp_path), [10])
+    config = {"yolo_config": {"backend": "tests.fake_backends:Missing"}}
+    with pytest.raises(RuntimeError, match="failed to start"):
+        list(BatchExecutor(workers=1, engine_config=config, start_timeout_s=60).run([str(tmp_path)]))
+
+
+def test_upload_reports_render_and_encode_timings():
+    engine = HybridEngine(ENGINE_CONFIG)
+    frame = np.full((64, 64, 3), 10, dtype=np.uint8)
+    upload = analyze_upload(engine, Visualizer(), frame)
+
+    assert set(upload.timings_ms) == {"render", "encode"}
+    assert "total" in upload.analysis.timings_ms
@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+
+from spine_engine.analysis.geometry import analyze_biomechanics, analyze_biomechanics_batch, batch_to_metrics
+from spine_engine.core.types import NUM_LANDMARKS, Landmarks
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_array_path_matches_keypoint_path(seed):
+    rng = np.random.default_rng(seed)
+    data = rng.uniform(0.0, 1.0, size=(NUM_LANDMARKS, 4)).astype(np.float32)
+    landmarks = Landmarks(data)
+
+    expected = analyze_biomechanics(landmarks)
+    actual = batch_to_metrics(analyze_biomechanics_batch(landmarks.data))[0]
+
+    assert actual == expected
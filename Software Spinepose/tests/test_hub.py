@@ -0,0 +1,69 @@
+import time
+
+from spine_engine.core.hub import CameraHub
+from spine_engine.core.sources import create_source, source_key
+from spine_engine.core.types import FrameAnalysis
+
+
+class _Stream:
+    def configure(self, **kwargs):
+        pass
+
+    def close(self):
+        pass
+
+
+class SlowEngine:
+    """Stands in for HybridEngine: no models, a fixed cost per frame."""
+
+    def __init__(self, delay_s=0.005):
+        self.delay_s = delay_s
+        self.frame_ids = []
+
+    def create_stream(self):
+        return _Stream()
+
+    def process_frame(self, frame, frame_id=0, stream=None, timestamp_ms=None):
+        time.sleep(self.delay_s)
+        self.frame_ids.append(frame_id)
+        return FrameAnalysis(frame_id=frame_id, timestamp_ms=timestamp_ms or 0.0, results=[])
+
+
+def test_camera_sources_keyed_by_device():
+    assert source_key({"type": "camera", "device": 0, "width": 1280}) == source_key({"type": "camera", "device": 0})
+    assert source_key({"type": "camera", "device": 0}) != source_key({"type": "camera", "device": 1})
+    assert source_key({"type": "synthetic", "seed": 1}) != source_key({"type": "synthetic", "seed": 2})
+
+
+def test_camera_options_share_one_source():
+    opened = []
+
+    def open_source(spec):
+        opened.append(spec)
+        return create_source({"type": "synthetic", "width": 64, "height": 48, "realtime": False})
+
+    hub = CameraHub(SlowEngine(), open_source=open_source, adaptive_config={"enabled": False})
+    first = hub.subscribe({"type": "camera", "device": 0, "width": 640, "height": 480})
+    second = hub.subscribe({"type": "camera", "device": 0, "width": 1280, "height": 720})
+    try:
+        assert first.source is second.source
+        first.resume()
+        assert first.get(timeout=5) is not None
+        assert len(opened) == 1
+    finally:
+        first.close()
+        second.close()
+
+
+def test_non_realtime_replay_analyzes_every_frame():
+    engine = SlowEngine()
+    hub = CameraHub(engine, adaptive_config={"enabled": False})
+    viewer = hub.subscribe({"type": "synthetic", "width": 64, "height": 48, "realtime": False})
+    viewer.resume()
+    try:
+        deadline = time.time() + 10
+        while len(engine.frame_ids) < 20 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        viewer.close()
+    assert engine.frame_ids[:20] == list(range(20))
@@ -0,0 +1,36 @@
+import numpy as np
+
+from spine_engine.detectors.onnx_model import ONNXPersonDetector
+
+
+def _detector():
+    detector = ONNXPersonDetector({})
+    detector.conf_threshold = 0.25
+    detector.iou_threshold = 0.7
+    return detector
+
+
+def _reference_keep(preds, conf_threshold):
+    """Ultralytics non_max_suppression(classes=[0]) pre-NMS filter: best class is person, above threshold."""
+    class_scores = preds[:, 4:]
+    best = class_scores.argmax(axis=1)
+    return (best == 0) & (class_scores.max(axis=1) > conf_threshold)
+
+
+def test_only_boxes_whose_best_class_is_person_are_kept():
+    # (anchors, 4 + 3 classes): x, y, w, h, person, car, dog; far apart so NMS keeps all
+    preds = np.array([
+        [50, 50, 20, 40, 0.90, 0.05, 0.01],   # Person
+        [150, 50, 20, 40, 0.50, 0.80, 0.00],  # Car that also scores as person: dropped
+        [250, 50, 20, 40, 0.20, 0.00, 0.00],  # Person below threshold
+        [350, 50, 20, 40, 0.40, 0.10, 0.39],  # Person, narrowly
+        [450, 50, 20, 40, 0.30, 0.00, 0.30],  # Tie: argmax picks the first class, as torch does
+    ], dtype=np.float32)
+    output = preds.T[None]  # (1, 4 + classes, anchors), as exported
+    meta = (1.0, (0.0, 0.0), (640, 640))
+
+    boxes = _detector().postprocess((output, meta))
+
+    expected = preds[_reference_keep(preds, 0.25)]
+    assert sorted(round(b.confidence, 2) for b in boxes) == sorted(round(float(s), 2) for s in expected[:, 4])
+    assert len(boxes) == 3
@@ -0,0 +1,20 @@
+import pytest
+
+from spine_engine.utils.protocol import parse_view_subscription
+
+
+def test_view_options_parsed():
+    specs = parse_view_subscription({"main": {"width": 960, "quality": 150}, "heatmap": None, "bogus": {}})
+    assert set(specs) == {"main", "heatmap"}
+    assert specs["main"].max_width == 960
+    assert specs["main"].quality == 100
+
+
+def test_list_of_names():
+    assert set(parse_view_subscription(["main", "sagittal"])) == {"main", "sagittal"}
+
+
+@pytest.mark.parametrize("opts", [5, "wide", [1, 2], True])
+def test_non_object_view_options_rejected(opts):
+    with pytest.raises(ValueError):
+        parse_view_subscription({"main": opts})
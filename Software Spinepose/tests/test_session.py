@@ -0,0 +1,50 @@
+import numpy as np
+
+from spine_engine.core.session import HybridEngine
+from spine_engine.core.types import BoundingBox
+from tests.fake_backends import PERSON_BACKEND
+
+LANDMARK_BACKEND = "tests.fake_backends:FakeLandmarkEstimator"
+
+
+def _engine():
+    engine = HybridEngine({"yolo_config": {"backend": PERSON_BACKEND},
+                           "pose_config": {"backend": LANDMARK_BACKEND}})
+    engine.load_models()
+    return engine
+
+
+def _tracked_stream(engine, rois):
+    stream = engine.create_stream()
+    stream.rois = rois
+    stream.force_detect = False
+    stream.frames_since_detection = 1
+    return stream
+
+
+def test_lost_tracked_person_forces_detection():
+    engine = _engine()
+    # Person 1 on the lit left half; person 2's ROI is now empty (black)
+    frame = np.zeros((200, 400, 3), dtype=np.uint8)
+    frame[:, :200] = 200
+    stream = _tracked_stream(engine, [(1, BoundingBox(20, 20, 180, 180, 1.0)),
+                                      (2, BoundingBox(220, 20, 380, 180, 1.0))])
+
+    analysis = engine.process_frame(frame, frame_id=1, stream=stream)
+
+    assert analysis.detection_mode == "tracked"
+    assert [r.person_id for r in analysis.results] == [1]
+    assert stream.force_detect
+
+
+def test_all_tracked_people_kept_stays_in_tracking():
+    engine = _engine()
+    frame = np.full((200, 400, 3), 200, dtype=np.uint8)
+    stream = _tracked_stream(engine, [(1, BoundingBox(20, 20, 180, 180, 1.0)),
+                                      (2, BoundingBox(220, 20, 380, 180, 1.0))])
+
+    analysis = engine.process_frame(frame, frame_id=1, stream=stream)
+
+    assert analysis.detection_mode == "tracked"
+    assert len(analysis.results) == 2
+    assert not stream.force_detect
@@ -0,0 +1,40 @@
+import json
+
+import numpy as np
+import pytest
+
+from spine_engine.core.storage import KnowledgeBase, PatientDatabase
+
+
+@pytest.mark.parametrize("legacy", [{"id": "p1"}, 42, "patients"])
+def test_non_list_legacy_file_is_skipped(tmp_path, legacy):
+    (tmp_path / "patients.json").write_text(json.dumps(legacy))
+    db = PatientDatabase(str(tmp_path))
+    try:
+        assert db.count() == 0
+    finally:
+        db.close()
+
+
+def test_legacy_list_is_migrated_once(tmp_path):
+    patients = [{"id": "p1", "name": "A"}, {"id": "p1", "name": "B"}, "junk", {"name": "C"}]
+    (tmp_path / "patients.json").write_text(json.dumps(patients))
+    db = PatientDatabase(str(tmp_path))
+    try:
+        assert db.count() == 2
+        assert db.get_patient("p1")["name"] == "A"
+    finally:
+        db.close()
+
+
+def test_query_results_do_not_alias_the_index(tmp_path):
+    kb = KnowledgeBase(str(tmp_path))
+    kb.save_reference(np.zeros((8, 8, 3), dtype=np.uint8), "kyphosis", "reference")
+
+    first = kb.query(entry_type="reference")[0]
+    first["metrics"]["cobb_angle"] = 99.0
+    first["condition"] = "changed"
+
+    again = kb.query(entry_type="reference")[0]
+    assert again["metrics"] == {}
+    assert again["condition"] == "kyphosis"
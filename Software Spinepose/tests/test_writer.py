@@ -0,0 +1,54 @@
+import threading
+
+import numpy as np
+
+from spine_engine.core.storage import PendingEntry
+from spine_engine.core.writer import KnowledgeBaseWriter
+
+
+class RecordingKB:
+    """Stands in for KnowledgeBase; keeps written IDs in memory."""
+
+    def __init__(self):
+        self.ids = []
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def prepare_entry(self, analysis, image, activity_context, domain):
+        with self._lock:
+            self._next += 1
+            return PendingEntry(record={"id": str(self._next)}, image=image)
+
+    def write_batch(self, entries, fsync=False):
+        self.ids.extend(e.record["id"] for e in entries)
+
+    def sync(self):
+        pass
+
+
+def test_accepted_entries_are_written_and_late_ones_refused():
+    kb = RecordingKB()
+    writer = KnowledgeBaseWriter(kb, {"max_pending": 4, "flush_interval": 0.01})
+    image = np.zeros((4, 4, 3), dtype=np.uint8)
+    accepted = []
+    start = threading.Barrier(5)
+
+    def submit_many():
+        start.wait()
+        for _ in range(200):
+            entry_id = writer.submit(None, image)
+            if entry_id:
+                accepted.append(entry_id)
+
+    threads = [threading.Thread(target=submit_many) for _ in range(4)]
+    for t in threads:
+        t.start()
+    start.wait()
+    writer.close()
+    for t in threads:
+        t.join()
+
+    assert sorted(kb.ids) == sorted(accepted)
+    assert len(accepted) + writer.dropped == 800
+    assert writer.submit(None, image) == ""
+    assert writer.dropped == 801
@@ -0,0 +1,386 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spine_engine.core.types import (
+    FrameAnalysis, AnalysisResult, BoundingBox, Landmarks, LANDMARK_INDEX, NUM_LANDMARKS
+)
+from spine_engine.analysis.geometry import analyze_biomechanics, analyze_biomechanics_batch
+from spine_engine.utils.visualization import Visualizer
+from spine_engine.utils.media import list_images
+from spine_engine.utils.protocol import encode_jpeg, ALL_VIEWS
+from spine_engine.core.pipeline import StreamPipeline
+from spine_engine.core.sources import SyntheticSource
+
+# Reproducible CPU benchmark for the engine stages and the live-stream path.
+#
+#   python tools/benchmark.py --save-baseline          # record tools/benchmark_baseline.json
+#   python tools/benchmark.py                          # compare against it, exit 1 on regression
+#
+# Stages that need the models (engine, end_to_end) are skipped when they
+# cannot be loaded, unless --require-engine is given. The live pipeline
+# (capture -> infer -> render -> encode through StreamPipeline) always runs,
+# with synthetic analyses standing in for the engine when it is not loaded.
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# Standing pose in normalized coordinates (x, y), keyed by landmark name
+_STANDING = {
+    "NOSE": (0.50, 0.15), "LEFT_EYE_INNER": (0.51, 0.14), "LEFT_EYE": (0.52, 0.14),
+    "LEFT_EYE_OUTER": (0.53, 0.14), "RIGHT_EYE_INNER": (0.49, 0.14), "RIGHT_EYE": (0.48, 0.14),
+    "RIGHT_EYE_OUTER": (0.47, 0.14), "LEFT_EAR": (0.54, 0.15), "RIGHT_EAR": (0.46, 0.15),
+    "MOUTH_LEFT": (0.51, 0.17), "MOUTH_RIGHT": (0.49, 0.17),
+    "LEFT_SHOULDER": (0.58, 0.27), "RIGHT_SHOULDER": (0.42, 0.27),
+    "LEFT_ELBOW": (0.61, 0.40), "RIGHT_ELBOW": (0.39, 0.40),
+    "LEFT_WRIST": (0.62, 0.52), "RIGHT_WRIST": (0.38, 0.52),
+    "LEFT_PINKY": (0.62, 0.55), "RIGHT_PINKY": (0.38, 0.55),
+    "LEFT_INDEX": (0.62, 0.55), "RIGHT_INDEX": (0.38, 0.55),
+    "LEFT_THUMB": (0.61, 0.54), "RIGHT_THUMB": (0.39, 0.54),
+    "LEFT_HIP": (0.55, 0.55), "RIGHT_HIP": (0.45, 0.55),
+    "LEFT_KNEE": (0.55, 0.72), "RIGHT_KNEE": (0.45, 0.72),
+    "LEFT_ANKLE": (0.55, 0.90), "RIGHT_ANKLE": (0.45, 0.90),
+    "LEFT_HEEL": (0.55, 0.92), "RIGHT_HEEL": (0.45, 0.92),
+    "LEFT_FOOT_INDEX": (0.57, 0.93), "RIGHT_FOOT_INDEX": (0.43, 0.93),
+}
+
+# --- Inputs ---
+
+def synthetic_landmarks(rng: np.random.Generator) -> Landmarks:
+    data = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    for name, (x, y) in _STANDING.items():
+        data[LANDMARK_INDEX[name]] = (x, y, 0.0, 0.99)
+    data[:, :2] += rng.normal(0, 0.01, size=(NUM_LANDMARKS, 2))
+    return Landmarks(data)
+
+def synthetic_analysis(frame: np.ndarray, rng: np.random.Generator, frame_id: int = 0) -> FrameAnalysis:
+    h, w = frame.shape[:2]
+    landmarks = synthetic_landmarks(rng)
+    xy = landmarks.xy * (w, h)
+    (x1, y1), (x2, y2) = xy.min(axis=0), xy.max(axis=0)
+    result = AnalysisResult(
+        person_id=0,
+        bbox=BoundingBox(int(x1), int(y1), int(x2), int(y2), 0.9),
+        keypoints=landmarks,
+        metrics=analyze_biomechanics(landmarks),
+    )
+    return FrameAnalysis(frame_id=frame_id, timestamp_ms=0.0, results=[result])
+
+def synthetic_frames(count: int, rng: np.random.Generator, size=(480, 640)) -> List[np.ndarray]:
+    # Smooth noise compresses like a camera frame; pure noise would overstate JPEG cost
+    frames = []
+    for _ in range(count):
+        small = rng.integers(0, 256, size=(size[0] // 16, size[1] // 16, 3), dtype=np.uint8)
+        frames.append(cv2.resize(small, (size[1], size[0]), interpolation=cv2.INTER_CUBIC))
+    return frames
+
+def load_frames(images_dir: Optional[str], synthetic: int, max_frames: Optional[int], seed: int) -> List[np.ndarray]:
+    frames = []
+    if images_dir and os.path.isdir(images_dir):
+        for path in list_images(images_dir):
+            image = cv2.imread(path)
+            if image is not None:
+                frames.append(image)
+    frames.extend(synthetic_frames(synthetic, np.random.default_rng(seed)))
+    return frames[:max_frames] if max_frames else frames
+
+# --- Measurement ---
+
+def measure(fn: Callable[[int], object], iterations: int, warmup: int) -> Dict[str, float]:
+    """Runs fn(i) `warmup` + `iterations` times; stats cover the timed runs only."""
+    for i in range(warmup):
+        fn(i)
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples[i] = (time.perf_counter() - start) * 1000.0
+    return summarize(samples)
+
+def summarize(samples_ms) -> Dict[str, float]:
+    """Latency stats over per-call samples in ms; fps assumes the calls run back to back."""
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    iterations = len(samples)
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    total_s = samples.sum() / 1000.0
+    return {
+        "iterations": iterations,
+        "mean_ms": round(float(samples.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "fps": round(iterations / total_s, 2) if total_s > 0 else 0.0,
+    }
+
+def measure_engine(fn: Callable[[int], FrameAnalysis], iterations: int, warmup: int,
+                   stages: Dict[str, Dict], name: str):
+    """measure() for engine calls, plus one stage per engine timing (detection, pose, geometry)."""
+    for i in range(warmup):
+        fn(i)
+    timings: Dict[str, List[float]] = {}
+
+    def run(i: int):
+        for key, ms in fn(i).timings_ms.items():
+            if key != "total":
+                timings.setdefault(key, []).append(ms)
+
+    stages[name] = measure(run, iterations, 0)
+    for key, samples in timings.items():
+        stages[f"{name}_{key}"] = summarize(samples)
+
+# --- Live Pipeline ---
+
+def run_pipeline(engine, viz: Visualizer, args) -> Dict[str, Dict]:
+    """
+    Drives the live path as /ws does: a paced SyntheticSource feeds StreamPipeline
+    (capture thread -> inference -> render/encode -> async consumer). Latest-wins
+    queues drop frames when a stage falls behind, exactly as in production.
+    Without an engine, synthetic analyses stand in for inference.
+    """
+    # Paced here rather than in the source, so the capture stage times the read alone
+    source = SyntheticSource({"fps": args.pipeline_fps, "seed": args.seed, "realtime": False})
+    source.open()
+    rng = np.random.default_rng(args.seed)
+    stream = engine.create_stream() if engine is not None else None
+    samples: Dict[str, List[float]] = {}
+    captured_at: Dict[int, float] = {}
+    counter = {"captured": 0, "clock": None}
+
+    def record(stage: str, ms: float):
+        samples.setdefault(stage, []).append(ms)
+
+    def capture():
+        if counter["captured"] >= args.pipeline_frames:
+            return None
+        if counter["clock"] is None:
+            counter["clock"] = time.perf_counter()
+        due = counter["clock"] + counter["captured"] / args.pipeline_fps
+        time.sleep(max(0.0, due - time.perf_counter()))
+        start = time.perf_counter()
+        frame = source.read()
+        record("capture", (time.perf_counter() - start) * 1000.0)
+        captured_at[counter["captured"]] = time.perf_counter()  # Matches the pipeline's frame_id
+        counter["captured"] += 1
+        return frame.image
+
+    def infer(frame, frame_id):
+        start = time.perf_counter()
+        if engine is not None:
+            analysis = engine.process_frame(frame, frame_id=frame_id, stream=stream)
+            for key, ms in analysis.timings_ms.items():
+                if key != "total":
+                    record(key, ms)
+        else:
+            analysis = synthetic_analysis(frame, rng, frame_id)
+        record("infer" if engine is not None else "infer_synthetic", (time.perf_counter() - start) * 1000.0)
+        return analysis
+
+    def render(frame, analysis):
+        start = time.perf_counter()
+        views = viz.render_multiview(frame, analysis)
+        rendered = time.perf_counter()
+        payload = [encode_jpeg(views[v], 85) for v in ALL_VIEWS]
+        record("render", (rendered - start) * 1000.0)
+        record("encode", (time.perf_counter() - rendered) * 1000.0)
+        return analysis.frame_id, payload
+
+    async def consume() -> float:
+        pipeline = StreamPipeline(capture, infer, render)
+        pipeline.start()
+        pipeline.resume()
+        start = time.perf_counter()
+        async for frame_id, _ in pipeline.results():
+            record("end_to_end", (time.perf_counter() - captured_at[frame_id]) * 1000.0)
+        pipeline.stop()
+        counter["dropped"] = pipeline.dropped_frames
+        return time.perf_counter() - start
+
+    try:
+        wall_s = asyncio.run(consume())
+    finally:
+        if stream is not None:
+            stream.close()
+        source.release()
+
+    stages = {f"pipeline_{stage}": summarize(values) for stage, values in samples.items()}
+    if "pipeline_end_to_end" in stages:
+        # Capture-to-delivery latency; fps is what the client actually receives
+        delivered = stages["pipeline_end_to_end"]["iterations"]
+        stages["pipeline_end_to_end"]["fps"] = round(delivered / wall_s, 2) if wall_s > 0 else 0.0
+        stages["pipeline_end_to_end"]["dropped"] = counter["dropped"]
+    return stages
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+def load_engine(require: bool):
+    try:
+        from spine_engine.core.session import HybridEngine
+        engine = HybridEngine()
+        engine.load_models()
+        return engine
+    except Exception as e:
+        if require:
+            raise
+        print(f"Skipping engine stages ({type(e).__name__}: {e})")
+        return None
+
+# --- Suite ---
+
+def run_suite(args) -> Dict:
+    rng = np.random.default_rng(args.seed)
+    frames = load_frames(args.images, args.synthetic, args.max_frames, args.seed)
+    if not frames:
+        raise SystemExit("No frames to benchmark.")
+    n = len(frames)
+    viz = Visualizer()
+    analyses = [synthetic_analysis(f, rng, i) for i, f in enumerate(frames)]
+    poses = np.stack([a.results[0].keypoints.data for a in analyses])
+    rendered = [viz.render_multiview(f, a) for f, a in zip(frames, analyses)]
+
+    stages: Dict[str, Dict] = {}
+    print(f"Benchmarking {n} frames ({args.warmup} warmup iterations per stage)...")
+
+    stages["geometry"] = measure(lambda i: analyze_biomechanics(analyses[i % n].results[0].keypoints), n, args.warmup)
+    batch = measure(lambda i: analyze_biomechanics_batch(poses), args.batch_repeats, 1)
+    # Report per pose, so it is comparable with the scalar path
+    stages["geometry_batch"] = {
+        **batch,
+        "per_pose_ms": round(batch["mean_ms"] / n, 4),
+        "fps": round(batch["fps"] * n, 2),
+    }
+    stages["render"] = measure(lambda i: viz.render_multiview(frames[i % n], analyses[i % n]), n, args.warmup)
+    stages["encode_main"] = measure(lambda i: encode_jpeg(rendered[i % n]["main"], 85), n, args.warmup)
+    stages["encode_all_views"] = measure(
+        lambda i: [encode_jpeg(rendered[i % n][v], 85) for v in ALL_VIEWS], n, args.warmup
+    )
+
+    engine = None if args.skip_engine else load_engine(args.require_engine)
+    if engine is not None:
+        measure_engine(lambda i: engine.process_frame(frames[i % n]), n, args.warmup, stages, "engine")
+
+        stream = engine.create_stream()
+        try:
+            measure_engine(
+                lambda i: engine.process_frame(frames[i % n], frame_id=i, stream=stream),
+                n, args.warmup, stages, "engine_tracked"
+            )
+        finally:
+            stream.close()
+
+        def end_to_end(i: int):
+            frame = frames[i % n]
+            analysis = engine.process_frame(frame)
+            views = viz.render_multiview(frame, analysis)
+            return [encode_jpeg(views[v], 85) for v in ALL_VIEWS]
+
+        stages["end_to_end"] = measure(end_to_end, n, args.warmup)
+
+    if not args.skip_pipeline:
+        print(f"Running the live pipeline for {args.pipeline_frames} frames at {args.pipeline_fps} FPS...")
+        stages.update(run_pipeline(engine, viz, args))
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+        },
+        "frames": n,
+        "stages": stages,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Regressions: p50/p95 slower, or peak RSS larger, by more than `tolerance`."""
+    regressions = []
+    for stage, stats in current["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            if base.get(key) and stats[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{stage}.{key}: {stats[key]:.2f} vs baseline {base[key]:.2f}")
+    base_rss = baseline.get("peak_rss_mb")
+    if base_rss and current["peak_rss_mb"] > base_rss * (1 + tolerance):
+        regressions.append(f"peak_rss_mb: {current['peak_rss_mb']} vs baseline {base_rss}")
+    return regressions
+
+def print_report(result: Dict):
+    print(f"\n{'stage':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'fps':>10}")
+    for stage, s in result["stages"].items():
+        print(f"{stage:<28}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['fps']:>10.1f}")
+    dropped = result["stages"].get("pipeline_end_to_end", {}).get("dropped")
+    if dropped is not None:
+        print(f"\nPipeline dropped {dropped} frames (latest-wins queues)")
+    print(f"\nPeak RSS: {result['peak_rss_mb']} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Spine-AI benchmark suite (CPU)")
+    parser.add_argument("--images", type=str, default="spine_db/images", help="Directory of real frames to replay")
+    parser.add_argument("--synthetic", type=int, default=50, help="Synthetic frames added to the replay set")
+    parser.add_argument("--max-frames", type=int, default=None, help="Cap on total frames")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed iterations per stage")
+    parser.add_argument("--batch-repeats", type=int, default=20, help="Timed runs of the batch geometry stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-engine", action="store_true", help="Only benchmark stages that need no models")
+    parser.add_argument("--require-engine", action="store_true", help="Fail instead of skipping engine stages")
+    parser.add_argument("--skip-pipeline", action="store_true", help="Skip the live StreamPipeline run")
+    parser.add_argument("--pipeline-frames", type=int, default=150, help="Frames captured in the pipeline run")
+    parser.add_argument("--pipeline-fps", type=float, default=30.0, help="Capture rate of the pipeline run (camera-like)")
+    parser.add_argument("--output", type=str, default=None, help="Write this run's results as JSON")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown before flagging (fraction)")
+    args = parser.parse_args()
+
+    # Single-threaded libraries keep runs comparable across machines/loads
+    cv2.setNumThreads(1)
+
+    result = run_suite(args)
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(result, baseline, args.tolerance)
+    if regressions:
+        print(f"\nREGRESSIONS (>{args.tolerance:.0%} slower than baseline):")
+        for line in regressions:
+            print(f"  - {line}")
+        sys.exit(1)
+    print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+
+if __name__ == "__main__":
+    main()
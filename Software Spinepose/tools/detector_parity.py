@@ -0,0 +1,108 @@
+import argparse
+import os
+import sys
+import time
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spine_engine.core.types import BoundingBox
+from spine_engine.core.tracker import iou
+from spine_engine.detectors.base import create_detector
+from spine_engine.utils.media import list_images
+
+# Checks an alternative person-detector backend against the ultralytics reference.
+#
+#   yolo export model=yolov8n.pt format=onnx          # once, produces yolov8n.onnx
+#   python tools/detector_parity.py --backend onnx --model yolov8n.onnx
+#
+# Boxes are matched greedily by IoU; the run fails when recall/precision or the
+# mean IoU of matched boxes fall below the thresholds.
+
+def match(reference: List[BoundingBox], candidate: List[BoundingBox], min_iou: float) -> List[Tuple[float, float]]:
+    """Greedy one-to-one matching. Returns (iou, confidence delta) per matched pair."""
+    pairs = sorted(
+        ((iou(r, c), i, j) for i, r in enumerate(reference) for j, c in enumerate(candidate)),
+        reverse=True
+    )
+    used_r, used_c, matched = set(), set(), []
+    for overlap, i, j in pairs:
+        if overlap < min_iou:
+            break
+        if i in used_r or j in used_c:
+            continue
+        used_r.add(i)
+        used_c.add(j)
+        matched.append((overlap, abs(reference[i].confidence - candidate[j].confidence)))
+    return matched
+
+def timed_detect(detector, image: np.ndarray) -> Tuple[List[BoundingBox], float]:
+    start = time.perf_counter()
+    boxes = detector.process(image)
+    return boxes, (time.perf_counter() - start) * 1000.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Person-detector backend parity check")
+    parser.add_argument("--images", type=str, default="spine_db/images", help="Directory of test images")
+    parser.add_argument("--backend", type=str, default="onnx", help="Backend to check against ultralytics")
+    parser.add_argument("--model", type=str, default="yolov8n.onnx", help="Model file for the checked backend")
+    parser.add_argument("--reference-model", type=str, default="yolov8n.pt", help="Ultralytics weights")
+    parser.add_argument("--threads", type=int, default=0, help="Runtime threads for the checked backend")
+    parser.add_argument("--match-iou", type=float, default=0.5, help="IoU for two boxes to count as the same person")
+    parser.add_argument("--min-recall", type=float, default=0.95)
+    parser.add_argument("--min-precision", type=float, default=0.95)
+    parser.add_argument("--min-mean-iou", type=float, default=0.9)
+    args = parser.parse_args()
+
+    paths = list_images(args.images)
+    if not paths:
+        raise SystemExit(f"No images in {args.images}")
+
+    reference = create_detector("person", {"backend": "ultralytics", "model_path": args.reference_model})
+    candidate = create_detector("person", {"backend": args.backend, "model_path": args.model, "threads": args.threads})
+    reference.load_model()
+    candidate.load_model()
+    reference.warmup()
+    candidate.warmup()
+
+    ref_total = cand_total = 0
+    matched: List[Tuple[float, float]] = []
+    ref_ms, cand_ms = [], []
+
+    for path in paths:
+        image = cv2.imread(path)
+        if image is None:
+            print(f"Warning: Could not read image {path}, skipping.")
+            continue
+        ref_boxes, t_ref = timed_detect(reference, image)
+        cand_boxes, t_cand = timed_detect(candidate, image)
+        ref_ms.append(t_ref)
+        cand_ms.append(t_cand)
+
+        pairs = match(ref_boxes, cand_boxes, args.match_iou)
+        ref_total += len(ref_boxes)
+        cand_total += len(cand_boxes)
+        matched.extend(pairs)
+        if len(pairs) != len(ref_boxes) or len(pairs) != len(cand_boxes):
+            print(f"  Mismatch {os.path.basename(path)}: ultralytics {len(ref_boxes)}, "
+                  f"{args.backend} {len(cand_boxes)}, matched {len(pairs)}")
+
+    recall = len(matched) / ref_total if ref_total else 1.0
+    precision = len(matched) / cand_total if cand_total else 1.0
+    mean_iou = float(np.mean([m[0] for m in matched])) if matched else 1.0
+    mean_conf_delta = float(np.mean([m[1] for m in matched])) if matched else 0.0
+
+    print(f"\n{len(ref_ms)} images | ultralytics {ref_total} boxes, {args.backend} {cand_total} boxes")
+    print(f"Recall {recall:.3f} | Precision {precision:.3f} | Mean IoU {mean_iou:.3f} | Mean |conf delta| {mean_conf_delta:.3f}")
+    print(f"Latency p50: ultralytics {np.median(ref_ms):.1f} ms, {args.backend} {np.median(cand_ms):.1f} ms")
+
+    failed = recall < args.min_recall or precision < args.min_precision or mean_iou < args.min_mean_iou
+    print("PARITY FAILED" if failed else "Parity OK")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,28 @@
 // Real-Time Connection
 const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
 const wsUrl = `${protocol}//${window.location.host}/ws`;
+// Wire protocol, negotiated via WebSocket subprotocol (server falls back to JSON)
+const BINARY_SUBPROTOCOL = 'spine.v1.binary';
+const JSON_SUBPROTOCOL = 'spine.v1.json';
+const BINARY_PROTOCOL_VERSION = 1;
+const VIEW_ELEMENTS = {
+    main: 'scan-1',
+    sagittal: 'scan-2',
+    coronal: 'scan-3',
+    heatmap: 'scan-4'
+};
 let socket;
 let isStreaming = false;
 let isRecording = false;
 let isCameraHidden = false;
 
 function connectWebSocket() {
-    socket = new WebSocket(wsUrl);
+    socket = new WebSocket(wsUrl, [BINARY_SUBPROTOCOL, JSON_SUBPROTOCOL]);
+    socket.binaryType = 'arraybuffer';
 
     socket.onopen = function () {
         console.log("Connected to Spine-AI Engine");
+        sendViewSubscription();
         const badge = document.getElementById('sys-status');
         if (badge) {
             badge.innerHTML = '<span class="status-dot" style="background:var(--accent-cyan); box-shadow: 0 0 8px var(--accent-cyan);"></span> System Online';
@@ -20,11 +32,28 @@ function connectWebSocket() {
     };
 
     socket.onmessage = function (event) {
-        const data = JSON.parse(event.data);
+        let data;
+        if (event.data instanceof ArrayBuffer) {
+            const frame = unpackBinaryFrame(event.data);
+            if (!frame) return;
+            data = frame.header;
+
+            // Draw every subscribed view; the main feed only while the camera is shown
+            for (const [name, blob] of Object.entries(frame.segments)) {
+                if (name === 'main' && isCameraHidden) continue;
+                if (VIEW_ELEMENTS[name]) drawScanBitmap(VIEW_ELEMENTS[name], blob);
+            }
+        } else {
+            data = JSON.parse(event.data);
+
+            // Server-side error (e.g. rejected command or source failure)
+            if (data.error) {
+                showStreamError(data.error);
+                return;
+            }
 
-        // Update Video Feed ONLY if Camera is NOT hidden
-        if (!isCameraHidden) {
-            if (data.image) updateScanView('scan-1', data.image);
+            // Draw every subscribed view; the main feed only while the camera is shown
+            if (data.image && !isCameraHidden) updateScanView('scan-1', data.image);
             if (data.image_sagittal) updateScanView('scan-2', data.image_sagittal);
             if (data.image_coronal) updateScanView('scan-3', data.image_coronal);
             if (data.image_heatmap) updateScanView('scan-4', data.image_heatmap);
@@ -58,6 +87,76 @@ function connectWebSocket() {
     };
 }
 
+function showStreamError(message) {
+    console.warn("Stream error:", message);
+    const badge = document.getElementById('sys-status');
+    if (badge) {
+        badge.innerHTML = '<span class="status-dot" style="background:var(--accent-red);"></span> ' + message;
+        badge.style.borderColor = 'var(--accent-red)';
+    }
+}
+
+// Binary frame: "SP" | version u8 | segment count u8 | header len u32 | header JSON | (len u32 | JPEG)*
+function unpackBinaryFrame(buffer) {
+    const view = new DataView(buffer);
+    if (view.getUint8(0) !== 0x53 || view.getUint8(1) !== 0x50) return null; // "SP"
+    const version = view.getUint8(2);
+    if (version !== BINARY_PROTOCOL_VERSION) {
+        console.warn("Unsupported frame protocol version", version);
+        return null;
+    }
+    const count = view.getUint8(3);
+    const headerLen = view.getUint32(4);
+    let offset = 8;
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, offset, headerLen)));
+    offset += headerLen;
+
+    const segments = {};
+    const names = header.segments || [];
+    for (let i = 0; i < count && i < names.length; i++) {
+        const len = view.getUint32(offset);
+        offset += 4;
+        segments[names[i]] = new Blob([new Uint8Array(buffer, offset, len)], { type: 'image/jpeg' });
+        offset += len;
+    }
+    return { header, segments };
+}
+
+const pendingDraws = {};
+
+async function drawScanBitmap(elementId, blob) {
+    // Skip if the previous frame for this panel is still decoding (latest frame wins)
+    if (pendingDraws[elementId]) return;
+    pendingDraws[elementId] = true;
+    try {
+        const bitmap = await createImageBitmap(blob);
+        const el = document.getElementById(elementId);
+        if (!el) {
+            bitmap.close();
+            return;
+        }
+        let canvas = el.querySelector('canvas.scan-canvas');
+        if (!canvas) {
+            canvas = document.createElement('canvas');
+            canvas.className = 'scan-canvas';
+            el.style.backgroundImage = '';
+            el.prepend(canvas);
+        }
+        if (canvas.width !== bitmap.width || canvas.height !== bitmap.height) {
+            canvas.width = bitmap.width;
+            canvas.height = bitmap.height;
+        }
+        canvas.getContext('2d').drawImage(bitmap, 0, 0);
+        bitmap.close();
+        el.style.opacity = '1';
+        el.style.filter = 'none';
+    } catch (e) {
+        console.error("Frame decode failed", e);
+    } finally {
+        pendingDraws[elementId] = false;
+    }
+}
+
 function updateScanView(elementId, base64Image) {
     const el = document.getElementById(elementId);
     if (el) {
@@ -105,8 +204,8 @@ let currentPatient = null;
 
 async function loadPatients() {
     try {
-        const res = await fetch('/patients');
-        const patients = await res.json();
+        const res = await fetch('/patients?limit=1000');
+        const patients = (await res.json()).items;
         const sel = document.getElementById('patient-selector');
 
         // Clear existing options except first two
@@ -145,10 +244,8 @@ async function setPatient(val) {
             document.getElementById('patient-selector').value = "";
         }
     } else if (val) {
-        const res = await fetch('/patients');
-        const patients = await res.json();
-        const p = patients.find(x => x.id === val);
-        updatePatientDisplay(p);
+        const res = await fetch(`/patients/${encodeURIComponent(val)}`);
+        updatePatientDisplay(res.ok ? await res.json() : null);
     } else {
         updatePatientDisplay(null);
     }
@@ -282,8 +379,23 @@ function setActivity(val) {
     }
 }
 
+// Only subscribed views are rendered and encoded server-side.
+// Sub-panels are small, so they are requested at a reduced resolution.
+// Hiding the camera drops only the main feed; the analysis panels stay live.
+function sendViewSubscription() {
+    if (!socket || socket.readyState !== WebSocket.OPEN) return;
+    const views = {
+        sagittal: { width: 480, quality: 75 },
+        coronal: { width: 480, quality: 75 },
+        heatmap: { width: 480, quality: 75 }
+    };
+    if (!isCameraHidden) views.main = { quality: 85 };
+    socket.send(JSON.stringify({ command: "subscribe_views", value: views }));
+}
+
 function toggleCameraVisibility() {
     isCameraHidden = !isCameraHidden;
+    sendViewSubscription();
     const btn = document.getElementById('btn-cam-toggle');
     const feed = document.getElementById('scan-1');
 
@@ -344,7 +456,7 @@ async function uploadFile(input) {
                         <div class="patient-card" style="border-left: 2px solid var(--accent-cyan);">
                             <div class="p-row" style="color: #fff; font-size: 0.9rem; line-height: 1.4;">
                                 <strong>IMPRESSION:</strong><br>
-                                ${data.report.replace(/\n/g, '<br>')}
+                                <span class="report-text">${data.report.replace(/\n/g, '<br>')}</span>
                             </div>
                         </div>
                     `;
@@ -357,6 +469,9 @@ async function uploadFile(input) {
                     if (existingPatient) existingPatient.remove();
 
                     reportContainer.insertAdjacentHTML('afterbegin', reportHTML);
+
+                    // Local template shown now; swap in the AI narrative when it arrives
+                    if (data.report_id) pollReport(data.report_id);
                 }
 
                 alert("File Analyzed Successfully. Report Generated.");
@@ -371,11 +486,44 @@ async function uploadFile(input) {
     }
 }
 
+async function pollReport(reportId, attempts = 30) {
+    for (let i = 0; i < attempts; i++) {
+        await new Promise(r => setTimeout(r, 2000));
+        try {
+            const res = await fetch(`/reports/${reportId}`);
+            if (!res.ok) return;
+            const data = await res.json();
+            if (data.status === 'pending') continue;
+            if (data.status === 'ready') {
+                const el = document.querySelector('.info-panel .report-text');
+                if (el) el.innerHTML = data.report.replace(/\n/g, '<br>');
+            }
+            return;
+        } catch (e) {
+            console.error("Report poll failed", e);
+            return;
+        }
+    }
+}
+
 // Initial Connect
 connectWebSocket();
 
 function takeScreenshot() {
     const scan1 = document.getElementById('scan-1');
+
+    // Binary protocol frames are drawn to a canvas
+    const canvas = scan1.querySelector('canvas.scan-canvas');
+    if (canvas) {
+        const a = document.createElement('a');
+        a.href = canvas.toDataURL('image/jpeg');
+        a.download = `spine_scan_${Date.now()}.jpg`;
+        document.body.appendChild(a);
+        a.click();
+        document.body.removeChild(a);
+        return;
+    }
+
     const style = window.getComputedStyle(scan1);
     const bgImage = style.backgroundImage;
 